@@ -1,22 +1,28 @@
 #!/usr/bin/env python3
 """Analyze SQL file to understand structure"""
-import re
 import sys
+from pathlib import Path
 
-sql_file = sys.argv[1] if len(sys.argv) > 1 else 'backup-1.5.2026_09-05-37_womanao0/mysql/womanao0_WP3YO.sql'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scripts.dump_index import load_index, read_statement  # noqa: E402
 
-with open(sql_file, 'r', encoding='utf-8', errors='ignore') as f:
-    content = f.read()
+sql_file = sys.argv[1] if len(sys.argv) > 1 else 'backup-1.5.2026_09-05-37_womanao0/mysql/womanao0_WP3YO.sql'
 
-# Find all INSERT INTO _3YO_posts statements
-pattern = r'INSERT INTO `_3YO_posts`.*?;'
-matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-print(f'Found {len(matches)} INSERT statements for posts')
+# Statement offsets come from the sidecar index, built on the first run
+index = load_index(sql_file)
+entry = index.get('_3YO_posts', {'columns': None, 'statements': []})
+statements = entry['statements']
+print(f'Found {len(statements)} INSERT statements for posts')
+for stmt in statements:
+    print(f"  offset {stmt['offset']}, {stmt['length']} bytes, {stmt['rows']} rows, ID {stmt['key_min']}-{stmt['key_max']}")
 
-# Sample first match to see structure
-if matches:
-    first = matches[0]
-    print(f'\nFirst INSERT statement (first 500 chars):')
-    print(first[:500])
+# Sample first statement to see structure
+if statements:
+    columns = entry['columns']
+    print(f'\nColumns: {", ".join(columns) if columns else "(none, positional)"}')
+    _, _, values = read_statement(sql_file, statements[0])[0]
+    row = '(' + ','.join(values) + ')'
+    print(f'\nFirst row (first 500 chars):')
+    print(row[:500])
     print('\n...')
-    print(f'Total length: {len(first)} chars')
+    print(f'Total length: {statements[0]["length"]} bytes')
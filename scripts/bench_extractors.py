@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SQL extractors against each other on synthetic dumps
+
+Generates (once, then reuses) deterministic dumps with ``synthetic_dump`` at
+each requested size and runs every extractor on each one in a fresh
+subprocess, so peak RSS is that extractor's alone:
+
+- ``scan``: ``sqldump.iter_rows`` over every table, the tokenizer baseline
+- ``parse_posts``: ``parse_posts.parse_posts`` (cache off)
+- ``extract_table_data``: extract-all-wordpress-data.py on ``posts``
+- ``extract_posts_robust``: extract-wordpress-robust.py
+- ``extract_posts_from_sql``: extract-posts-from-sql.py
+
+Each result has the wall time, MB/s and rows/s over the dump's
+``_3YO_posts`` rows, the records produced, peak RSS and a per-stage time
+breakdown where the extractor reports one. Results are written as JSON (with
+the Python version, platform and git commit) to ``audit-results/benchmarks``;
+``--baseline`` compares a run to an earlier results file.
+
+Usage: python3 -m scripts.bench_extractors [--sizes 10MB,100MB,1GB] [--targets scan,parse_posts] [--baseline old.json]
+"""
+
+import contextlib
+import importlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+SCRIPTS_DIR = Path(__file__).parent
+RESULTS_DIR = ROOT / 'audit-results' / 'benchmarks'
+WORK_DIR = Path(tempfile.gettempdir()) / 'wab-bench'
+
+DEFAULT_SIZES = ('10MB', '100MB', '1GB')
+TARGETS = ('scan', 'parse_posts', 'extract_table_data', 'extract_posts_robust', 'extract_posts_from_sql')
+
+RESULTS_VERSION = 1
+
+
+def _load_script(filename):
+    """Import one of the hyphen-named scripts as a module"""
+    name = filename.replace('-', '_').removesuffix('.py')
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or None where unknown"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _import(name):
+    return lambda: importlib.import_module(name)
+
+
+def _run_scan(sqldump, dump_path):
+    return sum(1 for _ in sqldump.iter_rows(dump_path)), {}
+
+
+def _run_parse_posts(parse_posts, dump_path):
+    parse_posts.SQL_PATH = Path(dump_path)
+    return len(parse_posts.parse_posts(use_cache=False)), {}
+
+
+def _run_extract_table_data(extract_all, dump_path):
+    started = time.perf_counter()
+    data, timings = extract_all.extract_all_tables(dump_path, ['posts'])
+    elapsed = time.perf_counter() - started
+    return len(data['posts']), {'convert': timings['posts'], 'scan': elapsed - timings['posts']}
+
+
+def _run_extract_posts_robust(robust, dump_path):
+    posts, pages = robust.extract_posts_robust(dump_path)
+    return len(posts) + len(pages), {}
+
+
+def _run_extract_posts_from_sql(from_sql, dump_path):
+    posts, pages = from_sql.extract_posts_from_sql(dump_path)
+    return len(posts) + len(pages), {}
+
+
+# target -> (module loader, runner(module, dump path) -> (records, stages))
+RUNNERS = {
+    'scan': (_import('scripts.sqldump'), _run_scan),
+    'parse_posts': (_import('scripts.parse_posts'), _run_parse_posts),
+    'extract_table_data': (lambda: _load_script('extract-all-wordpress-data.py'), _run_extract_table_data),
+    'extract_posts_robust': (lambda: _load_script('extract-wordpress-robust.py'), _run_extract_posts_robust),
+    'extract_posts_from_sql': (lambda: _load_script('extract-posts-from-sql.py'), _run_extract_posts_from_sql),
+}
+
+
+def run_one(target, dump_path):
+    """
+    Run one extractor in this process; returns its measurements
+
+    ``seconds`` covers the extraction only; importing the extractor is
+    reported as the ``import`` stage.
+    """
+    load, runner = RUNNERS[target]
+    started = time.perf_counter()
+    module = load()
+    imported = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        records, stages = runner(module, dump_path)
+    elapsed = time.perf_counter() - imported
+    stages = {'import': imported - started, **stages}
+    return {'seconds': elapsed, 'records': records, 'stages': stages, 'peak_rss': peak_rss()}
+
+
+def measure(target, dump_path):
+    """``run_one`` in a fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, '-m', 'scripts.bench_extractors', '--run-one', target, str(dump_path)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(sizes=DEFAULT_SIZES, targets=TARGETS, seed=0, work_dir=WORK_DIR, repeat=1, log=print):
+    """Generate the dumps and measure every target on each; returns the results document"""
+    from scripts.synthetic_dump import ensure_dump, parse_size
+
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    for size in sizes:
+        dump_path = work_dir / f'synthetic-{size.lower()}-seed{seed}.sql'
+        started = time.perf_counter()
+        manifest = ensure_dump(dump_path, parse_size(size), seed)
+        log(f"{size}: {manifest['bytes'] / 1e6:.1f} MB, {manifest['rows']['posts']} posts rows "
+            f"(ready in {time.perf_counter() - started:.1f}s)")
+        megabytes = manifest['bytes'] / 1e6
+        rows = manifest['rows']['posts']
+        for target in targets:
+            best = None
+            for _ in range(repeat):
+                measured = measure(target, dump_path)
+                if 'error' in measured:
+                    best = measured
+                    break
+                if best is None or measured['seconds'] < best['seconds']:
+                    best = measured
+            result = {'size': size, 'bytes': manifest['bytes'], 'posts_rows': rows, 'target': target, **best}
+            if 'error' in best:
+                log(f"  {target:<24} ERROR {best['error']}")
+            else:
+                result['mb_per_s'] = megabytes / best['seconds']
+                result['rows_per_s'] = rows / best['seconds']
+                rss = f"{best['peak_rss'] / 1e6:8.1f} MB RSS" if best['peak_rss'] else ''
+                log(f"  {target:<24} {best['seconds']:8.2f}s {result['mb_per_s']:8.1f} MB/s "
+                    f"{result['rows_per_s']:10.0f} rows/s {rss}")
+            results.append(result)
+    return {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(current, baseline):
+    """``[(size, target, MB/s now, MB/s before, ratio)]`` for results present in both"""
+    before = {(r['size'], r['target']): r for r in baseline['results'] if 'mb_per_s' in r}
+    rows = []
+    for result in current['results']:
+        old = before.get((result['size'], result['target']))
+        if old is None or 'mb_per_s' not in result:
+            continue
+        rows.append((result['size'], result['target'], result['mb_per_s'], old['mb_per_s'],
+                     result['mb_per_s'] / old['mb_per_s']))
+    return rows
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the SQL extractors on synthetic WordPress dumps")
+    parser.add_argument("--sizes", default=','.join(DEFAULT_SIZES), help="Dump sizes, e.g. 10MB,100MB,1GB")
+    parser.add_argument("--targets", default=','.join(TARGETS), help=f"Extractors to run: {', '.join(TARGETS)}")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic dump seed")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per extractor (fastest is kept)")
+    parser.add_argument("--work-dir", default=str(WORK_DIR), help="Where generated dumps are kept between runs")
+    parser.add_argument("--output", help="Results file (default: audit-results/benchmarks/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--run-one", nargs=2, metavar=("TARGET", "DUMP"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        target, dump_path = args.run_one
+        print(json.dumps(run_one(target, dump_path)))
+        return
+
+    targets = [target for target in args.targets.split(',') if target]
+    unknown = [target for target in targets if target not in RUNNERS]
+    if unknown:
+        print(f"Error: Unknown target(s): {', '.join(unknown)}. Known: {', '.join(TARGETS)}")
+        sys.exit(1)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+
+    sizes = [size for size in args.sizes.split(',') if size]
+    document = run(sizes, targets, args.seed, args.work_dir, args.repeat)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_name(output.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(document, fh, indent=2)
+    os.replace(tmp_path, output)
+
+    if baseline is not None:
+        print("\nAgainst baseline:")
+        for size, target, now, before, ratio in compare(document, baseline):
+            print(f"  {size:>6} {target:<24} {now:8.1f} MB/s (was {before:.1f}) {ratio:6.2f}x")
+    print(f"\n✓ Saved results to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SQL row scanner against the old character-by-character parser
+
+Splits the `_3YO_posts` VALUES blocks of a ``synthetic_dump`` dump (generated
+once, then reused, in the same place as ``bench_extractors``) and reports
+rows/sec for splitting rows and values before and after the rewrite.
+
+Usage: python3 scripts/bench_sql_scanner.py --size 10MB
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scripts.bench_extractors import WORK_DIR  # noqa: E402
+from scripts.sqldump import literal_end, split_rows, split_values  # noqa: E402
+from scripts.synthetic_dump import ensure_dump, parse_size  # noqa: E402
+
+
+_STATEMENT_DELIM_RE = re.compile(r"[;'\"]")
+
+
+def iter_insert_blocks(text):
+    """Yield every `_3YO_posts` INSERT statement in ``text``, without its ``;``"""
+    marker = "INSERT INTO `_3YO_posts`"
+    idx = 0
+    while True:
+        start = text.find(marker, idx)
+        if start == -1:
+            break
+        i = start
+        while True:
+            hit = _STATEMENT_DELIM_RE.search(text, i)
+            if hit is None:
+                return
+            i = hit.start()
+            if text[i] == ';':
+                break
+            i = literal_end(text, i)
+        yield text[start:i]
+        idx = i + 1
+
+
+def values_blocks(dump_path):
+    """The VALUES part of every `_3YO_posts` INSERT in a dump"""
+    text = Path(dump_path).read_text(encoding='utf-8')
+    return [block.partition(' VALUES ')[2] for block in iter_insert_blocks(text)]
+
+
+def legacy_split_rows(values_block):
+    """Row splitter as it was before the scanner rewrite (one char at a time)"""
+    rows = []
+    current_row = []
+    paren_depth = 0
+    in_string = False
+    escape_next = False
+    for char in values_block:
+        if escape_next:
+            if current_row:
+                current_row.append(char)
+            escape_next = False
+        elif char == '\\' and in_string:
+            escape_next = True
+            if current_row:
+                current_row.append(char)
+        elif char == "'":
+            in_string = not in_string
+            if current_row:
+                current_row.append(char)
+        elif char == '(' and not in_string:
+            if paren_depth == 0:
+                current_row = []
+            else:
+                current_row.append(char)
+            paren_depth += 1
+        elif char == ')' and not in_string:
+            paren_depth -= 1
+            if paren_depth == 0:
+                rows.append(''.join(current_row))
+                current_row = []
+            else:
+                current_row.append(char)
+        elif char == ',' and paren_depth == 0 and not in_string:
+            pass
+        elif paren_depth:
+            current_row.append(char)
+    return rows
+
+
+def legacy_split_values(row_str):
+    """Value splitter as it was before the scanner rewrite (``current += char``)"""
+    values = []
+    current = ''
+    in_string = False
+    escape_next = False
+    for char in row_str:
+        if escape_next:
+            current += char
+            escape_next = False
+        elif char == '\\' and in_string:
+            escape_next = True
+            current += char
+        elif char == "'":
+            in_string = not in_string
+            current += char
+        elif char == ',' and not in_string:
+            values.append(current.strip())
+            current = ''
+        else:
+            current += char
+    values.append(current.strip())
+    return values
+
+
+def run(label, split_rows_fn, split_values_fn, blocks, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = [split_values_fn(row) for block in blocks for row in split_rows_fn(block)]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    rate = len(result) / best
+    mb_s = sum(map(len, blocks)) / best / 1e6
+    print(f"  {label:<8} {best:8.3f}s  {rate:10.1f} rows/s  {mb_s:8.1f} MB/s")
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQL row/value scanners")
+    parser.add_argument("--size", default='10MB', help="Synthetic dump size, e.g. 10MB, 100MB")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the dump")
+    parser.add_argument("--work-dir", default=str(WORK_DIR), help="Where the synthetic dump is kept")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scanner (best is reported)")
+    args = parser.parse_args()
+
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    dump_path = work_dir / f'synthetic-{args.size.lower()}-seed{args.seed}.sql'
+    manifest = ensure_dump(dump_path, parse_size(args.size), args.seed)
+    blocks = values_blocks(dump_path)
+    print(f"Synthetic posts: {manifest['rows']['posts']} rows in {len(blocks)} statements, "
+          f"{sum(map(len, blocks)) / 1e6:.1f} MB")
+
+    before, before_time = run("before", legacy_split_rows, legacy_split_values, blocks, args.repeat)
+    after, after_time = run("after", split_rows, split_values, blocks, args.repeat)
+
+    if before != after:
+        print("ERROR: scanners disagree on the synthetic dump")
+        sys.exit(1)
+    print(f"Speedup: {before_time / after_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
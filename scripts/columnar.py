@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Parquet export of extracted WordPress tables for analytics
+
+``ColumnarWriter`` has the same ``write``/``count``/context-manager
+interface as ``output_writer.RecordWriter`` and buffers records into row
+groups of ``ROW_GROUP_SIZE``. Column types come from the converters in
+``wp_schema`` (``integer`` -> int64, ``flag`` -> bool, ``text`` -> string);
+low-cardinality columns such as ``post_type``, ``post_status`` and
+``meta_key`` are dictionary-encoded so pandas/pyarrow read them back as
+categoricals. Large text columns go to a ``<name>.text.parquet`` side file
+keyed by the table's first field, so an audit over dates, types or meta keys
+never pages post bodies in.
+
+Needs the optional ``pyarrow`` package (pip install pyarrow).
+"""
+
+import os
+from pathlib import Path
+
+from scripts.wp_schema import TABLES, flag, integer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+ROW_GROUP_SIZE = 10_000
+
+# Output keys stored dictionary-encoded, per wp_schema table
+CATEGORICAL = {
+    'posts': ('status', 'comment_status', 'ping_status', 'type', 'mime_type'),
+    'comments': ('type',),
+    'postmeta': ('meta_key',),
+    'usermeta': ('meta_key',),
+    'options': ('autoload',),
+    'term_taxonomy': ('taxonomy',),
+    'woocommerce_order_items': ('type',),
+    'woocommerce_order_itemmeta': ('meta_key',),
+}
+
+# Output keys written to the side file instead of the main one
+TEXT_COLUMNS = {
+    'posts': ('content', 'excerpt'),
+    'comments': ('content', 'agent'),
+    'postmeta': ('meta_value',),
+    'usermeta': ('meta_value',),
+    'options': ('value',),
+    'woocommerce_order_itemmeta': ('meta_value',),
+}
+
+# Parquet codec for each output_writer compression name; pages are always
+# at least snappy-compressed, as Parquet does by default
+CODECS = {'none': 'snappy', 'gzip': 'gzip', 'zstd': 'zstd'}
+
+
+def available():
+    return pa is not None
+
+
+def text_path(path):
+    """Side file holding the large text columns of ``path``"""
+    path = Path(path)
+    return path.with_name(f'{path.stem}.text{path.suffix}')
+
+
+def _arrow_types(table):
+    """``{key: arrow type}`` for a wp_schema table, or None to infer"""
+    if table is None:
+        return None
+    types = {}
+    for field in TABLES[table].fields:
+        if field.convert is integer:
+            types[field.key] = pa.int64()
+        elif field.convert is flag:
+            types[field.key] = pa.bool_()
+        else:
+            types[field.key] = pa.string()
+    return types
+
+
+def iter_records(path):
+    """
+    Yield the records of a Parquet file written by ``ColumnarWriter``
+
+    Columns from the ``.text.parquet`` side file are merged back in; both
+    files are written one row group per flush, so their rows line up.
+    """
+    if pa is None:
+        raise RuntimeError("Reading Parquet needs the 'pyarrow' package (pip install pyarrow)")
+    main = pq.ParquetFile(path)
+    side = text_path(path)
+    text = pq.ParquetFile(side) if side.exists() else None
+    for group in range(main.num_row_groups):
+        rows = main.read_row_group(group).to_pylist()
+        if text is not None:
+            for row, extra in zip(rows, text.read_row_group(group).to_pylist()):
+                row.update(extra)
+        yield from rows
+
+
+class _Part:
+    """One Parquet file being written: a subset of columns and its temp path"""
+
+    def __init__(self, path, keys, codec):
+        self.path = Path(path)
+        self.keys = keys
+        self.codec = codec
+        self.tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self.writer = None
+
+    def write(self, table):
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.tmp_path, table.schema, compression=self.codec)
+        self.writer.write_table(table, row_group_size=max(table.num_rows, 1))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+class ColumnarWriter:
+    """
+    Write records of one wp_schema ``table`` to ``path`` as Parquet
+
+    With ``table=None`` (derived outputs like categories) the column types
+    are inferred from the first row group (all-null columns as strings), later
+    row groups are cast to them, and nothing is split off. As with
+    ``RecordWriter`` the files are only moved into place when the block exits
+    cleanly.
+    """
+
+    def __init__(self, path, table=None, compress='none', row_group_size=ROW_GROUP_SIZE):
+        if pa is None:
+            raise RuntimeError("Parquet output needs the 'pyarrow' package (pip install pyarrow)")
+        self.path = Path(path)
+        self.count = 0
+        self.row_group_size = row_group_size
+        self._types = _arrow_types(table)
+        self._cast = table is None
+        self._categorical = frozenset(CATEGORICAL.get(table, ()))
+        self._rows = []
+        self._parts = None
+        self._closed = False
+        self._codec = CODECS[compress]
+        self._text_keys = TEXT_COLUMNS.get(table, ())
+        if self._types is not None:
+            self._plan(list(self._types))
+
+    def _plan(self, keys):
+        """Decide which columns go to which file"""
+        text = [key for key in self._text_keys if key in keys]
+        main = [key for key in keys if key not in text]
+        self._parts = [_Part(self.path, main, self._codec)]
+        if text:
+            # Keep the row key in the side file so it can be joined back
+            self._parts.append(_Part(text_path(self.path), [main[0]] + text, self._codec))
+
+    def write(self, record):
+        self._rows.append(record)
+        self.count += 1
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self
+
+    def _column(self, key, rows):
+        values = [row[key] for row in rows]
+        if self._cast:
+            array = pa.array(values)
+            if array.type != self._types[key]:
+                try:
+                    array = array.cast(self._types[key])
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                    raise ValueError(f"{self.path}: {key!r} values no longer fit the {self._types[key]} "
+                                     f"column inferred from the first row group ({e})") from None
+        else:
+            array = pa.array(values, type=self._types[key])
+        if key in self._categorical:
+            array = array.dictionary_encode()
+        return array
+
+    def _flush(self):
+        rows = self._rows
+        self._rows = []
+        if self._parts is None:
+            self._plan(list(rows[0]) if rows else [])
+        if self._types is None:
+            self._types = {}
+            for key in self._parts[0].keys:
+                inferred = pa.array([row[key] for row in rows]).type
+                self._types[key] = pa.string() if pa.types.is_null(inferred) else inferred
+        for part in self._parts:
+            part.write(pa.table({key: self._column(key, rows) for key in part.keys}))
+
+    def close(self):
+        """Write the last row group and rename the files into place"""
+        if self._closed:
+            return
+        try:
+            if self._rows or self.count == 0:
+                self._flush()
+            for part in self._parts:
+                part.close()
+        except Exception:
+            self.abort()
+            raise
+        self._closed = True
+        for part in self._parts:
+            os.replace(part.tmp_path, part.path)
+
+    def abort(self):
+        """Drop the partial files"""
+        if self._closed:
+            return
+        self._closed = True
+        for part in self._parts or ():
+            part.remove()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Nested comment threads, one compact file per post
+
+The extractors write approved comments as a flat list with ``post_id`` and
+``parent``. ``ThreadIndex`` takes those records as they stream past, and
+``threads()`` builds each post's tree with a dict index by comment id and
+one pass that attaches every comment to its parent, so the whole build is
+linear in the number of comments. Each thread comes with what a listing
+needs without walking it::
+
+    {"post_id": 567, "count": 12, "top_level": 7, "latest": "2019-03-02 10:41:00",
+     "max_depth": 3,
+     "comments": [{"id", "parent", "author", "author_url", "date", "date_gmt",
+                   "content", "type", "user_id", "depth", "replies": [...]}]}
+
+``depth`` starts at 1 for top-level comments, as in WordPress; ``latest`` is
+the newest ``date_gmt`` (``date`` where the GMT date was never set). Replies
+whose parent is missing (unapproved, deleted or on another post) are shown
+at the top level. Emails, IPs and user agents are left out.
+
+``write_threads`` writes ``<post_id>.json`` per post and an ``index.json``
+of the per-post counters, so the blog loads one post's comments by id
+instead of filtering every comment of the site.
+
+Usage: python3 -m scripts.comment_threads [extracted_data/comments.json] [--output-dir public/comments]
+"""
+
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+DATA_DIR = ROOT / 'extracted_data'
+THREADS_DIR = ROOT / 'public' / 'comments'
+
+INDEX_NAME = 'index.json'
+
+# Comment fields kept in the thread files
+COMMENT_FIELDS = ('id', 'parent', 'author', 'author_url', 'date', 'date_gmt', 'content', 'type', 'user_id')
+
+EMPTY_DATE = '0000-00-00 00:00:00'
+
+
+def _timestamp(comment):
+    date_gmt = comment['date_gmt']
+    return date_gmt if date_gmt and date_gmt != EMPTY_DATE else comment['date']
+
+
+def _order(comment):
+    return _timestamp(comment), comment['id']
+
+
+class ThreadIndex:
+    """
+    Collect comment records, then ``threads()``
+
+    ``add(record)`` takes a ``comments`` record as shaped by ``wp_schema``.
+    """
+
+    def __init__(self):
+        self.by_post = defaultdict(list)    # post_id -> [compact comment]
+        self.seen = set()
+
+    def add(self, record):
+        if record['id'] in self.seen:
+            return
+        self.seen.add(record['id'])
+        self.by_post[record['post_id']].append({key: record[key] for key in COMMENT_FIELDS})
+
+    def thread(self, post_id):
+        """The nested thread of one post, with its counters"""
+        # Dumps list comments by id, which is nearly always date order, so
+        # this sort is a linear pass in practice
+        comments = [dict(comment, depth=1, replies=[]) for comment in sorted(self.by_post.get(post_id, ()), key=_order)]
+        index = {comment['id']: comment for comment in comments}
+        roots = []
+        for comment in comments:
+            parent = index.get(comment['parent']) if comment['parent'] else None
+            if parent is None or parent is comment:
+                roots.append(comment)
+            else:
+                parent['replies'].append(comment)
+
+        max_depth = _set_depths(roots)
+        reached = _count(roots)
+        if len(reached) < len(comments):
+            # Comments in a parent cycle are never reached from a root; cut
+            # the cycle at its earliest comment and show that at the top level
+            for comment in comments:
+                if comment['id'] in reached:
+                    continue
+                index[comment['parent']]['replies'].remove(comment)
+                roots.append(comment)
+                max_depth = max(max_depth, _set_depths([comment]))
+                reached |= _count([comment])
+            roots.sort(key=_order)
+
+        return {
+            'post_id': post_id,
+            'count': len(comments),
+            'top_level': len(roots),
+            'latest': max((_timestamp(comment) for comment in comments), default=None),
+            'max_depth': max_depth,
+            'comments': roots,
+        }
+
+    def threads(self, parents=None):
+        """
+        Yield one thread per post with comments, in post id order
+
+        ``parents`` limits the output to those post ids (e.g. the published
+        posts and pages that were extracted).
+        """
+        for post_id in sorted(self.by_post):
+            if parents is not None and post_id not in parents:
+                continue
+            yield self.thread(post_id)
+
+
+def _set_depths(roots):
+    """Set ``depth`` below ``roots`` (depth 1); returns the deepest level"""
+    deepest = 0
+    stack = [(comment, 1) for comment in roots]
+    while stack:
+        comment, depth = stack.pop()
+        comment['depth'] = depth
+        deepest = max(deepest, depth)
+        stack.extend((reply, depth + 1) for reply in comment['replies'])
+    return deepest
+
+
+def _count(roots):
+    """Ids of every comment below ``roots``"""
+    reached = set()
+    stack = list(roots)
+    while stack:
+        comment = stack.pop()
+        reached.add(comment['id'])
+        stack.extend(comment['replies'])
+    return reached
+
+
+def _write_json(path, data, **options):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh, ensure_ascii=False, **options)
+    os.replace(tmp_path, path)
+
+
+def _load_index(output_dir):
+    try:
+        with open(Path(output_dir) / INDEX_NAME, encoding='utf-8') as fh:
+            index = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+
+def write_threads(threads, output_dir=THREADS_DIR):
+    """
+    Write ``<post_id>.json`` per thread and ``index.json``; returns the index
+
+    Thread files of posts that no longer have comments are removed; only
+    files listed in the previous ``index.json`` are touched, never other
+    files that happen to be in ``output_dir``.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous = _load_index(output_dir)
+    index = {}
+    for thread in threads:
+        post_id = thread['post_id']
+        _write_json(output_dir / f'{post_id}.json', thread, separators=(',', ':'))
+        index[str(post_id)] = {key: thread[key] for key in ('count', 'top_level', 'latest', 'max_depth')}
+    for post_id in previous:
+        if post_id not in index and post_id.isdigit():
+            (output_dir / f'{post_id}.json').unlink(missing_ok=True)
+    _write_json(output_dir / INDEX_NAME, index, indent=2)
+    return index
+
+
+def main():
+    import argparse
+    import sys
+    import time
+
+    from scripts.output_writer import iter_records
+
+    parser = argparse.ArgumentParser(description="Write nested comment threads, one file per post")
+    parser.add_argument("input", nargs='?', default=str(DATA_DIR / 'comments.json'),
+                        help="Extracted comments (.json or .jsonl, optionally compressed)")
+    parser.add_argument("--output-dir", default=str(THREADS_DIR), help="Where the thread files are written")
+    args = parser.parse_args()
+
+    if not Path(args.input).exists():
+        print(f"Error: File not found: {args.input}; run extract-all-wordpress-data.py first")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    threads = ThreadIndex()
+    for record in iter_records(args.input):
+        threads.add(record)
+    index = write_threads(threads.threads(), args.output_dir)
+    elapsed = time.perf_counter() - started
+
+    comments = sum(entry['count'] for entry in index.values())
+    deepest = max((entry['max_depth'] for entry in index.values()), default=0)
+    print(f"  {comments} comments on {len(index)} posts, nested up to {deepest} levels")
+    print(f"✓ Saved {len(index)} threads to {args.output_dir} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
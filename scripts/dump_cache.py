@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for data parsed out of a SQL dump
+
+Each cache file sits next to the dump (``<dump>.<name>.cache``) and holds two
+pickles: a small header with the dump's size, mtime and SHA-256, then the
+parsed data. A matching size and mtime is trusted as-is; otherwise the dump
+is re-hashed, so a touched-but-unchanged dump still hits the cache while any
+content change invalidates it.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+# Bump when the cache layout changes
+CACHE_FORMAT = 1
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(dump_path, name):
+    dump_path = Path(dump_path)
+    return dump_path.with_name(f'{dump_path.name}.{name}.cache')
+
+
+def _read_header(fh):
+    header = pickle.load(fh)
+    if not isinstance(header, dict) or header.get('format') != CACHE_FORMAT:
+        return None
+    return header
+
+
+def load_cached(dump_path, name, version=0):
+    """
+    Return the cached data for ``name``, or None if missing or stale
+
+    ``version`` lets the caller invalidate caches when its parser changes.
+    """
+    path = cache_path(dump_path, name)
+    try:
+        stat = os.stat(dump_path)
+        with open(path, 'rb') as fh:
+            header = _read_header(fh)
+            if header is None or header.get('version') != version:
+                return None
+            if header['size'] != stat.st_size:
+                return None
+            if header['mtime_ns'] != stat.st_mtime_ns:
+                # Same size, different mtime: only a content change invalidates
+                if file_sha256(dump_path) != header['sha256']:
+                    return None
+                _touch_header(path, header, stat)
+            return pickle.load(fh)
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+        return None
+
+
+def store_cached(dump_path, name, data, version=0):
+    """Write ``data`` to the cache for ``name``; failures are ignored"""
+    path = cache_path(dump_path, name)
+    try:
+        stat = os.stat(dump_path)
+        header = {
+            'format': CACHE_FORMAT,
+            'version': version,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_sha256(dump_path),
+        }
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as fh:
+            pickle.dump(header, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _touch_header(path, header, stat):
+    """Record the dump's new mtime so the next load skips hashing"""
+    try:
+        with open(path, 'rb') as fh:
+            _read_header(fh)
+            data = fh.read()
+        header = dict(header, mtime_ns=stat.st_mtime_ns)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as fh:
+            pickle.dump(header, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Changeset between two SQL dumps (e.g. last week's backup and this week's)
+
+Each dump is reduced to ``{primary key: (row hash, kept, identity)}`` per
+table, where the hash covers the row's raw SQL literals, ``kept`` is the
+wp_schema ``keep`` filter (published posts/pages, approved comments) and
+``identity`` holds the ``DELETE_FIELDS`` of kept rows (a post's slug and
+type), what a consumer needs to apply a delete. These maps are cached next
+to each dump with ``dump_cache``, so next week's run only has to hash the
+new backup. Only rows whose hash changed are decoded; rows deleted since the
+old dump are read back from it through the statement index, one read per
+statement, when the old dump is a ``.sql`` file.
+
+The changeset has one entry per change::
+
+    {"table": "posts", "op": "insert" | "update" | "delete", "key": 567, "record": {...}}
+
+``record`` uses the same shape as extract-all-wordpress-data.py output.
+An update that changes a ``DELETE_FIELDS`` value (a renamed slug) also
+carries the old values as ``"previous": {"slug": ..., "type": ...}``, so
+a consumer keyed on them can find the row to change.
+A delete whose row cannot be read back (the old dump is a ``.tar.gz``)
+carries only the key and ``DELETE_FIELDS``. A row that stops passing the
+``keep`` filter (a post moved to draft) is a delete; one that starts
+passing it is an insert.
+
+Usage: python3 -m scripts.dump_delta <old_dump> <new_dump> [--format jsonl|json] [--compress gzip]
+"""
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from scripts.dump_cache import load_cached, store_cached
+from scripts.dump_index import find_rows_many, load_index
+from scripts.sqldump import is_archive, iter_rows
+from scripts.wp_schema import TABLES, compile_keep, compile_table
+
+TABLE_PREFIX = '_3YO_'
+
+DELTA_TABLES = ('posts', 'comments', 'postmeta')
+
+HASHES_NAME = 'rowhashes'
+HASHES_VERSION = 2
+
+# Record fields every delete carries, from the row hashes of the old dump
+DELETE_FIELDS = {
+    'posts': ('slug', 'type'),
+    'comments': ('post_id',),
+    'postmeta': ('post_id', 'meta_key'),
+}
+
+OPS = ('insert', 'update', 'delete')
+OP_LABELS = {'insert': 'inserted', 'update': 'updated', 'delete': 'deleted'}
+
+
+def row_hash(values):
+    """Digest of a row's raw literals"""
+    return hashlib.blake2b('\x00'.join(values).encode('utf-8', 'surrogatepass'), digest_size=12).digest()
+
+
+@lru_cache(maxsize=None)
+def _plan(name, columns):
+    """
+    ``(key position or None, row width, keep filter, identity)`` for one statement's columns
+
+    ``identity`` is ``[(position, converter)]`` of the table's ``DELETE_FIELDS``.
+    """
+    schema = TABLES[name]
+    stock = schema.columns
+    positions = {column: i for i, column in enumerate(columns if columns is not None else stock)}
+    fields = {field.key: field for field in schema.fields}
+    identity = tuple(
+        (positions.get(fields[key].column), fields[key].convert, fields[key].default)
+        for key in DELETE_FIELDS.get(name, ())
+    )
+    if columns is None:
+        return 0, len(stock), compile_keep(name), identity
+    key_index = positions.get(stock[0])
+    return key_index, len(columns), compile_keep(name, columns), identity
+
+
+def _identity(identity, values):
+    return tuple(default if index is None else convert(values[index]) for index, convert, default in identity)
+
+
+def _key(raw):
+    value = raw.strip("'")
+    return int(value) if value.isdigit() else None
+
+
+def iter_keyed_rows(dump_path, table_names=DELTA_TABLES, prefix=TABLE_PREFIX):
+    """Yield ``(table name, key, columns, values, row hash, kept, identity)`` for every row with a key"""
+    routes = {f'{prefix}{name}': name for name in table_names}
+    last = None
+    for table, columns, values in iter_rows(dump_path, tables=routes):
+        name = routes[table]
+        if last is None or last[0] != name or last[1] is not columns:
+            last = (name, columns)
+            key_index, width, keep, identity = _plan(name, columns)
+        if key_index is None or len(values) != width:
+            continue
+        key = _key(values[key_index])
+        if key is None:
+            continue
+        kept = keep(values)
+        yield name, key, columns, values, row_hash(values), kept, _identity(identity, values) if kept else None
+
+
+def build_hashes(dump_path, table_names=DELTA_TABLES):
+    """``{table name: {key: (row hash, kept, identity)}}`` for one dump"""
+    hashes = {name: {} for name in table_names}
+    for name, key, _, _, digest, kept, identity in iter_keyed_rows(dump_path, table_names):
+        hashes[name][key] = (digest, kept, identity)
+    return hashes
+
+
+def load_hashes(dump_path, table_names=DELTA_TABLES):
+    """Cached ``build_hashes`` for the dump"""
+    table_names = tuple(table_names)
+    cached = load_cached(dump_path, HASHES_NAME, HASHES_VERSION)
+    if cached is not None and all(name in cached for name in table_names):
+        return cached
+    hashes = build_hashes(dump_path, table_names)
+    store_cached(dump_path, HASHES_NAME, hashes, HASHES_VERSION)
+    return hashes
+
+
+def _deleted_records(dump_path, index, name, keys, prefix):
+    """``{key: record}`` of rows only in the old dump that can be read back from it"""
+    records = {}
+    if index is None:
+        return records
+    for key, columns, values in find_rows_many(dump_path, f'{prefix}{name}', keys, index):
+        if key not in records:
+            record = compile_table(name, columns, apply_keep=False)(values)
+            if record is not None:
+                records[key] = record
+    return records
+
+
+def iter_changes(old_dump, new_dump, table_names=DELTA_TABLES, prefix=TABLE_PREFIX, stats=None):
+    """
+    Yield ``{'table', 'op', 'key', 'record'}`` for every kept row that differs,
+    plus ``previous`` on updates whose ``DELETE_FIELDS`` changed
+
+    Inserts and updates come in the new dump's row order, deletes last. The
+    new dump's hashes are cached on the way, ready for the next comparison.
+    ``stats``, if given, is filled with ``{table: {op: count}}``.
+    """
+    table_names = tuple(table_names)
+    old = load_hashes(old_dump, table_names)
+    if stats is None:
+        stats = {}
+    for name in table_names:
+        stats[name] = dict.fromkeys(OPS, 0)
+
+    new = {name: {} for name in table_names}
+    for name, key, columns, values, digest, kept, identity in iter_keyed_rows(new_dump, table_names, prefix):
+        if new[name].get(key) == (digest, kept, identity):
+            # The same row repeated later in the dump
+            continue
+        new[name][key] = (digest, kept, identity)
+        before = old[name].get(key)
+        was_kept = before is not None and before[1]
+        if not kept:
+            continue
+        if was_kept and before[0] == digest:
+            continue
+        op = 'update' if was_kept else 'insert'
+        record = compile_table(name, columns)(values)
+        if record is None:
+            continue
+        stats[name][op] += 1
+        change = {'table': name, 'op': op, 'key': key, 'record': record}
+        if was_kept and before[2] != identity:
+            change['previous'] = dict(zip(DELETE_FIELDS.get(name, ()), before[2] or ()))
+        yield change
+    store_cached(new_dump, HASHES_NAME, new, HASHES_VERSION)
+
+    # Rows that were kept before and are now gone or filtered out
+    index = None if is_archive(old_dump) else load_index(old_dump)
+    for name in table_names:
+        current = new[name]
+        deleted = [
+            (key, identity)
+            for key, (_, was_kept, identity) in old[name].items()
+            if was_kept and not (current.get(key) or (None, False))[1]
+        ]
+        records = _deleted_records(old_dump, index, name, [key for key, _ in deleted], prefix)
+        key_field = TABLES[name].fields[0].key
+        for key, identity in deleted:
+            record = records.get(key)
+            if record is None:
+                record = {key_field: key, **dict(zip(DELETE_FIELDS.get(name, ()), identity or ()))}
+            stats[name]['delete'] += 1
+            yield {'table': name, 'op': 'delete', 'key': key, 'record': record}
+
+
+def main():
+    import argparse
+    import sys
+    import time
+
+    from scripts.output_writer import COMPRESSIONS, missing_package, open_writer, output_path
+
+    parser = argparse.ArgumentParser(description="Write the changes between two SQL dumps as a changeset")
+    parser.add_argument("old_dump", help="Previous .sql dump or .tar.gz backup")
+    parser.add_argument("new_dump", help="Current .sql dump or .tar.gz backup")
+    parser.add_argument("--output-dir", default=str(Path(__file__).parent.parent / 'extracted_data'))
+    parser.add_argument("--name", default='changeset', help="Output file name without extension")
+    parser.add_argument("--format", choices=('jsonl', 'json'), default='jsonl')
+    parser.add_argument("--compress", choices=list(COMPRESSIONS), default='none')
+    args = parser.parse_args()
+
+    for path in (args.old_dump, args.new_dump):
+        if not Path(path).exists():
+            print(f"Error: File not found: {path}")
+            sys.exit(1)
+    package = missing_package(args.format, args.compress)
+    if package:
+        print(f"Error: --compress {args.compress} needs the '{package}' package")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    stats = {}
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    path = output_path(args.output_dir, args.name, args.format, args.compress)
+    with open_writer(path, args.format, args.compress) as writer:
+        writer.write_all(iter_changes(args.old_dump, args.new_dump, stats=stats))
+    elapsed = time.perf_counter() - started
+
+    for name, counts in stats.items():
+        print(f"  {name}: " + ', '.join(f"{counts[op]} {OP_LABELS[op]}" for op in OPS))
+    print(f"✓ Saved {writer.count} changes to {path} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Byte-offset index of the INSERT statements in a SQL dump
+
+Built once per dump and cached next to it (see ``dump_cache``). For every
+table it records each INSERT statement's byte offset and length, its row
+count and the range of the first column (``ID``, ``meta_id``, ...), so a
+single row can be found by seeking to the one statement that holds it.
+
+Usage: python3 -m scripts.dump_index <sql_file> [--table _3YO_posts --id 567]
+"""
+
+import io
+import sys
+
+from scripts.dump_cache import load_cached, store_cached
+from scripts.sqldump import DEFAULT_CHUNK_SIZE, iter_rows, scan_dump
+
+INDEX_NAME = 'index'
+INDEX_VERSION = 1
+
+
+def _key(value):
+    """Integer key from a raw literal, or None if the column is not numeric"""
+    value = value.strip(b"'" if isinstance(value, bytes) else "'")
+    return int(value) if value.isdigit() else None
+
+
+def build_index(dump_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Scan the dump once and return ``{table: {'columns', 'statements'}}``"""
+    tables = {}
+    current = None
+    with open(dump_path, 'rb') as fh:
+        for table, columns, values, offset, row_end in scan_dump(fh, chunk_size=chunk_size, offsets=True):
+            if current is None or current['offset'] != offset:
+                current = {'offset': offset, 'length': 0, 'rows': 0, 'key_min': None, 'key_max': None}
+                entry = tables.setdefault(table, {'columns': columns, 'statements': []})
+                entry['statements'].append(current)
+            current['length'] = row_end - offset
+            current['rows'] += 1
+            key = _key(values[0]) if values else None
+            if key is not None:
+                if current['key_min'] is None or key < current['key_min']:
+                    current['key_min'] = key
+                if current['key_max'] is None or key > current['key_max']:
+                    current['key_max'] = key
+    return tables
+
+
+def load_index(dump_path, rebuild=False):
+    """Return the cached index for the dump, building it if needed"""
+    if not rebuild:
+        index = load_cached(dump_path, INDEX_NAME, INDEX_VERSION)
+        if index is not None:
+            return index
+    index = build_index(dump_path)
+    store_cached(dump_path, INDEX_NAME, index, INDEX_VERSION)
+    return index
+
+
+def read_statement(dump_path, statement):
+    """Decode the rows of one indexed statement as ``(table, columns, values)``"""
+    with open(dump_path, 'rb') as fh:
+        fh.seek(statement['offset'])
+        data = fh.read(statement['length'])
+    text = data.decode('utf-8', errors='ignore')
+    return list(iter_rows(io.StringIO(text)))
+
+
+def find_rows(dump_path, table, key, index=None):
+    """Yield ``(columns, values)`` for rows of ``table`` whose first column is ``key``"""
+    if index is None:
+        index = load_index(dump_path)
+    entry = index.get(table)
+    if entry is None:
+        return
+    for statement in entry['statements']:
+        if statement['key_min'] is None or not statement['key_min'] <= key <= statement['key_max']:
+            continue
+        for _, columns, values in read_statement(dump_path, statement):
+            if values and _key(values[0]) == key:
+                yield columns, values
+
+
+def find_rows_many(dump_path, table, keys, index=None):
+    """
+    Yield ``(key, columns, values)`` for rows of ``table`` whose first column is in ``keys``
+
+    Each statement that may hold any of the keys is read once, however many
+    of them it holds.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    if index is None:
+        index = load_index(dump_path)
+    entry = index.get(table)
+    if entry is None:
+        return
+    low, high = min(keys), max(keys)
+    for statement in entry['statements']:
+        if statement['key_min'] is None or statement['key_max'] < low or statement['key_min'] > high:
+            continue
+        if not any(statement['key_min'] <= key <= statement['key_max'] for key in keys):
+            continue
+        for _, columns, values in read_statement(dump_path, statement):
+            key = _key(values[0]) if values else None
+            if key in keys:
+                yield key, columns, values
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or query the INSERT statement index of a SQL dump")
+    parser.add_argument("sql_file", help="Path to the .sql dump")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cached index")
+    parser.add_argument("--table", help="Table to look up, e.g. _3YO_posts")
+    parser.add_argument("--id", type=int, help="Value of the table's first column to look up")
+    args = parser.parse_args()
+
+    index = load_index(args.sql_file, rebuild=args.rebuild)
+
+    if args.table and args.id is not None:
+        found = False
+        for columns, values in find_rows(args.sql_file, args.table, args.id, index):
+            found = True
+            names = columns or range(len(values))
+            for name, value in zip(names, values):
+                print(f"{name}\t{value[:120]}")
+        if not found:
+            print(f"No row with key {args.id} in {args.table}")
+            sys.exit(1)
+        return
+
+    for table, entry in sorted(index.items()):
+        statements = entry['statements']
+        rows = sum(s['rows'] for s in statements)
+        size = sum(s['length'] for s in statements)
+        print(f"{table}\t{len(statements)} statements\t{rows} rows\t{size} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
-from scripts.parse_posts import parse_posts
+from scripts.parse_posts import get_post
 
 TARGET_IDS = [567, 1130, 1248]
 
 
 def main():
-    posts = parse_posts()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print selected posts")
+    parser.add_argument("--db", help="Read from a SQLite database from sqlite_export instead of the dump")
+    args = parser.parse_args()
+
     for post_id in TARGET_IDS:
-        post = posts.get(post_id)
+        post = get_post(post_id, db=args.db)
         if not post:
             continue
         print(f"--- {post_id} {post.get('post_title')} [{post.get('post_name')}] ---")
@@ -3,315 +3,161 @@
 Extract all WordPress data from SQL dump and convert to JSON
 Enhanced version that extracts: posts, pages, users, categories, tags, comments, relationships, post_meta
 
-Usage: python3 scripts/extract-all-wordpress-data.py backup-1.5.2026_09-05-37_womanao0/mysql/womanao0_WP3YO.sql
+Usage: python3 scripts/extract-all-wordpress-data.py backup-1.5.2026_09-05-37_womanao0/mysql/womanao0_WP3YO.sql [--workers N]
+       [--format json|jsonl|parquet] [--compress none|gzip|zstd] [--to-sqlite out.db]
+       [--documents [--meta-keys _yoast_wpseo_metadesc,...]] [--revisions latest|history]
+       [--comment-threads public/comments] [--profile]
 """
 
-import re
-import json
-import html
+import argparse
 import sys
+import time
+from contextlib import ExitStack, nullcontext
 from pathlib import Path
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scripts.comment_threads import ThreadIndex, write_threads  # noqa: E402
+from scripts.instrumentation import PipelineStats, Profiler, format_stages, write_report  # noqa: E402
+from scripts.output_writer import COMPRESSIONS, FORMATS, missing_package, open_writer, output_path  # noqa: E402
+from scripts.post_documents import DEFAULT_META_KEYS, DocumentIndex  # noqa: E402
+from scripts.parallel import DEFAULT_BATCH_SIZE, batched, ordered_map  # noqa: E402
+from scripts.sqldump import iter_rows, split_values  # noqa: E402
+from scripts.sqlite_export import load_dump  # noqa: E402
+from scripts.revisions import RevisionCompactor  # noqa: E402
+from scripts.wp_schema import TABLES, compile_keep, compile_table  # noqa: E402
+
 # WordPress table prefix from audit
 TABLE_PREFIX = '_3YO_'
 OUTPUT_DIR = Path(__file__).parent.parent / 'extracted_data'
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Stage timings and per-table counters of the last run, and its --profile data
+REPORT_NAME = 'extraction_report.json'
+PSTATS_NAME = 'extraction.pstats'
+
+# Tables written by main(); any other table in wp_schema.TABLES can be
+# added with --tables
+DEFAULT_TABLES = ('posts', 'users', 'comments', 'terms', 'term_taxonomy', 'term_relationships', 'postmeta')
+
+# Output file for each table written straight through; posts are split into
+# posts/pages and terms/term_taxonomy are joined into categories/tags
+TABLE_OUTPUTS = {
+    'users': 'users',
+    'comments': 'comments',
+    'term_relationships': 'term_relationships',
+    'postmeta': 'post_meta',
+}
+OUTPUT_NAMES = ('posts', 'pages', 'users', 'categories', 'tags', 'comments', 'term_relationships', 'post_meta')
+
+# wp_schema table behind each output file (None for derived ones), used for
+# typed Parquet columns
+OUTPUT_TABLES = {
+    'posts': 'posts',
+    'pages': 'posts',
+    'users': 'users',
+    'categories': None,
+    'tags': None,
+    'comments': 'comments',
+    'term_relationships': 'term_relationships',
+    'post_meta': 'postmeta',
+    'post_documents': None,
+    'revisions': None,
+}
+
 def parse_sql_values(row_str):
     """
-    Parse SQL VALUES row, handling quoted strings and escaping
+    Parse SQL VALUES row into raw literals, handling quoted strings and escaping
     """
-    values = []
-    current = ''
-    in_string = False
-    escape_next = False
-    
-    i = 0
-    while i < len(row_str):
-        char = row_str[i]
-        
-        if escape_next:
-            current += char
-            escape_next = False
-        elif char == '\\':
-            if i + 1 < len(row_str) and row_str[i + 1] in ["'", '"', '\\', 'n', 'r', 't']:
-                escape_next = True
-            else:
-                current += char
-        elif char == "'" and not in_string:
-            in_string = True
-        elif char == "'" and in_string:
-            # Check if it's an escaped quote
-            if i + 1 < len(row_str) and row_str[i + 1] == "'":
-                current += "'"
-                i += 1  # Skip next quote
-            else:
-                in_string = False
-        elif char == ',' and not in_string:
-            values.append(current.strip())
-            current = ''
-        else:
-            current += char
-        
-        i += 1
-    
-    if current:
-        values.append(current.strip())
-    
-    return values
+    return split_values(row_str)
 
-def clean_content(content):
+def decode_rows(batch):
     """
-    Clean WordPress content
+    Convert a batch of ``(table name, columns, values)`` rows with the schema registry
+
+    Returns the decoded records (None for skipped rows) in batch order and
+    the seconds spent per table. Runs inside pool workers with --workers.
     """
-    if not content or content == "NULL":
-        return ''
-    
-    # Remove outer quotes if present
-    if content.startswith("'") and content.endswith("'"):
-        content = content[1:-1]
-    
-    # Unescape SQL strings
-    content = content.replace("\\'", "'")
-    content = content.replace('\\"', '"')
-    content = content.replace('\\\\', '\\')
-    content = content.replace('\\n', '\n')
-    content = content.replace('\\r', '\r')
-    content = content.replace('\\t', '\t')
-    
-    # Unescape HTML entities
-    try:
-        content = html.unescape(content)
-    except:
-        pass
-    
-    return content
+    records = []
+    timings = defaultdict(float)
+    for name, columns, values in batch:
+        started = time.perf_counter()
+        try:
+            record = compile_table(name, columns)(values)
+        except Exception as e:
+            record = None
+        timings[name] += time.perf_counter() - started
+        records.append((name, record))
+    return records, timings
 
-def extract_table_data(sql_content, table_name):
+def extract_all_tables(sql_file, table_names=DEFAULT_TABLES, workers=1, batch_size=DEFAULT_BATCH_SIZE, sink=None,
+                       revisions=None, stats=None):
     """
-    Extract data from a specific table
+    Extract every table in a single pass over the dump
+
+    Each INSERT row is converted with its table's schema from wp_schema. With
+    ``workers > 1`` the rows are shipped in batches to a process pool;
+    results are collected in dump order so the output is the same as a
+    serial run. Returns the records per table and the seconds spent
+    converting each table.
+
+    With ``sink`` every record is passed to ``sink(table name, record)`` as
+    soon as it is decoded and the returned lists stay empty. ``revisions``,
+    a ``RevisionCompactor``, is handed the revision rows of the posts table.
+    
+    Rows the schema's ``keep`` filter rejects are dropped before they are
+    batched, so with a pool they are never shipped to a worker. ``stats``, an
+    ``instrumentation.PipelineStats``, gets the tokenizer stages, conversion
+    as ``clean`` and the time spent in ``sink`` as ``write``.
     """
-    data = []
-    pattern = rf"INSERT INTO `{re.escape(TABLE_PREFIX)}{table_name}`[^;]*VALUES\s*(.*?);"
-    matches = re.finditer(pattern, sql_content, re.DOTALL | re.IGNORECASE)
+    table_names = list(table_names)
+    routes = {f'{TABLE_PREFIX}{name}': name for name in table_names}
+    data = {name: [] for name in table_names}
+    timings = dict.fromkeys(table_names, 0.0)
     
-    for match in matches:
-        values_block = match.group(1)
-        
-        # Split into individual rows
-        rows = []
-        current_row = ''
-        paren_depth = 0
-        in_string = False
-        escape_next = False
-        
-        for char in values_block:
-            if escape_next:
-                current_row += char
-                escape_next = False
-            elif char == '\\' and in_string:
-                escape_next = True
-                current_row += char
-            elif char == "'" and not escape_next:
-                in_string = not in_string
-                current_row += char
-            elif char == '(' and not in_string:
-                if paren_depth == 0:
-                    current_row = '('
-                else:
-                    current_row += char
-                paren_depth += 1
-            elif char == ')' and not in_string:
-                current_row += char
-                paren_depth -= 1
-                if paren_depth == 0:
-                    rows.append(current_row)
-                    current_row = ''
-            elif char == ',' and paren_depth == 0 and not in_string:
+    def rows():
+        keep = None
+        for table, columns, values in iter_rows(sql_file, tables=routes, stats=stats):
+            name = routes[table]
+            if name == 'posts' and revisions is not None and revisions.add(columns, values):
                 continue
-            else:
-                current_row += char
-        
-        # Parse each row
-        for row_str in rows:
-            if not row_str.strip():
-                continue
-            
-            try:
-                row_str = row_str.strip()
-                if row_str.startswith('(') and row_str.endswith(')'):
-                    row_str = row_str[1:-1]
-                
-                values = parse_sql_values(row_str)
-                
-                if table_name == 'posts':
-                    if len(values) < 23:
-                        continue
-                    
-                    post_type = clean_content(values[20] if len(values) > 20 else 'post')
-                    post_status = clean_content(values[7] if len(values) > 7 else 'draft')
-                    
-                    if post_status != 'publish':
-                        continue
-                    
-                    data.append({
-                        'id': int(clean_content(values[0])) if clean_content(values[0]).isdigit() else 0,
-                        'author_id': int(clean_content(values[1])) if clean_content(values[1]).isdigit() else 0,
-                        'date': clean_content(values[2]) if len(values) > 2 else '',
-                        'date_gmt': clean_content(values[3]) if len(values) > 3 else '',
-                        'content': clean_content(values[4]) if len(values) > 4 else '',
-                        'title': clean_content(values[5]) if len(values) > 5 else '',
-                        'excerpt': clean_content(values[6]) if len(values) > 6 else '',
-                        'status': post_status,
-                        'comment_status': clean_content(values[8]) if len(values) > 8 else 'open',
-                        'ping_status': clean_content(values[9]) if len(values) > 9 else 'open',
-                        'password': clean_content(values[10]) if len(values) > 10 else '',
-                        'slug': clean_content(values[11]) if len(values) > 11 else '',
-                        'modified': clean_content(values[14]) if len(values) > 14 else '',
-                        'modified_gmt': clean_content(values[15]) if len(values) > 15 else '',
-                        'parent': int(clean_content(values[17])) if len(values) > 17 and clean_content(values[17]).isdigit() else 0,
-                        'guid': clean_content(values[18]) if len(values) > 18 else '',
-                        'type': post_type,
-                        'mime_type': clean_content(values[21]) if len(values) > 21 else '',
-                        'comment_count': int(clean_content(values[22])) if len(values) > 22 and clean_content(values[22]).isdigit() else 0,
-                    })
-                elif table_name == 'users':
-                    if len(values) < 10:
-                        continue
-                    data.append({
-                        'id': int(clean_content(values[0])) if clean_content(values[0]).isdigit() else 0,
-                        'login': clean_content(values[1]) if len(values) > 1 else '',
-                        'password': clean_content(values[2]) if len(values) > 2 else '',
-                        'nicename': clean_content(values[3]) if len(values) > 3 else '',
-                        'email': clean_content(values[4]) if len(values) > 4 else '',
-                        'url': clean_content(values[5]) if len(values) > 5 else '',
-                        'registered': clean_content(values[6]) if len(values) > 6 else '',
-                        'activation_key': clean_content(values[7]) if len(values) > 7 else '',
-                        'status': int(clean_content(values[8])) if len(values) > 8 and clean_content(values[8]).isdigit() else 0,
-                        'display_name': clean_content(values[9]) if len(values) > 9 else '',
-                    })
-                elif table_name == 'comments':
-                    if len(values) < 15:
-                        continue
-                    approved = clean_content(values[10]) if len(values) > 10 else '0'
-                    if approved != '1':
-                        continue
-                    data.append({
-                        'id': int(clean_content(values[0])) if clean_content(values[0]).isdigit() else 0,
-                        'post_id': int(clean_content(values[1])) if clean_content(values[1]).isdigit() else 0,
-                        'author': clean_content(values[2]) if len(values) > 2 else '',
-                        'author_email': clean_content(values[3]) if len(values) > 3 else '',
-                        'author_url': clean_content(values[4]) if len(values) > 4 else '',
-                        'author_ip': clean_content(values[5]) if len(values) > 5 else '',
-                        'date': clean_content(values[6]) if len(values) > 6 else '',
-                        'date_gmt': clean_content(values[7]) if len(values) > 7 else '',
-                        'content': clean_content(values[8]) if len(values) > 8 else '',
-                        'karma': int(clean_content(values[9])) if len(values) > 9 and clean_content(values[9]).isdigit() else 0,
-                        'approved': approved == '1',
-                        'agent': clean_content(values[11]) if len(values) > 11 else '',
-                        'type': clean_content(values[12]) if len(values) > 12 else 'comment',
-                        'parent': int(clean_content(values[13])) if len(values) > 13 and clean_content(values[13]).isdigit() else 0,
-                        'user_id': int(clean_content(values[14])) if len(values) > 14 and clean_content(values[14]).isdigit() else 0,
-                    })
-                elif table_name == 'terms':
-                    if len(values) < 4:
-                        continue
-                    data.append({
-                        'id': int(clean_content(values[0])) if clean_content(values[0]).isdigit() else 0,
-                        'name': clean_content(values[1]) if len(values) > 1 else '',
-                        'slug': clean_content(values[2]) if len(values) > 2 else '',
-                        'group': int(clean_content(values[3])) if len(values) > 3 and clean_content(values[3]).isdigit() else 0,
-                    })
-                elif table_name == 'term_taxonomy':
-                    if len(values) < 6:
-                        continue
-                    data.append({
-                        'taxonomy_id': int(clean_content(values[0])) if clean_content(values[0]).isdigit() else 0,
-                        'term_id': int(clean_content(values[1])) if clean_content(values[1]).isdigit() else 0,
-                        'taxonomy': clean_content(values[2]) if len(values) > 2 else '',
-                        'description': clean_content(values[3]) if len(values) > 3 else '',
-                        'parent': int(clean_content(values[4])) if len(values) > 4 and clean_content(values[4]).isdigit() else 0,
-                        'count': int(clean_content(values[5])) if len(values) > 5 and clean_content(values[5]).isdigit() else 0,
-                    })
-                elif table_name == 'term_relationships':
-                    if len(values) < 3:
-                        continue
-                    data.append({
-                        'object_id': int(clean_content(values[0])) if clean_content(values[0]).isdigit() else 0,
-                        'term_taxonomy_id': int(clean_content(values[1])) if clean_content(values[1]).isdigit() else 0,
-                        'term_order': int(clean_content(values[2])) if len(values) > 2 and clean_content(values[2]).isdigit() else 0,
-                    })
-                elif table_name == 'postmeta':
-                    if len(values) < 4:
-                        continue
-                    data.append({
-                        'meta_id': int(clean_content(values[0])) if clean_content(values[0]).isdigit() else 0,
-                        'post_id': int(clean_content(values[1])) if clean_content(values[1]).isdigit() else 0,
-                        'meta_key': clean_content(values[2]) if len(values) > 2 else '',
-                        'meta_value': clean_content(values[3]) if len(values) > 3 else '',
-                    })
-            except Exception as e:
+            if workers > 1 and TABLES[name].keep:
+                if keep is None or keep[0] != name or keep[1] is not columns:
+                    keep = (name, columns, compile_keep(name, columns))
+                if len(values) == len(columns or TABLES[name].columns) and not keep[2](values):
+                    continue
+            yield name, columns, values
+    
+    for records, batch_timings in ordered_map(decode_rows, batched(rows(), batch_size), workers):
+        for name, record in records:
+            if record is None:
                 continue
+            if sink is None:
+                data[name].append(record)
+            elif stats is None:
+                sink(name, record)
+            else:
+                started = time.perf_counter()
+                sink(name, record)
+                stats.add('write', time.perf_counter() - started)
+        for name, seconds in batch_timings.items():
+            timings[name] += seconds
+    if stats is not None:
+        stats.add('clean', sum(timings.values()))
     
-    return data
+    return data, timings
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 extract-all-wordpress-data.py <sql_file_path>")
-        sys.exit(1)
-    
-    sql_file = sys.argv[1]
-    
-    if not Path(sql_file).exists():
-        print(f"Error: File not found: {sql_file}")
-        sys.exit(1)
-    
-    print("Extracting all WordPress data from SQL dump...")
-    print(f"Table prefix: {TABLE_PREFIX}")
-    print()
-    
-    try:
-        with open(sql_file, 'r', encoding='utf-8', errors='ignore') as f:
-            sql_content = f.read()
-    except Exception as e:
-        print(f"Error reading file: {e}")
-        sys.exit(1)
-    
-    # Extract all tables
-    print("Extracting posts...")
-    posts = extract_table_data(sql_content, 'posts')
-    print(f"  Found {len(posts)} posts")
-    
-    print("Extracting users...")
-    users = extract_table_data(sql_content, 'users')
-    print(f"  Found {len(users)} users")
-    
-    print("Extracting comments...")
-    comments = extract_table_data(sql_content, 'comments')
-    print(f"  Found {len(comments)} comments")
-    
-    print("Extracting terms...")
-    terms = extract_table_data(sql_content, 'terms')
-    print(f"  Found {len(terms)} terms")
-    
-    print("Extracting term_taxonomy...")
-    term_taxonomy = extract_table_data(sql_content, 'term_taxonomy')
-    print(f"  Found {len(term_taxonomy)} term_taxonomy entries")
-    
-    print("Extracting term_relationships...")
-    term_relationships = extract_table_data(sql_content, 'term_relationships')
-    print(f"  Found {len(term_relationships)} term_relationships")
-    
-    print("Extracting postmeta...")
-    post_meta = extract_table_data(sql_content, 'postmeta')
-    print(f"  Found {len(post_meta)} post_meta entries")
-    
-    # Separate posts and pages
-    blog_posts = [p for p in posts if p['type'] == 'post']
-    pages = [p for p in posts if p['type'] == 'page']
-    
-    # Build categories and tags
+def extract_table_data(sql_file, table_name):
+    """
+    Extract data from a specific table, streaming the dump
+    """
+    data, _ = extract_all_tables(sql_file, [table_name])
+    return data[table_name]
+
+def build_taxonomies(terms, term_taxonomy):
+    """
+    Join terms with their taxonomy rows into ``(categories, tags)``
+    """
     categories = []
     tags = []
     
@@ -341,44 +187,186 @@ def main():
                 'count': tt['count'],
             })
     
-    # Save all data
-    output_files = {
-        'posts': blog_posts,
-        'pages': pages,
-        'users': users,
-        'categories': categories,
-        'tags': tags,
-        'comments': comments,
-        'term_relationships': term_relationships,
-        'post_meta': post_meta,
+    return categories, tags
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract all WordPress data from a SQL dump to JSON")
+    parser.add_argument("sql_file", help="Path to the .sql dump or a .tar.gz backup containing it")
+    parser.add_argument("--workers", type=int, default=1, help="Decode rows in N worker processes")
+    parser.add_argument("--tables", default='', help="Extra registered tables to extract, e.g. options,usermeta")
+    parser.add_argument("--format", choices=FORMATS, default='json', help="json arrays, JSON Lines (one record per line) or Parquet (needs pyarrow)")
+    parser.add_argument("--compress", choices=list(COMPRESSIONS), default='none', help="Compress the output files")
+    parser.add_argument("--to-sqlite", metavar="DB", help="Load every row into a SQLite database instead of writing files")
+    parser.add_argument("--documents", action="store_true",
+                        help="Also write post_documents with categories, tags, featured image and meta joined in")
+    parser.add_argument("--meta-keys", default=','.join(DEFAULT_META_KEYS), help="Meta keys copied into post_documents")
+    parser.add_argument("--revisions", choices=('latest', 'history'),
+                        help="Also write revisions: the latest revision of each post, or every one as a delta")
+    parser.add_argument("--comment-threads", metavar="DIR",
+                        help="Also write the nested comment thread of each post to DIR/<post id>.json")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Also run under cProfile and tracemalloc ({PSTATS_NAME} and a profile section in {REPORT_NAME})")
+    args = parser.parse_args()
+    
+    extra_tables = [name for name in args.tables.split(',') if name]
+    unknown = [name for name in extra_tables if name not in TABLES]
+    if unknown:
+        print(f"Error: Unknown table(s): {', '.join(unknown)}. Known: {', '.join(TABLES)}")
+        sys.exit(1)
+    
+    package = missing_package(args.format, args.compress)
+    if package:
+        print(f"Error: --format {args.format} --compress {args.compress} needs the '{package}' package")
+        sys.exit(1)
+    
+    sql_file = args.sql_file
+    
+    if not Path(sql_file).exists():
+        print(f"Error: File not found: {sql_file}")
+        sys.exit(1)
+    
+    table_names = list(DEFAULT_TABLES) + [name for name in extra_tables if name not in DEFAULT_TABLES]
+    
+    if args.to_sqlite:
+        print(f"Loading WordPress tables into {args.to_sqlite}...")
+        started = time.perf_counter()
+        counts = load_dump(sql_file, args.to_sqlite, table_names, prefix=TABLE_PREFIX)
+        elapsed = time.perf_counter() - started
+        for name, count in counts.items():
+            print(f"  {name}: {count} rows")
+        print(f"✓ Loaded {sum(counts.values())} rows in {elapsed:.2f}s")
+        return
+    
+    print("Extracting all WordPress data from SQL dump...")
+    print(f"Table prefix: {TABLE_PREFIX}")
+    print()
+    
+    output_names = list(OUTPUT_NAMES) + [name for name in extra_tables if name not in DEFAULT_TABLES]
+    if args.documents:
+        output_names.append('post_documents')
+    if args.revisions:
+        output_names.append('revisions')
+    routes = dict(TABLE_OUTPUTS, **{name: name for name in extra_tables if name not in DEFAULT_TABLES})
+    
+    # Small tables needed to build categories and tags
+    taxonomy = {'terms': [], 'term_taxonomy': []}
+    samples = {'post': [], 'page': []}
+    
+    # Join indexes for post_documents, filled while the dump streams past
+    documents = DocumentIndex([key for key in args.meta_keys.split(',') if key]) if args.documents else None
+    document_posts = []
+    
+    # Revision rows are set aside undecoded; only the ones written get decoded
+    revisions = RevisionCompactor(history=args.revisions == 'history') if args.revisions else None
+    post_ids = set()
+    
+    threads = ThreadIndex() if args.comment_threads else None
+    thread_index = None
+    
+    stats = PipelineStats()
+    profiler = Profiler(OUTPUT_DIR / PSTATS_NAME) if args.profile else nullcontext()
+    
+    with profiler, ExitStack() as stack:
+        # Every file is written while the dump is scanned and renamed into
+        # place only if the whole extraction succeeds
+        writers = {
+            name: stack.enter_context(open_writer(
+                output_path(OUTPUT_DIR, name, args.format, args.compress), args.format, args.compress,
+                table=OUTPUT_TABLES.get(name, name),
+            ))
+            for name in output_names
+        }
+        
+        def sink(name, record):
+            if documents is not None:
+                if name == 'posts':
+                    document_posts.append(record)
+                elif name in DocumentIndex.TABLES:
+                    documents.add(name, record)
+            if name == 'posts':
+                post_ids.add(record['id'])
+                kind = record['type']
+                writers['posts' if kind == 'post' else 'pages'].write(record)
+                if len(samples[kind]) < 5:
+                    samples[kind].append(record['title'])
+            elif name in taxonomy:
+                taxonomy[name].append(record)
+            else:
+                if threads is not None and name == 'comments':
+                    threads.add(record)
+                writers[routes[name]].write(record)
+        
+        # Extract all tables in one pass
+        started = time.perf_counter()
+        _, timings = extract_all_tables(sql_file, table_names, workers=args.workers, sink=sink, revisions=revisions,
+                                        stats=stats)
+        elapsed = time.perf_counter() - started
+        
+        categories, tags = build_taxonomies(taxonomy['terms'], taxonomy['term_taxonomy'])
+        with stats.stage('write'):
+            writers['categories'].write_all(categories)
+            writers['tags'].write_all(tags)
+            if documents is not None:
+                writers['post_documents'].write_all(documents.build(post) for post in document_posts)
+            if revisions is not None:
+                writers['revisions'].write_all(revisions.records(post_ids))
+            if threads is not None:
+                thread_index = write_threads(threads.threads(post_ids), args.comment_threads)
+            stack.close()
+    
+    counts = {name: writer.count for name, writer in writers.items()}
+    kept = {
+        'posts': counts['posts'] + counts['pages'],
+        'terms': len(taxonomy['terms']),
+        'term_taxonomy': len(taxonomy['term_taxonomy']),
     }
     
+    print(f"Single pass over dump took {elapsed:.2f}s ({args.workers} worker(s))")
+    for name in table_names:
+        rows = kept[name] if name in kept else counts[routes[name]]
+        print(f"  {name}: {rows} rows kept, {timings[name]:.2f}s converting")
+    print(f"  scanning/tokenizing: {elapsed - sum(timings.values()):.2f}s")
+    if revisions is not None:
+        print(f"  revisions: {revisions.seen} rows set aside, {revisions.superseded} superseded bodies never decoded")
+    if thread_index is not None:
+        print(f"  comment threads: {len(thread_index)} posts, written to {args.comment_threads}")
+    print("\nStages:")
+    for line in format_stages(stats):
+        print(line)
+    report = stats.report(
+        source=str(sql_file),
+        workers=args.workers,
+        outputs={name: {'path': str(writer.path), 'records': writer.count} for name, writer in writers.items()},
+    )
+    if args.profile:
+        report['profile'] = profiler.summary()
+    write_report(OUTPUT_DIR / REPORT_NAME, report)
+    print(f"✓ Saved report to {OUTPUT_DIR / REPORT_NAME}")
+    print()
+    
     print("\nExtraction Summary:")
-    print(f"  Posts: {len(blog_posts)}")
-    print(f"  Pages: {len(pages)}")
-    print(f"  Users: {len(users)}")
-    print(f"  Categories: {len(categories)}")
-    print(f"  Tags: {len(tags)}")
-    print(f"  Comments: {len(comments)}")
-    print(f"  Post Meta: {len(post_meta)}")
-    print(f"  Term Relationships: {len(term_relationships)}\n")
+    print(f"  Posts: {counts['posts']}")
+    print(f"  Pages: {counts['pages']}")
+    print(f"  Users: {counts['users']}")
+    print(f"  Categories: {counts['categories']}")
+    print(f"  Tags: {counts['tags']}")
+    print(f"  Comments: {counts['comments']}")
+    print(f"  Post Meta: {counts['post_meta']}")
+    print(f"  Term Relationships: {counts['term_relationships']}\n")
     
-    for filename, data in output_files.items():
-        filepath = OUTPUT_DIR / f'{filename}.json'
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"✓ Saved {len(data)} items to {filepath}")
+    for writer in writers.values():
+        print(f"✓ Saved {writer.count} items to {writer.path}")
     
     # Print samples
-    if blog_posts:
+    if samples['post']:
         print("\nSample post titles:")
-        for post in blog_posts[:5]:
-            print(f"  - {post['title'][:60]}...")
+        for title in samples['post']:
+            print(f"  - {title[:60]}...")
     
-    if pages:
+    if samples['page']:
         print("\nSample page titles:")
-        for page in pages[:5]:
-            print(f"  - {page['title'][:60]}...")
+        for title in samples['page']:
+            print(f"  - {title[:60]}...")
     
     if categories:
         print("\nCategories:")
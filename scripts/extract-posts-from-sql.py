@@ -5,84 +5,25 @@ Extract posts from WordPress SQL dump and convert to JSON
 Usage: python3 scripts/extract-posts-from-sql.py backup-1.5.2026_09-05-37_womanao0/mysql/womanao0_WP3YO.sql
 """
 
-import re
 import json
-import html
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scripts.sqldump import iter_rows, split_values  # noqa: E402
+from scripts.wp_schema import compile_table  # noqa: E402
+
 # WordPress table prefix from audit
 TABLE_PREFIX = '_3YO_'
 
+# Record fields this extractor writes, from the wp_schema ``posts`` record
+POST_FIELDS = ('id', 'type', 'title', 'slug', 'content', 'excerpt', 'date', 'author_id', 'status')
+
 def parse_sql_values(row_str):
     """
-    Parse SQL VALUES row, handling quoted strings and escaping
+    Parse SQL VALUES row into raw literals, handling quoted strings and escaping
     """
-    values = []
-    current = ''
-    in_string = False
-    escape_next = False
-    
-    i = 0
-    while i < len(row_str):
-        char = row_str[i]
-        
-        if escape_next:
-            current += char
-            escape_next = False
-        elif char == '\\':
-            if i + 1 < len(row_str) and row_str[i + 1] in ["'", '"', '\\', 'n', 'r', 't']:
-                escape_next = True
-            else:
-                current += char
-        elif char == "'" and not in_string:
-            in_string = True
-        elif char == "'" and in_string:
-            # Check if it's an escaped quote
-            if i + 1 < len(row_str) and row_str[i + 1] == "'":
-                current += "'"
-                i += 1  # Skip next quote
-            else:
-                in_string = False
-        elif char == ',' and not in_string:
-            values.append(current.strip())
-            current = ''
-        else:
-            current += char
-        
-        i += 1
-    
-    if current:
-        values.append(current.strip())
-    
-    return values
-
-def clean_content(content):
-    """
-    Clean WordPress content
-    """
-    if not content or content == "NULL":
-        return ''
-    
-    # Remove outer quotes if present
-    if content.startswith("'") and content.endswith("'"):
-        content = content[1:-1]
-    
-    # Unescape SQL strings
-    content = content.replace("\\'", "'")
-    content = content.replace('\\"', '"')
-    content = content.replace('\\\\', '\\')
-    content = content.replace('\\n', '\n')
-    content = content.replace('\\r', '\r')
-    content = content.replace('\\t', '\t')
-    
-    # Unescape HTML entities
-    try:
-        content = html.unescape(content)
-    except:
-        pass
-    
-    return content
+    return split_values(row_str)
 
 def extract_posts_from_sql(sql_file_path):
     """
@@ -93,119 +34,36 @@ def extract_posts_from_sql(sql_file_path):
     
     print(f"Reading SQL file: {sql_file_path}")
     
-    try:
-        with open(sql_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    except Exception as e:
-        print(f"Error reading file: {e}")
-        return posts, pages
-    
-    # Find INSERT INTO statements for posts table
-    pattern = rf"INSERT INTO `{re.escape(TABLE_PREFIX)}posts`[^;]*VALUES\s*(.*?);"
-    matches = re.finditer(pattern, content, re.DOTALL | re.IGNORECASE)
-    
     total_rows = 0
     
-    for match in matches:
-        values_block = match.group(1)
-        
-        # Split into individual rows (handle multi-line values)
-        # Each row starts with ( and ends with ),
-        # But we need to be careful with nested parentheses in content
-        rows = []
-        current_row = ''
-        paren_depth = 0
-        in_string = False
-        escape_next = False
-        
-        for char in values_block:
-            if escape_next:
-                current_row += char
-                escape_next = False
-            elif char == '\\' and in_string:
-                escape_next = True
-                current_row += char
-            elif char == "'" and not escape_next:
-                in_string = not in_string
-                current_row += char
-            elif char == '(' and not in_string:
-                if paren_depth == 0:
-                    current_row = '('
-                else:
-                    current_row += char
-                paren_depth += 1
-            elif char == ')' and not in_string:
-                current_row += char
-                paren_depth -= 1
-                if paren_depth == 0:
-                    rows.append(current_row)
-                    current_row = ''
-            elif char == ',' and paren_depth == 0 and not in_string:
-                # Skip commas between rows
-                continue
-            else:
-                current_row += char
-        
-        # Parse each row
-        for row_str in rows:
-            if not row_str.strip():
+    # Stream rows of the posts table without loading the dump; the schema
+    # maps columns by name and checks status/type before decoding the rest,
+    # so revisions and attachments cost almost nothing
+    for _, columns, values in iter_rows(sql_file_path, tables={f'{TABLE_PREFIX}posts'}):
+        try:
+            record = compile_table('posts', columns)(values)
+            if record is None:
                 continue
+            post_data = {key: record[key] for key in POST_FIELDS}
+            post_type = post_data['type']
             
-            try:
-                # Remove outer parentheses
-                row_str = row_str.strip()
-                if row_str.startswith('(') and row_str.endswith(')'):
-                    row_str = row_str[1:-1]
-                
-                values = parse_sql_values(row_str)
-                
-                if len(values) < 23:
-                    continue
-                
-                # WordPress posts table structure (simplified):
-                # ID, post_author, post_date, post_date_gmt, post_content, post_title,
-                # post_excerpt, post_status, comment_status, ping_status, post_password,
-                # post_name, to_ping, pinged, post_modified, post_modified_gmt,
-                # post_content_filtered, post_parent, guid, menu_order, post_type,
-                # post_mime_type, comment_count
-                
-                post_id = values[0].strip("'\"")
-                post_type = values[20].strip("'\"") if len(values) > 20 else 'post'
-                post_status = values[7].strip("'\"") if len(values) > 7 else 'draft'
-                
-                # Only process published posts and pages
-                if post_status != 'publish':
-                    continue
-                
-                post_data = {
-                    'id': int(post_id) if post_id.isdigit() else post_id,
-                    'type': post_type,
-                    'title': clean_content(values[5]) if len(values) > 5 else '',
-                    'slug': clean_content(values[11]) if len(values) > 11 else '',
-                    'content': clean_content(values[4]) if len(values) > 4 else '',
-                    'excerpt': clean_content(values[6]) if len(values) > 6 else '',
-                    'date': clean_content(values[2]) if len(values) > 2 else '',
-                    'author_id': clean_content(values[1]) if len(values) > 1 else '',
-                    'status': post_status,
-                }
-                
-                if post_type == 'post':
-                    posts.append(post_data)
-                    total_rows += 1
-                elif post_type == 'page':
-                    pages.append(post_data)
-                    total_rows += 1
-                
-            except Exception as e:
-                # Skip problematic rows
-                continue
-    
+            if post_type == 'post':
+                posts.append(post_data)
+                total_rows += 1
+            elif post_type == 'page':
+                pages.append(post_data)
+                total_rows += 1
+            
+        except Exception as e:
+            # Skip problematic rows
+            continue
+
     print(f"Extracted {len(posts)} posts and {len(pages)} pages (total rows processed: {total_rows})")
     return posts, pages
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python3 extract-posts-from-sql.py <sql_file_path>")
+        print("Usage: python3 extract-posts-from-sql.py <sql_file_path or backup .tar.gz>")
         print("Example: python3 extract-posts-from-sql.py backup-1.5.2026_09-05-37_womanao0/mysql/womanao0_WP3YO.sql")
         sys.exit(1)
     
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Stage timers, per-table counters and optional profiling for the extractors
+
+``PipelineStats`` is passed down the pipeline (``iter_rows(stats=...)``,
+``extract_all_tables(stats=...)``) and collects:
+
+- seconds per stage: ``read`` (file reads and decompression), ``statement_scan``
+  (finding INSERT headers), ``row_split`` (between rows), ``value_parse``
+  (slicing literals out of a row), ``clean`` (schema conversion: unescaping,
+  HTML entities, integers) and ``write`` (output writers)
+- rows, statements and size per table, for every table in the dump
+  (emitted or not); sizes are bytes for binary input, characters for text
+
+Stages run in a pool (``clean`` with ``--workers``) are summed over workers
+and can exceed the wall time.
+
+``Profiler`` wraps a run in cProfile and tracemalloc; it saves a ``.pstats``
+file (``python3 -m pstats file``) and puts the top functions and allocation
+sites in the report.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+STAGES = ('read', 'statement_scan', 'row_split', 'value_parse', 'clean', 'write')
+
+REPORT_VERSION = 1
+
+# Entries kept in the report's profile section
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 20
+
+
+class PipelineStats:
+    """Accumulates stage timings and per-table counters for one run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.tables = defaultdict(lambda: {'statements': 0, 'rows': 0, 'size': 0})
+        self.bytes_read = 0
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, table, rows=0, size=0, statements=0):
+        counters = self.tables[table]
+        counters['rows'] += rows
+        counters['size'] += size
+        counters['statements'] += statements
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def report(self, **extra):
+        """The JSON-ready report; ``extra`` keys are added at the top level"""
+        wall = time.perf_counter() - self.started
+        return {
+            'version': REPORT_VERSION,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'wall_seconds': wall,
+            'stages': dict(self.stages),
+            'bytes_read': self.bytes_read,
+            'tables': {table: dict(counters) for table, counters in sorted(self.tables.items())},
+            **extra,
+        }
+
+
+class Profiler:
+    """
+    Context manager running cProfile and tracemalloc over a block
+
+    After the block ``summary()`` gives the report section; the raw profile
+    is saved to ``pstats_path``.
+    """
+
+    def __init__(self, pstats_path, frames=1):
+        self.pstats_path = Path(pstats_path)
+        self.frames = frames
+        self.profile = cProfile.Profile()
+        self.snapshot = None
+        self.peak = 0
+
+    def __enter__(self):
+        tracemalloc.start(self.frames)
+        self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.disable()
+        self.snapshot = tracemalloc.take_snapshot()
+        _, self.peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.profile.dump_stats(self.pstats_path)
+        return False
+
+    def summary(self):
+        stats = pstats.Stats(str(self.pstats_path))
+        functions = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+            functions.append({
+                'function': f'{Path(filename).name}:{line}({name})',
+                'calls': calls,
+                'own_seconds': own,
+                'cumulative_seconds': cumulative,
+            })
+        functions.sort(key=lambda entry: entry['cumulative_seconds'], reverse=True)
+
+        snapshot = self.snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        allocations = [
+            {'site': str(statistic.traceback), 'size': statistic.size, 'count': statistic.count}
+            for statistic in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+        ]
+        return {
+            'pstats': str(self.pstats_path),
+            'top_functions': functions[:TOP_FUNCTIONS],
+            'traced_peak_bytes': self.peak,
+            'top_allocations': allocations,
+        }
+
+
+def write_report(path, report):
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def format_stages(stats):
+    """One line per stage for console output"""
+    return [f"  {stage}: {seconds:.2f}s" for stage, seconds in stats.stages.items()]
@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+"""
+Convert extracted WordPress posts and pages to MDX files for the Next.js app
+
+Each record's ``content`` goes through three steps:
+
+1. Gutenberg block comments (``<!-- wp:name {attrs} -->``) are parsed. Blocks
+   with no Markdown equivalent become components: embeds ``<Embed url />``,
+   custom HTML ``<RawHtml html />``, separators a thematic break; spacers are
+   dropped. The comments of every other block are stripped and its HTML
+   converted like classic content.
+2. Shortcodes the site used (``[caption]``, ``[embed]``, ``[gallery]``,
+   ``[contact-form]``...) become ``<Shortcode name ...>`` components, or a
+   ``<figure>`` for captions.
+3. The remaining HTML is turned into Markdown (paragraphs, headings, lists,
+   quotes, emphasis, links, images); classic-editor text keeps WordPress's
+   autop semantics, a blank line separating paragraphs and a single newline
+   being a line break.
+
+The output is ``<output>/<type>s/<slug>.mdx`` with a YAML front matter.
+``.mdx-manifest.json`` in the output directory maps each file to the hash of
+its input record and ``CONVERTER_VERSION``, so a re-run only converts the
+records (or, after a converter change, all of them) whose hash changed.
+Conversion fans out over a process pool with ``--workers``.
+
+Usage: python3 -m scripts.mdx_convert [--input extracted_data/posts.json] [--output content] [--workers N]
+"""
+
+import hashlib
+import json
+import os
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+from scripts.output_writer import iter_records
+from scripts.parallel import ordered_map
+
+ROOT = Path(__file__).parent.parent
+DATA_DIR = ROOT / 'extracted_data'
+OUTPUT_DIR = ROOT / 'content'
+
+# Bump whenever the output of convert_record changes
+CONVERTER_VERSION = 1
+
+MANIFEST_NAME = '.mdx-manifest.json'
+
+# Record fields copied into the front matter, in order, when present
+FRONT_MATTER_FIELDS = (
+    'title', 'slug', 'date', 'modified', 'excerpt', 'type', 'categories', 'tags', 'featured_image',
+)
+
+# Gutenberg blocks replaced as a whole; every other block is plain HTML
+EMBED_BLOCKS = ('embed', 'core-embed/')
+RAW_HTML_BLOCKS = ('html',)
+DROPPED_BLOCKS = ('spacer', 'more', 'nextpage')
+SEPARATOR_BLOCKS = ('separator',)
+
+# Shortcodes converted; anything else in brackets is left as text
+SHORTCODES = frozenset({
+    'caption', 'wp_caption', 'embed', 'gallery', 'video', 'audio', 'playlist',
+    'contact-form', 'contact-field',
+})
+
+BLOCK_RE = re.compile(
+    r'<!--\s+wp:(?P<name>[a-z][a-z0-9_-]*(?:/[a-z][a-z0-9_-]*)?)(?P<attrs>\s+\{.*?\})?\s*(?P<void>/)?-->'
+    r'(?(void)|(?:(?P<inner>.*?)<!--\s+/wp:(?P=name)\s+-->)?)',
+    re.DOTALL,
+)
+BLOCK_DELIMITER_RE = re.compile(r'<!--\s+/?wp:[^>]*?-->')
+
+# WordPress's get_shortcode_regex(), restricted to SHORTCODES
+SHORTCODE_RE = re.compile(
+    r'\[(?P<escaped>\[?)(?P<name>' + '|'.join(re.escape(name) for name in sorted(SHORTCODES, key=len, reverse=True))
+    + r')(?![\w-])(?P<attrs>[^\]/]*(?:/(?!\])[^\]/]*)*?)'
+    r'(?:/\]|\](?:(?P<inner>[^\[]*(?:\[(?!/(?P=name)\])[^\[]*)*)\[/(?P=name)\])?)(?P<close>\]?)'
+)
+# WordPress's shortcode_parse_atts()
+SHORTCODE_ATTR_RE = re.compile(
+    r'''([\w-]+)\s*=\s*"([^"]*)"|([\w-]+)\s*=\s*'([^']*)'|([\w-]+)\s*=\s*([^\s'"]+)|"([^"]*)"|'([^']*)'|(\S+)'''
+)
+
+# Placeholder element the HTML pass replaces with a prepared MDX block
+_BLOCK_TAG = 'mdx-block'
+
+_HEADINGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+_PARAGRAPH_TAGS = frozenset({'p', 'figcaption', 'dt', 'dd', 'td', 'th', 'summary'}) | frozenset(_HEADINGS)
+_EMPHASIS = {'strong': '**', 'b': '**', 'em': '_', 'i': '_', 'del': '~~', 's': '~~'}
+_SKIPPED_TAGS = frozenset({'script', 'style', 'noscript', 'svg'})
+_VOID_TAGS = frozenset({'br', 'img', 'hr', 'input', 'source', 'wbr', 'meta', 'link'})
+
+_MARKDOWN_ESCAPE_RE = re.compile(r'([\\`*_\[\]{}<>|])')
+_LINE_START_RE = re.compile(r'^(#{1,6}\s|[-+=]\s|\d+[.)]\s|>)')
+_WHITESPACE_RE = re.compile(r'[ \t\r\n\f\v]+')
+
+
+def jsx_value(value):
+    """A JSX attribute value: a JS expression holding ``value``"""
+    return '{' + json.dumps(value, ensure_ascii=False) + '}'
+
+
+def jsx_element(name, attributes=(), children=None):
+    attrs = ''.join(f' {key}={jsx_value(value)}' for key, value in attributes)
+    if children is None:
+        return f'<{name}{attrs} />'
+    return f'<{name}{attrs}>\n{children}\n</{name}>'
+
+
+def parse_shortcode_attrs(text):
+    """``[(name, value)]`` for a shortcode's attribute string; bare values get positional names"""
+    attributes = []
+    for match in SHORTCODE_ATTR_RE.finditer(text):
+        groups = match.groups()
+        if groups[0]:
+            attributes.append((groups[0].lower(), groups[1]))
+        elif groups[2]:
+            attributes.append((groups[2].lower(), groups[3]))
+        elif groups[4]:
+            attributes.append((groups[4].lower(), groups[5]))
+        else:
+            value = next(group for group in groups[6:] if group is not None)
+            attributes.append((f'arg{len(attributes)}', value))
+    return attributes
+
+
+class _Blocks:
+    """MDX blocks prepared before the HTML pass, referenced by placeholder elements"""
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, mdx):
+        self.items.append(mdx)
+        return f'<{_BLOCK_TAG} data-index="{len(self.items) - 1}"></{_BLOCK_TAG}>'
+
+
+def _replace_blocks(content, blocks):
+    def replace(match):
+        name = match.group('name')
+        inner = match.group('inner') or ''
+        try:
+            attrs = json.loads(match.group('attrs')) if match.group('attrs') else {}
+        except ValueError:
+            attrs = {}
+        if name.startswith('core/'):
+            name = name[len('core/'):]
+        if name in DROPPED_BLOCKS:
+            return ''
+        if name in SEPARATOR_BLOCKS:
+            return blocks.add('---')
+        if name in RAW_HTML_BLOCKS:
+            return blocks.add(jsx_element('RawHtml', [('html', inner.strip())]))
+        if name.startswith(EMBED_BLOCKS):
+            url = attrs.get('url') or _WHITESPACE_RE.sub(' ', re.sub(r'<[^>]+>', ' ', inner)).strip()
+            attributes = [('url', url)]
+            if attrs.get('providerNameSlug'):
+                attributes.append(('provider', attrs['providerNameSlug']))
+            return blocks.add(jsx_element('Embed', attributes))
+        # Nested blocks (groups, columns) are handled by the next round
+        return inner
+
+    # Each round unwraps one level of nesting
+    previous = None
+    while previous != content:
+        previous = content
+        content = BLOCK_RE.sub(replace, content)
+    return BLOCK_DELIMITER_RE.sub('', content)
+
+
+def _replace_shortcodes(content, blocks):
+    def render(match):
+        name = match.group('name')
+        attributes = parse_shortcode_attrs(match.group('attrs'))
+        inner = match.group('inner')
+        if name in ('caption', 'wp_caption') and inner is not None:
+            # [caption]<img ...> Caption text[/caption]: image first, text after
+            split = re.match(r'\s*((?:<a\b[^>]*>\s*)?<img\b[^>]*>(?:\s*</a>)?)(.*)', inner, re.DOTALL)
+            if split:
+                return f'<figure>{split.group(1)}<figcaption>{split.group(2).strip()}</figcaption></figure>'
+            return inner
+        if name == 'embed' and inner is not None:
+            return jsx_element('Embed', [('url', inner.strip())] + attributes)
+        children = None
+        if inner is not None and inner.strip():
+            nested = SHORTCODE_RE.sub(lambda m: '\n' + render(m) + '\n', inner)
+            if nested != inner:
+                children = '\n'.join(line for line in (part.strip() for part in nested.split('\n')) if line)
+            else:
+                attributes.append(('content', inner.strip()))
+        return jsx_element('Shortcode', [('name', name)] + attributes, children)
+
+    def replace(match):
+        if match.group('escaped') and match.group('close'):
+            # [[gallery]] is the escaped, literal form
+            return match.group(0)[1:-1]
+        if match.group('name') in ('caption', 'wp_caption'):
+            # Rendered as HTML the Markdown pass turns into an image and caption
+            return render(match)
+        return blocks.add(render(match))
+
+    return SHORTCODE_RE.sub(replace, content)
+
+
+def escape_markdown(text):
+    return _MARKDOWN_ESCAPE_RE.sub(r'\\\1', text)
+
+
+class _MarkdownConverter(HTMLParser):
+    """Turn WordPress HTML into Markdown blocks"""
+
+    def __init__(self, prepared):
+        super().__init__(convert_charrefs=True)
+        self.prepared = prepared
+        self.blocks = []        # [(separator before it, markdown)]
+        self.inline = []        # parts of the paragraph being built
+        self.marks = []         # [(tag, position in inline, extra)]
+        self.lists = []         # [['ul' | 'ol', next number]]
+        self.quote_depth = 0
+        self.paragraph_depth = 0
+        self.heading = 0
+        self.pre_depth = 0
+        self.skip_depth = 0
+        self.marker = None      # list marker owed to the next block
+        self.last_in_list = False
+        self.last_quote_depth = 0
+
+    # -- output -------------------------------------------------------------
+
+    def _prefix_lines(self, text):
+        # Items of one list are kept together; anything else gets a blank line
+        tight = bool(self.lists) and self.last_in_list
+        self.last_in_list = bool(self.lists)
+        indent = '   ' * max(len(self.lists) - 1, 0) if self.lists else ''
+        lines = text.split('\n')
+        if self.marker is not None:
+            first = indent + self.marker
+            rest = indent + ' ' * len(self.marker)
+            lines = [first + lines[0]] + [rest + line if line else line for line in lines[1:]]
+            self.marker = None
+        elif self.lists:
+            rest = indent + '   '
+            lines = [rest + line if line else line for line in lines]
+        if self.quote_depth:
+            quote = '> ' * self.quote_depth
+            lines = [(quote + line).rstrip() for line in lines]
+        # Consecutive blocks of one quote stay in it
+        shared_quote = min(self.quote_depth, self.last_quote_depth)
+        self.last_quote_depth = self.quote_depth
+        if tight:
+            separator = '\n'
+        elif shared_quote:
+            separator = '\n' + '>' * shared_quote + '\n'
+        else:
+            separator = '\n\n'
+        self.blocks.append((separator, '\n'.join(lines)))
+
+    def _flush(self):
+        text = ''.join(self.inline)
+        self.inline = []
+        self.marks = []
+        if self.pre_depth:
+            if text.strip('\n'):
+                self._prefix_lines(text.strip('\n'))
+            return
+        lines = [_WHITESPACE_RE.sub(' ', line).strip() for line in text.split('\\\n')]
+        while lines and not lines[-1]:
+            lines.pop()
+        while lines and not lines[0]:
+            lines.pop(0)
+        if not lines:
+            if self.heading:
+                self.heading = 0
+            return
+        if _LINE_START_RE.match(lines[0]) and not self.heading:
+            lines[0] = '\\' + lines[0]
+        text = '\\\n'.join(lines)
+        if self.heading:
+            text = '#' * self.heading + ' ' + text.replace('\\\n', ' ')
+            self.heading = 0
+        self._prefix_lines(text)
+
+    def _raw_block(self, mdx):
+        self._flush()
+        self._prefix_lines(mdx)
+
+    def markdown(self):
+        self.close()
+        self._flush()
+        out = []
+        for index, (separator, text) in enumerate(self.blocks):
+            if index:
+                out.append(separator)
+            out.append(text)
+        return ''.join(out) + '\n' if out else ''
+
+    # -- parser callbacks ---------------------------------------------------
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_depth:
+            if tag not in _VOID_TAGS:
+                self.skip_depth += 1
+            return
+        attrs = dict(attrs)
+        if tag in _SKIPPED_TAGS:
+            self.skip_depth = 1
+        elif tag == _BLOCK_TAG:
+            self._raw_block(self.prepared[int(attrs['data-index'])])
+        elif tag in _PARAGRAPH_TAGS:
+            self._flush()
+            self.paragraph_depth += 1
+            self.heading = _HEADINGS.get(tag, 0)
+            if tag == 'figcaption':
+                self.marks.append((tag, len(self.inline), None))
+        elif tag in ('ul', 'ol'):
+            self._flush()
+            start = attrs.get('start') or '1'
+            self.lists.append([tag, int(start) if start.isdigit() else 1])
+        elif tag == 'li':
+            self._flush()
+            if self.lists:
+                kind = self.lists[-1]
+                if kind[0] == 'ol':
+                    self.marker = f'{kind[1]}. '
+                    kind[1] += 1
+                else:
+                    self.marker = '- '
+            self.paragraph_depth += 1
+        elif tag == 'blockquote':
+            self._flush()
+            self.quote_depth += 1
+        elif tag == 'cite' and self.quote_depth:
+            self._flush()
+            self.paragraph_depth += 1
+            self.inline.append('— ')
+        elif tag == 'pre':
+            self._flush()
+            self.pre_depth += 1
+            self.inline.append('```\n')
+        elif tag == 'code' and not self.pre_depth:
+            self.inline.append('`')
+        elif tag == 'hr':
+            self._raw_block('---')
+        elif tag == 'br':
+            self.inline.append('\n' if self.pre_depth else '\\\n')
+        elif tag in _EMPHASIS:
+            self.marks.append((tag, len(self.inline), None))
+        elif tag == 'a':
+            self.marks.append((tag, len(self.inline), attrs.get('href')))
+        elif tag == 'img':
+            src = attrs.get('src')
+            if src:
+                alt = escape_markdown(_WHITESPACE_RE.sub(' ', attrs.get('alt') or '').strip())
+                self.inline.append(f'![{alt}]({_link_target(src)})')
+        elif tag == 'iframe':
+            if attrs.get('src'):
+                self._raw_block(jsx_element('Embed', [('url', attrs['src'])]))
+        elif tag in ('div', 'figure', 'section', 'article', 'table', 'tr', 'dl'):
+            self._flush()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        if tag in _PARAGRAPH_TAGS:
+            if tag == 'figcaption':
+                self._close_mark(tag)
+            self._flush()
+            self.paragraph_depth = max(self.paragraph_depth - 1, 0)
+        elif tag in ('ul', 'ol'):
+            self._flush()
+            if self.lists:
+                self.lists.pop()
+            self.marker = None
+        elif tag == 'li':
+            self._flush()
+            self.paragraph_depth = max(self.paragraph_depth - 1, 0)
+            self.marker = None
+        elif tag == 'blockquote':
+            self._flush()
+            self.quote_depth = max(self.quote_depth - 1, 0)
+        elif tag == 'cite' and self.quote_depth:
+            self._flush()
+            self.paragraph_depth = max(self.paragraph_depth - 1, 0)
+        elif tag == 'pre':
+            self.inline.append('\n```')
+            self._flush()
+            self.pre_depth = max(self.pre_depth - 1, 0)
+        elif tag == 'code' and not self.pre_depth:
+            self.inline.append('`')
+        elif tag in _EMPHASIS or tag == 'a':
+            self._close_mark(tag)
+        elif tag in ('div', 'figure', 'section', 'article', 'table', 'tr', 'dl'):
+            self._flush()
+
+    def _close_mark(self, tag):
+        for index in range(len(self.marks) - 1, -1, -1):
+            if self.marks[index][0] == tag:
+                break
+        else:
+            return
+        _, start, extra = self.marks.pop(index)
+        del self.marks[index:]
+        content = ''.join(self.inline[start:])
+        stripped = content.strip()
+        del self.inline[start:]
+        if not stripped:
+            self.inline.append(content)
+            return
+        leading = ' ' if content[:1].isspace() else ''
+        trailing = ' ' if content[-1:].isspace() else ''
+        if tag == 'a':
+            wrapped = f'[{stripped}]({_link_target(extra)})' if extra else stripped
+        elif tag == 'figcaption':
+            wrapped = f'_{stripped}_'
+        else:
+            marker = _EMPHASIS[tag]
+            wrapped = f'{marker}{stripped}{marker}'
+        self.inline.append(leading + wrapped + trailing)
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.pre_depth:
+            self.inline.append(data)
+            return
+        if self.paragraph_depth:
+            self.inline.append(escape_markdown(data))
+            return
+        # Classic-editor text: blank lines are paragraphs, newlines are breaks
+        paragraphs = re.split(r'\n[ \t]*\n\s*', data)
+        for index, paragraph in enumerate(paragraphs):
+            if index:
+                self._flush()
+            lines = paragraph.split('\n')
+            for number, line in enumerate(lines):
+                if number and line.strip() and ''.join(self.inline).strip():
+                    self.inline.append('\\\n')
+                self.inline.append(escape_markdown(line) + (' ' if number < len(lines) - 1 else ''))
+
+
+def _link_target(url):
+    url = url.strip()
+    if re.search(r'[\s()<>]', url):
+        return '<' + url.replace('<', '%3C').replace('>', '%3E') + '>'
+    return url
+
+
+def html_to_markdown(content):
+    """Markdown (MDX-safe) for one post's WordPress content"""
+    blocks = _Blocks()
+    content = _replace_blocks(content or '', blocks)
+    content = _replace_shortcodes(content, blocks)
+    converter = _MarkdownConverter(blocks.items)
+    converter.feed(content)
+    return converter.markdown()
+
+
+def front_matter(record):
+    lines = ['---']
+    for field in FRONT_MATTER_FIELDS:
+        if field in record and record[field] is not None:
+            # JSON scalars and arrays are valid YAML
+            lines.append(f'{field}: {json.dumps(record[field], ensure_ascii=False)}')
+    lines.append('---')
+    return '\n'.join(lines) + '\n'
+
+
+def record_hash(record):
+    """Hash of everything a record's MDX is built from, plus the converter version"""
+    payload = {field: record.get(field) for field in ('content',) + FRONT_MATTER_FIELDS}
+    data = json.dumps([CONVERTER_VERSION, payload], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def output_relative(record):
+    """``posts/<slug>.mdx``, ``pages/<slug>.mdx``..."""
+    slug = record.get('slug') or str(record.get('id'))
+    kind = record.get('type') or 'post'
+    return f'{kind}s/{slug}.mdx'
+
+
+def convert_record(record):
+    """The MDX file for one record; runs in pool workers"""
+    body = html_to_markdown(record.get('content'))
+    return front_matter(record) + ('\n' + body if body else '')
+
+
+def _kind_dir(relative):
+    """``posts`` for ``posts/<slug>.mdx``"""
+    return relative.partition('/')[0]
+
+
+def _convert_task(task):
+    relative, digest, record = task
+    return relative, digest, convert_record(record)
+
+
+def load_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {'files': {}}
+    return manifest if isinstance(manifest.get('files'), dict) else {'files': {}}
+
+
+def save_manifest(manifest, output_dir):
+    path = Path(output_dir) / MANIFEST_NAME
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def convert_all(records, output_dir=OUTPUT_DIR, workers=1):
+    """
+    Write an MDX file per record, skipping those whose hash is unchanged
+
+    Files this function wrote for records that are gone are removed, but
+    only for the record types (``posts/``, ``pages/``...) converted in this
+    run: converting posts alone leaves earlier pages and their manifest
+    entries alone. Returns ``{'converted', 'unchanged', 'removed'}`` counts.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    previous = manifest['files']
+    current = {}
+    stats = {'converted': 0, 'unchanged': 0, 'removed': 0}
+
+    def tasks():
+        for record in records:
+            relative = output_relative(record)
+            digest = record_hash(record)
+            current[relative] = digest
+            if previous.get(relative) == digest and (output_dir / relative).exists():
+                stats['unchanged'] += 1
+                continue
+            yield relative, digest, record
+
+    for relative, digest, mdx in ordered_map(_convert_task, tasks(), workers, prefetch=8):
+        target = output_dir / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            fh.write(mdx)
+        os.replace(tmp_path, target)
+        stats['converted'] += 1
+
+    converted_kinds = {_kind_dir(relative) for relative in current}
+    for relative, digest in previous.items():
+        if relative in current:
+            continue
+        if _kind_dir(relative) in converted_kinds:
+            (output_dir / relative).unlink(missing_ok=True)
+            stats['removed'] += 1
+        else:
+            current[relative] = digest
+
+    manifest['files'] = current
+    save_manifest(manifest, output_dir)
+    return stats
+
+
+def main():
+    import argparse
+    import itertools
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Convert extracted WordPress posts and pages to MDX")
+    parser.add_argument("--input", action="append",
+                        help="Extracted posts/pages/post_documents file (.json or .jsonl, repeatable); "
+                             "default: posts.json and pages.json from extracted_data")
+    parser.add_argument("--output", default=str(OUTPUT_DIR), help="Directory the .mdx files are written to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Reconvert every record")
+    args = parser.parse_args()
+
+    inputs = args.input or [str(DATA_DIR / 'posts.json'), str(DATA_DIR / 'pages.json')]
+    for path in inputs:
+        if not Path(path).exists():
+            print(f"Error: File not found: {path}")
+            sys.exit(1)
+    if args.force:
+        (Path(args.output) / MANIFEST_NAME).unlink(missing_ok=True)
+
+    started = time.perf_counter()
+    records = itertools.chain.from_iterable(iter_records(path) for path in inputs)
+    stats = convert_all(records, args.output, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"  converted: {stats['converted']}, unchanged: {stats['unchanged']}, removed: {stats['removed']}")
+    print(f"✓ Wrote MDX to {args.output} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Content-addressed deduplication of public/uploads
+
+WordPress keeps every upload, so the same image dropped into two posts ends
+up twice under ``YYYY/MM``. Files are compared in three rounds, each only
+over the candidates the previous one left: equal size, then a hash of the
+first ``PARTIAL_SIZE`` bytes, then a full SHA-256. Hashing runs on a thread
+pool (hashlib releases the GIL on large buffers, and most of the time is
+spent in I/O anyway).
+
+Within each group of identical files the oldest upload is kept as the
+canonical copy: the earliest ``YYYY/MM`` directory, then the shortest name
+(WordPress renames a re-upload ``photo-1.jpg``). The result is a rewrite map
+from the URL of every duplicate to its canonical URL, which
+``rewrite_urls`` applies to post content.
+
+``--apply`` deletes the duplicates, but only once links point at the kept
+copies: ``url_rewrite_report.json`` must record this same map as applied,
+and duplicates still named by a ``_wp_attached_file`` in the extracted post
+meta (what ``media_pipeline`` and attachment links read) are kept.
+
+Usage: python3 -m scripts.media_dedup [--apply] [--workers N]
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from scripts.dump_cache import file_sha256
+from scripts.output_writer import find_output
+
+ROOT = Path(__file__).parent.parent
+UPLOADS_DIR = ROOT / 'public' / 'uploads'
+DATA_DIR = ROOT / 'extracted_data'
+REWRITES_PATH = DATA_DIR / 'media_rewrites.json'
+
+# URL prefix public/uploads is served under
+UPLOADS_URL = '/uploads/'
+
+PARTIAL_SIZE = 64 * 1024
+
+DEFAULT_WORKERS = 8
+
+# Not media; never deduplicated
+SKIP_SUFFIXES = ('.php', '.html', '.htaccess', '.json')
+
+
+def partial_sha256(path, size=PARTIAL_SIZE):
+    """SHA-256 of the first ``size`` bytes of a file"""
+    with open(path, 'rb') as fh:
+        return hashlib.sha256(fh.read(size)).hexdigest()
+
+
+def iter_files(uploads_dir=UPLOADS_DIR):
+    """Yield ``(relative path, size)`` for every media file under ``uploads_dir``"""
+    uploads_dir = Path(uploads_dir)
+    for dirpath, dirnames, filenames in os.walk(uploads_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(SKIP_SUFFIXES):
+                continue
+            path = Path(dirpath) / filename
+            yield path.relative_to(uploads_dir).as_posix(), path.stat().st_size
+
+
+def _refine(groups, key, uploads_dir, pool):
+    """Split each group by ``key(path)``, keeping only sub-groups with 2+ members"""
+    candidates = [relative for group in groups for relative in group]
+    keys = pool.map(lambda relative: key(Path(uploads_dir) / relative), candidates)
+    split = defaultdict(list)
+    for relative, value in zip(candidates, keys):
+        split[value].append(relative)
+    return [group for group in split.values() if len(group) > 1]
+
+
+def canonical_order(relative):
+    """Sort key putting the original upload before its copies"""
+    return posixpath.dirname(relative), len(relative), relative
+
+
+def find_duplicates(uploads_dir=UPLOADS_DIR, workers=DEFAULT_WORKERS, stats=None):
+    """
+    Return groups of byte-identical files, each sorted with its canonical
+    copy first
+
+    ``stats``, if given, gets the number of files seen and hashed per round.
+    """
+    by_size = defaultdict(list)
+    for relative, size in iter_files(uploads_dir):
+        # Empty files are all "identical" but not worth merging
+        if size:
+            by_size[size].append(relative)
+    groups = [group for group in by_size.values() if len(group) > 1]
+    if stats is not None:
+        stats['files'] = sum(len(group) for group in by_size.values())
+        stats['same_size'] = sum(len(group) for group in groups)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        groups = _refine(groups, partial_sha256, uploads_dir, pool)
+        if stats is not None:
+            stats['full_hashed'] = sum(len(group) for group in groups)
+        groups = _refine(groups, file_sha256, uploads_dir, pool)
+
+    return sorted(sorted(group, key=canonical_order) for group in groups)
+
+
+def rewrite_map(groups, url_prefix=UPLOADS_URL):
+    """``{duplicate URL: canonical URL}`` for the groups from ``find_duplicates``"""
+    rewrites = {}
+    for canonical, *duplicates in groups:
+        for duplicate in duplicates:
+            rewrites[f'{url_prefix}{duplicate}'] = f'{url_prefix}{canonical}'
+    return rewrites
+
+
+def save_rewrites(rewrites, path=REWRITES_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(rewrites, fh, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def rewrites_applied(rewrites_path, report_path):
+    """Whether ``rewrite_urls`` last ran with the map now at ``rewrites_path``"""
+    try:
+        with open(report_path, encoding='utf-8') as fh:
+            applied = json.load(fh).get('media_rewrites_sha256')
+    except (OSError, ValueError, AttributeError):
+        return False
+    return applied is not None and applied == file_sha256(rewrites_path)
+
+
+def remove_duplicates(groups, uploads_dir=UPLOADS_DIR, keep=()):
+    """Delete every non-canonical copy not in ``keep``; returns the bytes freed"""
+    freed = 0
+    for _, *duplicates in groups:
+        for duplicate in duplicates:
+            if duplicate in keep:
+                continue
+            path = Path(uploads_dir) / duplicate
+            freed += path.stat().st_size
+            path.unlink()
+    return freed
+
+
+def main():
+    import argparse
+    import sys
+    import time
+
+    from scripts.media_pipeline import referenced_files
+    from scripts.rewrite_urls import ATTACHED_FILE_KEY, REPORT_NAME
+
+    parser = argparse.ArgumentParser(description="Find duplicate uploads and write an old URL -> canonical URL map")
+    parser.add_argument("--uploads", default=str(UPLOADS_DIR), help="Uploads directory")
+    parser.add_argument("--output", default=str(REWRITES_PATH), help="Where the rewrite map is written")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Hashing threads")
+    parser.add_argument("--data-dir", default=str(DATA_DIR),
+                        help="Extracted data with post_meta and the rewrite_urls report, checked by --apply")
+    parser.add_argument("--apply", action="store_true",
+                        help="Delete the duplicates, once rewrite_urls has applied this map")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    stats = {}
+    groups = find_duplicates(args.uploads, args.workers, stats)
+    rewrites = rewrite_map(groups)
+    save_rewrites(rewrites, args.output)
+    elapsed = time.perf_counter() - started
+
+    wasted = sum(
+        (Path(args.uploads) / duplicate).stat().st_size
+        for _, *duplicates in groups
+        for duplicate in duplicates
+    )
+    print(f"  files: {stats['files']}, same size: {stats['same_size']}, fully hashed: {stats['full_hashed']}")
+    print(f"  duplicate groups: {len(groups)}, redundant copies: {len(rewrites)} ({wasted / 1e6:.1f} MB)")
+    for canonical, *duplicates in groups[:10]:
+        print(f"    {canonical} <- {', '.join(duplicates)}")
+    print(f"✓ Saved {len(rewrites)} rewrites to {args.output} in {elapsed:.2f}s")
+
+    if args.apply and rewrites:
+        if not rewrites_applied(args.output, Path(args.data_dir) / REPORT_NAME):
+            print(f"Error: {args.output} has not been applied yet; run python3 -m scripts.rewrite_urls, "
+                  f"then --apply again")
+            sys.exit(1)
+        try:
+            post_meta = find_output(args.data_dir, 'post_meta')
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        attached = referenced_files(post_meta) if post_meta is not None else set()
+        kept = {duplicate for _, *duplicates in groups for duplicate in duplicates if duplicate in attached}
+        freed = remove_duplicates(groups, args.uploads, kept)
+        if kept:
+            print(f"  kept {len(kept)} duplicates still named by {ATTACHED_FILE_KEY}")
+        print(f"✓ Removed {len(rewrites) - len(kept)} duplicates, freed {freed / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
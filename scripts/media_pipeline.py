@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Media pipeline for public/uploads: inventory, content hashes and responsive
+WebP variants
+
+Walks the uploads tree, keeps the originals referenced by a
+``_wp_attached_file`` meta row (or every original with ``--all``), hashes
+each one and renders WebP copies at a few widths on a process pool. Results
+go to ``manifest.json`` in the output directory, keyed by content hash:
+
+    {"images": {"<sha256>": {"source", "width", "height", "variants": [...]}},
+     "files": {"2018/11/a.jpg": {"size", "mtime_ns", "sha256"}}}
+
+Variant paths are derived from the hash, so a file whose size and mtime are
+unchanged since the last run is neither re-hashed nor re-rendered, and two
+uploads with the same bytes share one set of variants.
+
+Rendering needs the optional ``Pillow`` package; without it the inventory and
+hashes are still written.
+
+Usage: python3 -m scripts.media_pipeline [--workers N] [--widths 480,960,1600] [--all]
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+
+from scripts.dump_cache import file_sha256
+from scripts.output_writer import find_output, iter_records
+from scripts.parallel import ordered_map
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+ROOT = Path(__file__).parent.parent
+UPLOADS_DIR = ROOT / 'public' / 'uploads'
+MEDIA_DIR = ROOT / 'public' / 'media'
+DATA_DIR = ROOT / 'extracted_data'
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+DEFAULT_WIDTHS = (480, 960, 1600)
+DEFAULT_QUALITY = 80
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# Formats Pillow can resize without losing anything (animated GIFs would)
+RENDERABLE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Sizes WordPress generates next to an original: name-300x200.jpg
+SIZE_VARIANT_RE = re.compile(r'-\d+x\d+$')
+
+
+def is_size_variant(path):
+    return bool(SIZE_VARIANT_RE.search(Path(path).stem))
+
+
+def iter_uploads(uploads_dir=UPLOADS_DIR):
+    """Yield the path (relative to ``uploads_dir``) of every original image"""
+    uploads_dir = Path(uploads_dir)
+    for dirpath, dirnames, filenames in os.walk(uploads_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = Path(dirpath) / filename
+            if path.suffix.lower() in IMAGE_SUFFIXES and not is_size_variant(path):
+                yield path.relative_to(uploads_dir).as_posix()
+
+
+def referenced_files(post_meta_path):
+    """``_wp_attached_file`` values from extracted post meta, in any ``output_writer`` format"""
+    return {row['meta_value'] for row in iter_records(post_meta_path) if row.get('meta_key') == '_wp_attached_file'}
+
+
+def variant_path(digest, width):
+    """Where a variant lives, relative to the media directory"""
+    return f'{digest[:2]}/{digest[:16]}-{width}w.webp'
+
+
+def load_manifest(media_dir=MEDIA_DIR):
+    try:
+        with open(Path(media_dir) / MANIFEST_NAME, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION, 'images': {}, 'files': {}}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'images': {}, 'files': {}}
+    return manifest
+
+
+def save_manifest(manifest, media_dir=MEDIA_DIR):
+    path = Path(media_dir) / MANIFEST_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _render(source, digest, media_dir, widths, quality):
+    """Write the missing WebP variants of one image; returns ``(width, height, variants)``"""
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        # Always one full-size WebP, plus every smaller configured width
+        targets = sorted({w for w in widths if w < width} | {width})
+        variants = []
+        for target_width in targets:
+            target_height = max(1, round(height * target_width / width))
+            relative = variant_path(digest, target_width)
+            target = Path(media_dir) / relative
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                resized = image if target_width == width else image.resize((target_width, target_height), Image.LANCZOS)
+                # Per-process temp name: identical uploads may render in parallel
+                tmp_path = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+                resized.save(tmp_path, 'WEBP', quality=quality, method=4)
+                os.replace(tmp_path, target)
+            variants.append({'width': target_width, 'height': target_height, 'path': relative})
+    return width, height, variants
+
+
+def process_image(task):
+    """
+    Hash one upload and render its variants; runs in pool workers
+
+    ``task`` is ``(uploads dir, relative path, known sha256 or None, media
+    dir, widths, quality, render)``. Returns the manifest data for the file.
+    """
+    uploads_dir, relative, digest, media_dir, widths, quality, render = task
+    source = Path(uploads_dir) / relative
+    stat = source.stat()
+    if digest is None:
+        digest = file_sha256(source)
+    entry = {'relative': relative, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest, 'image': None}
+    if render and source.suffix.lower() in RENDERABLE_SUFFIXES:
+        try:
+            width, height, variants = _render(source, digest, media_dir, widths, quality)
+        except (OSError, ValueError) as e:
+            entry['error'] = str(e)
+        else:
+            entry['image'] = {'source': relative, 'width': width, 'height': height, 'variants': variants}
+    return entry
+
+
+def _variants_done(image, media_dir, widths):
+    """True if the manifest entry has every variant the current widths call for"""
+    if image is None:
+        return False
+    expected = {w for w in widths if w < image['width']} | {image['width']}
+    have = {variant['width'] for variant in image['variants']}
+    return expected <= have and all((Path(media_dir) / v['path']).exists() for v in image['variants'])
+
+
+def run(uploads_dir=UPLOADS_DIR, media_dir=MEDIA_DIR, widths=DEFAULT_WIDTHS, quality=DEFAULT_QUALITY,
+        referenced=None, workers=1):
+    """
+    Update the manifest for the uploads in ``referenced`` (all if None)
+
+    Returns ``(manifest, stats)``.
+    """
+    manifest = load_manifest(media_dir)
+    files = manifest['files']
+    images = manifest['images']
+    render = Image is not None
+    stats = {'files': 0, 'hashed': 0, 'rendered': 0, 'unchanged': 0, 'failed': 0, 'missing': []}
+
+    if referenced is None:
+        found = set(iter_uploads(uploads_dir))
+    else:
+        found = {relative for relative in referenced if (Path(uploads_dir) / relative).is_file()}
+        stats['missing'] = sorted(set(referenced) - found)
+
+    tasks = []
+    for relative in sorted(found):
+        stats['files'] += 1
+        stat = (Path(uploads_dir) / relative).stat()
+        known = files.get(relative)
+        digest = None
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            digest = known['sha256']
+            renderable = relative.lower().endswith(RENDERABLE_SUFFIXES)
+            if not render or not renderable or _variants_done(images.get(digest), media_dir, widths):
+                stats['unchanged'] += 1
+                continue
+        tasks.append((str(uploads_dir), relative, digest, str(media_dir), tuple(widths), quality, render))
+
+    for entry in ordered_map(process_image, tasks, workers, prefetch=4):
+        relative = entry['relative']
+        files[relative] = {'size': entry['size'], 'mtime_ns': entry['mtime_ns'], 'sha256': entry['sha256']}
+        stats['hashed'] += 1
+        if entry.get('error'):
+            stats['failed'] += 1
+        elif entry['image'] is not None:
+            stats['rendered'] += 1
+            # Identical bytes uploaded twice keep the first source path
+            image = images.setdefault(entry['sha256'], entry['image'])
+            image['variants'] = entry['image']['variants']
+
+    # Forget files that disappeared from the tree
+    for relative in list(files):
+        if not (Path(uploads_dir) / relative).exists():
+            del files[relative]
+    live = {entry['sha256'] for entry in files.values()}
+    for digest in list(images):
+        if digest not in live:
+            del images[digest]
+
+    save_manifest(manifest, media_dir)
+    return manifest, stats
+
+
+def main():
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Hash public/uploads and render responsive WebP variants")
+    parser.add_argument("--uploads", default=str(UPLOADS_DIR), help="Uploads directory")
+    parser.add_argument("--out", default=str(MEDIA_DIR), help="Where variants and manifest.json go")
+    parser.add_argument("--post-meta", help=f"Extracted post meta (default: post_meta in {DATA_DIR}, any format)")
+    parser.add_argument("--all", action="store_true", help="Process every original, not only referenced ones")
+    parser.add_argument("--widths", default=','.join(map(str, DEFAULT_WIDTHS)), help="Variant widths in pixels")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="WebP quality")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    args = parser.parse_args()
+
+    referenced = None
+    if not args.all:
+        try:
+            post_meta = Path(args.post_meta) if args.post_meta else find_output(DATA_DIR, 'post_meta')
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if post_meta is None or not post_meta.exists():
+            print(f"Error: {args.post_meta or 'post_meta'} not found; run extract-all-wordpress-data.py or pass --all")
+            sys.exit(1)
+        referenced = referenced_files(post_meta)
+    if Image is None:
+        print("Pillow is not installed: hashing only, no variants (pip install Pillow)")
+
+    widths = [int(w) for w in args.widths.split(',') if w]
+    started = time.perf_counter()
+    manifest, stats = run(args.uploads, args.out, widths, args.quality, referenced, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"  files: {stats['files']} ({stats['unchanged']} unchanged, {stats['hashed']} hashed, "
+          f"{stats['rendered']} rendered, {stats['failed']} failed)")
+    print(f"  unique images: {len(manifest['images'])}")
+    if stats['missing']:
+        print(f"  referenced but missing from uploads: {len(stats['missing'])}")
+        for relative in stats['missing'][:10]:
+            print(f"    - {relative}")
+    print(f"✓ Wrote {Path(args.out) / MANIFEST_NAME} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
 // Migration Script: Posts from JSON to Supabase
 import { createClient } from '@supabase/supabase-js';
+import { createReadStream, existsSync } from 'fs';
 import { readFile } from 'fs/promises';
+import { createInterface } from 'readline';
+import { createGunzip } from 'zlib';
 import { join, dirname } from 'path';
 import { fileURLToPath } from 'url';
 import 'dotenv/config';
@@ -18,17 +21,61 @@ if (!supabaseUrl || !supabaseServiceKey) {
 
 const supabase = createClient(supabaseUrl, supabaseServiceKey);
 
+// Yield the records of a JSON Lines file (optionally gzipped) one line at a time
+async function* readJsonLines(path) {
+  let input = createReadStream(path);
+  if (path.endsWith('.gz')) input = input.pipe(createGunzip());
+  const lines = createInterface({ input, crlfDelay: Infinity });
+  for await (const line of lines) {
+    if (line.trim()) yield JSON.parse(line);
+  }
+}
+
+// Yield posts from extracted_data, streaming JSON Lines output
+// (extract-all-wordpress-data.py --format jsonl [--compress gzip]) one line
+// at a time and falling back to the posts.json array
+async function* loadPosts(dataDir) {
+  for (const name of ['posts.jsonl', 'posts.jsonl.gz']) {
+    const path = join(dataDir, name);
+    if (!existsSync(path)) continue;
+    console.log(`   Streaming ${name}`);
+    for await (const post of readJsonLines(path)) {
+      yield { op: 'insert', post };
+    }
+    return;
+  }
+  const postsContent = await readFile(join(dataDir, 'posts.json'), 'utf-8');
+  for (const post of JSON.parse(postsContent)) {
+    yield { op: 'insert', post };
+  }
+}
+
+// Yield blog post changes from a changeset written by scripts/dump_delta.py
+async function* loadChangeset(path) {
+  console.log(`   Applying changeset ${path}`);
+  for await (const change of readJsonLines(path)) {
+    if (change.table !== 'posts') continue;
+    // Deletes need the slug to find the Supabase row; changesets written
+    // before dump_delta stored it may only have the key
+    if (change.op === 'delete' && !change.record?.slug) {
+      throw new Error(`Delete of post ${change.key} in ${path} has no slug; regenerate the changeset with scripts/dump_delta.py`);
+    }
+    if (!change.record || change.record.type !== 'post') continue;
+    // A renamed post carries its old slug, which is how the row is found
+    yield { op: change.op, post: change.record, previousSlug: change.previous?.slug };
+  }
+}
+
 async function migrate() {
   console.log('========================================');
   console.log('Post Migration: JSON → Supabase');
   console.log('========================================\n');
 
-  // 1. Load posts from JSON
-  console.log('📁 Loading posts from JSON...');
-  const postsPath = join(projectRoot, 'extracted_data', 'posts.json');
-  const postsContent = await readFile(postsPath, 'utf-8');
-  const posts = JSON.parse(postsContent);
-  console.log(`   Found ${posts.length} posts\n`);
+  // 1. Posts are read from extracted_data while migrating, or only the
+  // changes since the last backup with --changeset <file>
+  const dataDir = join(projectRoot, 'extracted_data');
+  const changesetFlag = process.argv.indexOf('--changeset');
+  const changesetPath = changesetFlag === -1 ? null : process.argv[changesetFlag + 1];
 
   // 2. Check existing posts in Supabase
   console.log('🔍 Checking existing posts in Supabase...');
@@ -70,15 +117,33 @@ async function migrate() {
   console.log(`📂 Default category_id: ${defaultCategoryId}\n`);
 
   // 5. Migrate posts
-  console.log('🚀 Starting migration...\n');
+  console.log('🚀 Starting migration...');
+  console.log('📁 Loading posts from extracted_data...\n');
 
+  let total = 0;
   let migrated = 0;
+  let deleted = 0;
   let skipped = 0;
   let failed = 0;
 
-  for (const post of posts) {
-    // Skip if already exists
-    if (existingSlugs.has(post.slug)) {
+  const source = changesetPath ? loadChangeset(changesetPath) : loadPosts(dataDir);
+  for await (const { op, post, previousSlug } of source) {
+    total++;
+
+    if (op === 'delete') {
+      const { error } = await supabase.from('blog_posts').delete().eq('slug', post.slug);
+      if (error) {
+        console.log(`   ❌ Failed to delete: ${post.slug} - ${error.message}`);
+        failed++;
+      } else {
+        console.log(`   🗑️  Deleted: ${post.slug}`);
+        deleted++;
+      }
+      continue;
+    }
+
+    // Skip if already exists; updates overwrite the existing row
+    if (op === 'insert' && existingSlugs.has(post.slug)) {
       console.log(`   ⏭️  Skipped (exists): ${post.slug}`);
       skipped++;
       continue;
@@ -100,11 +165,23 @@ async function migrate() {
     };
 
     try {
-      const { data, error } = await supabase
-        .from('blog_posts')
-        .insert(transformedPost)
-        .select()
-        .single();
+      // Blog rows are keyed by slug; when the slug changed, update the row
+      // under the old one in place instead of upserting a second row
+      let renamed = null;
+      if (op === 'update' && previousSlug && previousSlug !== post.slug) {
+        renamed = await supabase
+          .from('blog_posts')
+          .update(transformedPost)
+          .eq('slug', previousSlug)
+          .select();
+      }
+      const table = supabase.from('blog_posts');
+      const query = op === 'update'
+        ? table.upsert(transformedPost, { onConflict: 'slug' })
+        : table.insert(transformedPost);
+      const { data, error } = renamed && (renamed.error || renamed.data?.length)
+        ? renamed
+        : await query.select().single();
 
       if (error) {
         console.log(`   ❌ Failed: ${post.slug} - ${error.message}`);
@@ -124,9 +201,10 @@ async function migrate() {
   console.log('Migration Complete!');
   console.log('========================================');
   console.log(`✅ Migrated: ${migrated}`);
+  console.log(`🗑️  Deleted:  ${deleted}`);
   console.log(`⏭️  Skipped:  ${skipped}`);
   console.log(`❌ Failed:   ${failed}`);
-  console.log(`📊 Total:    ${posts.length}`);
+  console.log(`📊 Total:    ${total}`);
 
   // 7. Verify
   console.log('\n🔍 Verifying...');
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Writers for the files in extracted_data
+
+``RecordWriter`` streams records to disk as they are parsed instead of
+collecting them in a list first. JSON Lines output writes one compact record
+per line; ``json`` output keeps the indented array the site scripts expect,
+written element by element. Both can be gzip- or zstd-compressed (zstd needs
+the ``zstandard`` package) and land in a temporary file that is renamed into
+place only once the writer closes cleanly, so a crashed run never leaves a
+truncated file behind. ``parquet`` output is handled by ``columnar``.
+"""
+
+import gzip
+import io
+import json
+import os
+from pathlib import Path
+
+FORMATS = ('json', 'jsonl', 'parquet')
+
+# Compression name -> file suffix
+COMPRESSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def output_path(directory, name, fmt='json', compress='none'):
+    """``<directory>/<name>.<fmt>[.gz|.zst]``; Parquet compresses internally"""
+    suffix = '' if fmt == 'parquet' else COMPRESSIONS[compress]
+    return Path(directory) / f'{name}.{fmt}{suffix}'
+
+
+def missing_package(fmt='json', compress='none'):
+    """Name of the optional package ``fmt``/``compress`` needs, or None"""
+    if fmt == 'parquet':
+        from scripts.columnar import available
+        if not available():
+            return 'pyarrow'
+    elif compress == 'zstd':
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            return 'zstandard'
+    return None
+
+
+def open_writer(path, fmt='json', compress='none', table=None):
+    """
+    Writer for ``fmt``; ``table`` names the wp_schema table the records come
+    from, which Parquet output uses for column types
+    """
+    if fmt == 'parquet':
+        from scripts.columnar import ColumnarWriter
+        return ColumnarWriter(path, table, compress)
+    return RecordWriter(path, fmt, compress)
+
+
+def detect_format(path):
+    """``(format, compression)`` of a file named by ``output_path``"""
+    name = Path(path).name
+    compress = 'none'
+    for candidate, suffix in COMPRESSIONS.items():
+        if suffix and name.endswith(suffix):
+            compress = candidate
+            name = name[:-len(suffix)]
+    fmt = name.rsplit('.', 1)[-1]
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {path}")
+    return fmt, compress
+
+
+def find_output(directory, name, formats=FORMATS):
+    """
+    The file ``output_path`` gives for ``name`` in any of ``formats``, or None
+
+    Raises ValueError when more than one exists (e.g. a stale ``posts.json``
+    next to ``posts.jsonl.gz``), since there is no telling which is current.
+    """
+    found = []
+    for fmt in formats:
+        for compress in (('none',) if fmt == 'parquet' else COMPRESSIONS):
+            path = output_path(directory, name, fmt, compress)
+            if path.exists():
+                found.append(path)
+    if len(found) > 1:
+        names = ', '.join(path.name for path in found)
+        raise ValueError(f"Several extracted {name} files in {directory} ({names}); remove the stale ones")
+    return found[0] if found else None
+
+
+def iter_records(path):
+    """Yield the records of a file written by ``RecordWriter`` or ``ColumnarWriter``"""
+    fmt, compress = detect_format(path)
+    if fmt == 'parquet':
+        from scripts.columnar import iter_records as iter_parquet
+        yield from iter_parquet(path)
+        return
+    if compress == 'gzip':
+        raw = gzip.open(path, 'rb')
+    elif compress == 'zstd':
+        import zstandard
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    else:
+        raw = open(path, 'rb')
+    with io.TextIOWrapper(raw, encoding='utf-8') as fh:
+        if fmt == 'jsonl':
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(fh)
+
+
+def _open_binary(path, compress):
+    if compress == 'gzip':
+        return gzip.open(path, 'wb', compresslevel=6)
+    if compress == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd output needs the 'zstandard' package (pip install zstandard)") from None
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'), closefd=True)
+    return open(path, 'wb')
+
+
+class RecordWriter:
+    """
+    Write records to ``path`` one at a time
+
+    Use as a context manager: the file is only moved into place when the
+    block exits without an exception; otherwise the partial file is removed.
+    ``count`` is the number of records written so far.
+    """
+
+    def __init__(self, path, fmt='jsonl', compress='none'):
+        if fmt not in ('json', 'jsonl'):
+            raise ValueError(f"Unknown format: {fmt}")
+        if compress not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compress}")
+        self.path = Path(path)
+        self.fmt = fmt
+        self.count = 0
+        self._tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self._fh = io.TextIOWrapper(_open_binary(self._tmp_path, compress), encoding='utf-8', newline='\n')
+        if fmt == 'json':
+            self._fh.write('[')
+
+    def write(self, record):
+        if self.fmt == 'jsonl':
+            self._fh.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            self._fh.write('\n')
+        else:
+            # Same layout as json.dump(records, indent=2) without holding the list
+            item = json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+            self._fh.write(',\n  ' if self.count else '\n  ')
+            self._fh.write(item)
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self
+
+    def close(self):
+        """Finish the file and rename it into place"""
+        if self._fh is None:
+            return
+        if self.fmt == 'json':
+            self._fh.write('\n]' if self.count else ']')
+        self._fh.close()
+        self._fh = None
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Drop the partial file"""
+        if self._fh is None:
+            return
+        try:
+            self._fh.close()
+        finally:
+            self._fh = None
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Helpers for fanning row decoding out to a process pool
+
+Rows are grouped into batches so each task is worth the pickling cost, and
+results come back in submission order so output stays deterministic.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def batched(iterable, size=DEFAULT_BATCH_SIZE):
+    """Yield lists of up to ``size`` items"""
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def ordered_map(fn, iterable, workers, prefetch=2):
+    """
+    Like ``map(fn, iterable)`` but across ``workers`` processes
+
+    Only ``workers * prefetch`` tasks are in flight at a time, so a streaming
+    input is never pulled into memory all at once. Results keep input order.
+    With ``workers <= 1`` everything runs in the current process.
+    """
+    if workers <= 1:
+        yield from map(fn, iterable)
+        return
+    limit = workers * prefetch
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for item in iterable:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,168 +1,178 @@
 #!/usr/bin/env python3
-import re
 from pathlib import Path
 
+from scripts.dump_cache import load_cached, store_cached
+from scripts.dump_index import find_rows
+from scripts.sqldump import iter_rows, iter_value_spans, map_dump
+from scripts.sqlite_export import column_types, select_rows
+from scripts.wp_schema import text
+
 SQL_PATH = Path('backup-1.5.2026_09-05-37_womanao0/mysql/womanao0_WP3YO.sql')
 
+# Bump when parse_posts output changes so cached results are discarded
+CACHE_NAME = 'posts'
+CACHE_VERSION = 2
+
+# Columns needed to list posts; decoding stops there when read through mmap
+LISTING_COLUMNS = ('ID', 'post_title', 'post_name', 'post_date')
+LISTING_WHERE = {'post_type': 'post', 'post_status': ('publish', 'private')}
 
-def iter_insert_blocks(text: str):
-    marker = "INSERT INTO `_3YO_posts`"
-    idx = 0
-    while True:
-        start = text.find(marker, idx)
-        if start == -1:
-            break
-        i = start
-        in_str = False
-        quote = ''
-        while i < len(text):
-            ch = text[i]
-            if in_str:
-                if ch == '\\':
-                    i += 2
-                    continue
-                if ch == quote:
-                    in_str = False
-                i += 1
-                continue
-            if ch in ("'", '"'):
-                in_str = True
-                quote = ch
-                i += 1
-                continue
-            if ch == ';':
-                yield text[start:i]
-                idx = i + 1
-                break
-            i += 1
-        else:
-            break
-
-
-def parse_rows(block: str):
-    rows = []
-    depth = 0
-    in_str = False
-    quote = ''
-    start = None
-    i = 0
-    while i < len(block):
-        ch = block[i]
-        if in_str:
-            if ch == '\\':
-                i += 2
-                continue
-            if ch == quote:
-                in_str = False
-            i += 1
-            continue
-        if ch in ("'", '"'):
-            in_str = True
-            quote = ch
-            i += 1
-            continue
-        if ch == '(':
-            if depth == 0:
-                start = i + 1
-            depth += 1
-        elif ch == ')':
-            depth -= 1
-            if depth == 0 and start is not None:
-                rows.append(block[start:i])
-        i += 1
-    return rows
-
-
-def split_row(row: str):
-    values = []
-    cur = ''
-    in_str = False
-    quote = ''
-    i = 0
-    while i < len(row):
-        ch = row[i]
-        if in_str:
-            if ch == '\\':
-                cur += ch
-                i += 1
-                if i < len(row):
-                    cur += row[i]
-                    i += 1
-                continue
-            if ch == quote:
-                in_str = False
-                cur += ch
-                i += 1
-                continue
-            cur += ch
-            i += 1
-            continue
-        if ch in ("'", '"'):
-            in_str = True
-            quote = ch
-            cur += ch
-            i += 1
-            continue
-        if ch == ',':
-            values.append(cur.strip())
-            cur = ''
-            i += 1
-            continue
-        cur += ch
-        i += 1
-    values.append(cur.strip())
-    return values
 
+# Converter per column, as sqlite_export stores them, so the dump and a
+# database built from it return the same values
+POST_TYPES = column_types('posts')
 
-def strip_value(value: str):
-    if not value:
-        return value
-    if value.upper() == 'NULL':
+
+def decode_value(column: str, value: str):
+    if len(value) == 4 and value.upper() == 'NULL':
         return None
-    if value[0] in ("'", '"') and value[-1] == value[0]:
-        inner = value[1:-1]
-        inner = inner.replace("\\'", "'")
-        inner = inner.replace('\\"', '"')
-        inner = inner.replace('\\\\', '\\')
-        return inner
-    return value
+    return POST_TYPES.get(column, text)(value)
+
+
+def decode_row(cols, values):
+    return {cols[i]: decode_value(cols[i], values[i]) for i in range(len(cols))}
+
 
+def parse_posts(debug: bool = False, use_cache: bool = True, columns=None, where=None):
+    """
+    Parse `_3YO_posts` into ``{ID: {column: value}}``
 
-def parse_posts(debug: bool = False):
-    text = SQL_PATH.read_text(encoding='utf-8', errors='ignore')
+    With ``columns`` and/or ``where`` the rows are read from an mmap of the
+    dump and filtered before anything else is decoded; see ``query_posts``.
+    """
+    if columns is not None or where is not None:
+        posts = query_posts(columns, where)
+        if debug:
+            print(f"[DEBUG] {len(posts)} `_3YO_posts` rows matched {where or {}}")
+        return posts
+    if use_cache:
+        posts = load_cached(SQL_PATH, CACHE_NAME, CACHE_VERSION)
+        if posts is not None:
+            if debug:
+                print(f"[DEBUG] loaded {len(posts)} posts from cache")
+            return posts
     posts = {}
-    blocks = list(iter_insert_blocks(text))
+    rows = 0
+    for _, cols, values in iter_rows(SQL_PATH, tables={'_3YO_posts'}):
+        rows += 1
+        if cols is None or len(values) != len(cols):
+            if debug and rows < 3:
+                print(f"[WARN] row length {len(values)} vs cols {len(cols or ())}")
+            continue
+        entry = decode_row(cols, values)
+        posts[entry['ID']] = entry
     if debug:
-        print(f"[DEBUG] found {len(blocks)} `_3YO_posts` inserts")
-    for idx_block, stmt in enumerate(blocks):
-        match = re.search(r"INSERT INTO `_3YO_posts`\s*\((.*?)\)\s*VALUES\s*(.*)", stmt, re.S)
-        if not match:
+        print(f"[DEBUG] streamed {rows} `_3YO_posts` rows")
+    if use_cache:
+        store_cached(SQL_PATH, CACHE_NAME, posts, CACHE_VERSION)
+    return posts
+
+
+def decode_view(column, view):
+    return decode_value(column, str(view, 'utf-8', 'ignore'))
+
+
+def _literal_forms(value):
+    """The raw spellings mysqldump may use for ``value``"""
+    text = str(value)
+    escaped = text.replace('\\', '\\\\').replace("'", "\\'")
+    forms = {f"'{escaped}'".encode('utf-8')}
+    if isinstance(value, int):
+        forms.add(text.encode('ascii'))
+    return forms
+
+
+def _compile_where(where):
+    """
+    Turn ``{column: expected}`` into ``(column, raw forms, predicate)`` checks
+
+    ``expected`` may be a value, a tuple/list/set of values (membership) or a
+    callable taking the decoded value. Plain values are matched against the
+    raw literal bytes, so filtered-out rows are never decoded at all.
+    """
+    checks = []
+    for name, expected in where.items():
+        if callable(expected):
+            checks.append((name, None, expected))
             continue
-        cols = [col.strip(' `') for col in match.group(1).split(',')]
-        values_block = match.group(2)
-        rows = parse_rows(values_block)
-        if debug:
-            print(f"[DEBUG] block {idx_block} rows={len(rows)}")
-        for idx, row in enumerate(rows):
-            values = split_row(row)
-            if len(values) != len(cols):
-                if debug and idx < 2:
-                    print(f"[WARN] row length {len(values)} vs cols {len(cols)}")
+        if not isinstance(expected, (list, tuple, set, frozenset)):
+            expected = (expected,)
+        forms = set()
+        for value in expected:
+            forms |= _literal_forms(value)
+        checks.append((name, forms, None))
+    return checks
+
+
+def query_posts(columns=None, where=None):
+    """
+    Return ``{ID: {column: value}}`` for posts matching ``where``
+
+    Predicate columns are checked first, on raw bytes of an mmap of the dump;
+    only rows that pass have their ``columns`` (default: all) sliced out and
+    unescaped. Revisions, attachments and menu items are skipped without
+    touching their ``post_content``.
+    """
+    checks = _compile_where(where or {})
+    posts = {}
+    with map_dump(SQL_PATH) as mapped:
+        view = memoryview(mapped)
+        last_cols = None
+        for _, cols, spans in iter_value_spans(mapped, tables={'_3YO_posts'}):
+            if cols is None or len(spans) != len(cols):
                 continue
-            entry = {cols[i]: strip_value(values[i]) for i in range(len(cols))}
-            posts[int(entry['ID'])] = entry
+            if cols is not last_cols:
+                last_cols = cols
+                plan = [(name, cols.index(name), forms, predicate) for name, forms, predicate in checks]
+                wanted = cols if columns is None else columns
+                output = [(name, cols.index(name)) for name in wanted]
+                id_index = cols.index('ID')
+            matched = True
+            for name, index, forms, predicate in plan:
+                start, end = spans[index]
+                if forms is not None:
+                    matched = mapped[start:end] in forms
+                else:
+                    matched = predicate(decode_view(name, view[start:end]))
+                if not matched:
+                    break
+            if not matched:
+                continue
+            start, end = spans[id_index]
+            posts[int(mapped[start:end].strip(b"'"))] = {
+                name: decode_view(name, view[spans[index][0]:spans[index][1]]) for name, index in output
+            }
+        view.release()
     return posts
 
 
+def get_post(post_id: int, db=None):
+    """
+    Look up a single post through the dump index instead of parsing every row,
+    or by primary key in a database built with ``sqlite_export``
+    """
+    if db is not None:
+        rows = select_rows(db, 'posts', where={'ID': post_id})
+        return rows[0] if rows else None
+    for cols, values in find_rows(SQL_PATH, '_3YO_posts', post_id):
+        if cols is not None and len(values) == len(cols):
+            return decode_row(cols, values)
+    return None
+
+
 def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="Inspect _3YO_posts content")
     parser.add_argument("--debug", action="store_true", help="Show debug output")
+    parser.add_argument("--db", help="Query a SQLite database from sqlite_export instead of the dump")
     args = parser.parse_args()
 
-    posts = parse_posts(debug=args.debug)
-    filtered = [p for p in posts.values() if p.get('post_type') == 'post' and p.get('post_status') in ("publish", "private")]
+    if args.db:
+        filtered = select_rows(args.db, 'posts', LISTING_COLUMNS, LISTING_WHERE)
+    else:
+        posts = parse_posts(debug=args.debug, columns=LISTING_COLUMNS, where=LISTING_WHERE)
+        filtered = list(posts.values())
     filtered.sort(key=lambda p: p.get("post_date", ""), reverse=True)
     for p in filtered[:20]:
         date = p.get("post_date") or ""
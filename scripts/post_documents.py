@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Denormalized post documents built from the extracted tables
+
+WordPress spreads a post over five tables: its categories and tags go
+``term_relationships.object_id -> term_taxonomy -> terms``, its meta lives in
+``postmeta`` and its featured image is ``_thumbnail_id`` -> the attachment's
+``_wp_attached_file``. ``DocumentIndex`` takes those rows as they stream out
+of the dump, keeps only what a document needs in dicts keyed by id, and then
+resolves every post with O(1) lookups.
+"""
+
+from collections import defaultdict
+
+THUMBNAIL_KEY = '_thumbnail_id'
+ATTACHED_FILE_KEY = '_wp_attached_file'
+
+# Meta copied into each document's ``meta``; extend with --meta-keys
+DEFAULT_META_KEYS = ('_wp_page_template',)
+
+# Where the site serves wp-content/uploads from (public/uploads)
+UPLOADS_URL = '/uploads/'
+
+# Taxonomy -> document key
+TAXONOMY_KEYS = {'category': 'categories', 'post_tag': 'tags'}
+
+
+class DocumentIndex:
+    """
+    Collect the rows documents are joined from, then ``build(post)``
+
+    Feed it with ``add(table name, record)`` using the table names and record
+    shapes of ``wp_schema``; rows it does not need are dropped on the spot.
+    """
+
+    TABLES = ('term_relationships', 'term_taxonomy', 'terms', 'postmeta')
+
+    def __init__(self, meta_keys=DEFAULT_META_KEYS):
+        self.meta_keys = tuple(sorted(set(meta_keys)))
+        self.post_terms = defaultdict(list)    # object_id -> [term_taxonomy_id]
+        self.taxonomies = {}                   # term_taxonomy_id -> (taxonomy, term_id)
+        self.term_slugs = {}                   # term_id -> slug
+        self.meta = defaultdict(dict)          # post_id -> {meta_key: value}
+        self.thumbnails = {}                   # post_id -> attachment id
+        self.attached_files = {}               # attachment id -> uploads path
+        self._wanted_meta = frozenset(self.meta_keys)
+
+    def add(self, name, record):
+        if name == 'postmeta':
+            key = record['meta_key']
+            if key == THUMBNAIL_KEY:
+                value = record['meta_value']
+                if value.isdigit():
+                    self.thumbnails[record['post_id']] = int(value)
+            elif key == ATTACHED_FILE_KEY:
+                self.attached_files[record['post_id']] = record['meta_value']
+            if key in self._wanted_meta:
+                self.meta[record['post_id']][key] = record['meta_value']
+        elif name == 'term_relationships':
+            self.post_terms[record['object_id']].append(record['term_taxonomy_id'])
+        elif name == 'term_taxonomy':
+            if record['taxonomy'] in TAXONOMY_KEYS:
+                self.taxonomies[record['taxonomy_id']] = (record['taxonomy'], record['term_id'])
+        elif name == 'terms':
+            self.term_slugs[record['id']] = record['slug']
+
+    def featured_image(self, post_id):
+        attachment = self.thumbnails.get(post_id)
+        path = self.attached_files.get(attachment) if attachment is not None else None
+        return f'{UPLOADS_URL}{path}' if path else None
+
+    def build(self, post):
+        """The post record plus ``categories``, ``tags``, ``featured_image`` and ``meta``"""
+        post_id = post['id']
+        document = dict(post)
+        for key in TAXONOMY_KEYS.values():
+            document[key] = []
+        for taxonomy_id in self.post_terms.get(post_id, ()):
+            entry = self.taxonomies.get(taxonomy_id)
+            if entry is None:
+                continue
+            taxonomy, term_id = entry
+            slug = self.term_slugs.get(term_id)
+            if slug is not None:
+                document[TAXONOMY_KEYS[taxonomy]].append(slug)
+        document['featured_image'] = self.featured_image(post_id)
+        # Every selected key is present (None if unset) so documents share one shape
+        meta = self.meta.get(post_id, {})
+        document['meta'] = {key: meta.get(key) for key in self.meta_keys}
+        return document
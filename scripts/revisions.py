@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Compact WordPress revisions and autosaves into one record per post
+
+Most ``posts`` rows of a long-lived site are revisions (``post_type =
+'revision'``), each a full copy of the post body. ``RevisionCompactor`` takes
+the raw rows as the dump streams past, reads only ``post_type``,
+``post_parent``, ``post_name``, ``post_modified_gmt`` and ``ID`` of each, and
+keeps the raw literals of the newest revision per parent; superseded bodies
+are dropped without ever being decoded. Autosaves (``<parent>-autosave-v1``)
+are only counted.
+
+With ``history=True`` every revision is kept and written as a reverse delta
+against the next newer one, so the full history costs little more than the
+latest body::
+
+    {"post_id": 567, "revisions": 14, "autosaves": 1,
+     "latest": {...posts record...},
+     "history": [{"id", "author_id", "modified", "title", "delta": [[start, end, "lines"], ...]}]}
+
+``history`` runs newest to oldest; ``apply_delta(newer content, delta)``
+gives the older content back.
+
+Usage: python3 -m scripts.revisions <sql_file> [--history] [--format jsonl|json] [--compress gzip]
+"""
+
+import difflib
+from collections import defaultdict
+from functools import lru_cache
+
+from scripts.wp_schema import TABLES, compile_table, integer, text
+
+TABLE_PREFIX = '_3YO_'
+
+REVISION_TYPE = 'revision'
+AUTOSAVE_SUFFIX = '-autosave-v'
+
+# Revision fields written to ``history`` next to the delta
+HISTORY_FIELDS = ('id', 'author_id', 'modified', 'title')
+
+
+@lru_cache(maxsize=None)
+def _positions(columns):
+    """Positions of the columns revisions are grouped and ordered by, or None"""
+    columns = columns if columns is not None else TABLES['posts'].columns
+    wanted = ('post_type', 'post_parent', 'post_name', 'post_modified_gmt', 'ID')
+    if not all(column in columns for column in wanted):
+        return None
+    return tuple(columns.index(column) for column in wanted), len(columns)
+
+
+def _lines(content):
+    return content.splitlines(keepends=True)
+
+
+def make_delta(newer, older):
+    """``[[start, end, replacement]]`` turning ``newer`` into ``older``, by line"""
+    newer_lines = _lines(newer)
+    older_lines = _lines(older)
+    matcher = difflib.SequenceMatcher(None, newer_lines, older_lines, autojunk=False)
+    return [
+        [i1, i2, ''.join(older_lines[j1:j2])]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def apply_delta(newer, delta):
+    """Inverse of ``make_delta``: the older content"""
+    lines = _lines(newer)
+    out = []
+    position = 0
+    for start, end, replacement in delta:
+        out.extend(lines[position:start])
+        out.append(replacement)
+        position = end
+    out.extend(lines[position:])
+    return ''.join(out)
+
+
+class RevisionCompactor:
+    """
+    Collect revision rows of the posts table, then ``records()``
+
+    ``add(columns, values)`` returns True when the row was a revision (and
+    is now owned by the compactor), False for any other row.
+    """
+
+    def __init__(self, history=False):
+        self.history = history
+        self.rows = defaultdict(list)   # parent -> [(order key, columns, values)]
+        self.counts = defaultdict(int)  # parent -> revisions seen
+        self.autosaves = defaultdict(int)
+        self.seen = 0
+        self.superseded = 0
+
+    def add(self, columns, values):
+        plan = _positions(columns)
+        if plan is None:
+            return False
+        (type_index, parent_index, name_index, modified_index, id_index), width = plan
+        if len(values) != width or text(values[type_index]) != REVISION_TYPE:
+            return False
+        self.seen += 1
+        parent = integer(values[parent_index])
+        if AUTOSAVE_SUFFIX in values[name_index]:
+            self.autosaves[parent] += 1
+            return True
+        key = (values[modified_index], integer(values[id_index]))
+        self.counts[parent] += 1
+        kept = self.rows[parent]
+        if self.history:
+            kept.append((key, columns, values))
+        elif not kept:
+            kept.append((key, columns, values))
+        else:
+            # Only the newest body per parent is ever decoded
+            self.superseded += 1
+            if key > kept[0][0]:
+                kept[0] = (key, columns, values)
+        return True
+
+    def records(self, parents=None):
+        """
+        Yield one compacted record per parent, in parent id order
+
+        ``parents`` limits the output to those post ids (e.g. the published
+        posts and pages that were extracted).
+        """
+        for parent in sorted(set(self.rows) | set(self.autosaves)):
+            # Revisions of nothing (post_parent 0) are orphans
+            if not parent or (parents is not None and parent not in parents):
+                continue
+            revisions = sorted(self.rows.get(parent, ()), key=lambda row: row[0], reverse=True)
+            record = {
+                'post_id': parent,
+                'revisions': self.counts.get(parent, 0),
+                'autosaves': self.autosaves.get(parent, 0),
+                'latest': None,
+            }
+            decoded = (compile_table('posts', columns, apply_keep=False)(values) for _, columns, values in revisions)
+            newer = next(decoded, None)
+            record['latest'] = newer
+            if self.history:
+                history = []
+                for older in decoded:
+                    entry = {key: older[key] for key in HISTORY_FIELDS}
+                    entry['delta'] = make_delta(newer['content'], older['content'])
+                    history.append(entry)
+                    newer = older
+                record['history'] = history
+            yield record
+
+
+def main():
+    import argparse
+    import sys
+    import time
+    from pathlib import Path
+
+    from scripts.output_writer import COMPRESSIONS, missing_package, open_writer, output_path
+    from scripts.sqldump import iter_rows
+
+    parser = argparse.ArgumentParser(description="Write the latest revision (and optionally the history) of every post")
+    parser.add_argument("sql_file", help="Path to the .sql dump or a .tar.gz backup containing it")
+    parser.add_argument("--history", action="store_true", help="Keep every revision as a reverse delta")
+    parser.add_argument("--output-dir", default=str(Path(__file__).parent.parent / 'extracted_data'))
+    parser.add_argument("--format", choices=('jsonl', 'json'), default='jsonl')
+    parser.add_argument("--compress", choices=list(COMPRESSIONS), default='none')
+    args = parser.parse_args()
+
+    if not Path(args.sql_file).exists():
+        print(f"Error: File not found: {args.sql_file}")
+        sys.exit(1)
+    package = missing_package(args.format, args.compress)
+    if package:
+        print(f"Error: --compress {args.compress} needs the '{package}' package")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    compactor = RevisionCompactor(history=args.history)
+    for _, columns, values in iter_rows(args.sql_file, tables={TABLE_PREFIX + 'posts'}):
+        compactor.add(columns, values)
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    path = output_path(args.output_dir, 'revisions', args.format, args.compress)
+    with open_writer(path, args.format, args.compress) as writer:
+        writer.write_all(compactor.records())
+    elapsed = time.perf_counter() - started
+
+    print(f"  revision rows: {compactor.seen} ({compactor.superseded} superseded bodies skipped)")
+    print(f"✓ Saved {writer.count} posts to {path} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Rewrite links to the old WordPress site in extracted post content
+
+Posts still point at ``https://womanandbusiness.com/wp-content/uploads/...``
+(sometimes through the Jetpack ``i0.wp.com`` CDN), at date permalinks such as
+``/2020/03/22/<slug>/`` and at ``?p=`` / ``?attachment_id=`` links. One
+compiled regex finds every URL on an old host (and every root-relative
+``/uploads/`` or ``/wp-content/uploads/`` link) in a single left-to-right pass over the text; each match is
+normalized and resolved with dict lookups, so the cost is linear in the
+content whatever the number of mappings:
+
+- ``wp-content/uploads/<path>`` -> ``/uploads/<path>``, through the
+  ``media_dedup`` rewrite map when the file was a duplicate
+- a post permalink or ``?p=<id>`` -> ``/blog/<slug>``
+- a page permalink or ``?page_id=<id>`` -> ``/<slug>``
+- ``?attachment_id=<id>`` -> the attachment's file under ``/uploads/``
+- anything in an extra ``--map`` JSON file (``{old URL or path: new URL}``)
+
+Links that cannot be resolved are left untouched and listed, with the ids of
+the records they appear in, in ``url_rewrite_report.json``. A slug used by
+both a post and a page is not guessed at: its permalink stays unresolved and
+the pair is listed under ``slug_collisions`` (a ``--map`` entry settles it).
+Uploads whose file
+is missing from public/uploads are listed there too, as is the SHA-256 of the
+``media_dedup`` map that was applied (``media_dedup --apply`` checks it).
+
+Usage: python3 -m scripts.rewrite_urls [--data-dir extracted_data] [--output-dir DIR] [--map extra.json]
+"""
+
+import json
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import parse_qsl, quote, unquote
+
+from scripts.dump_cache import file_sha256
+from scripts.output_writer import detect_format, find_output, iter_records, open_writer
+
+ROOT = Path(__file__).parent.parent
+DATA_DIR = ROOT / 'extracted_data'
+UPLOADS_DIR = ROOT / 'public' / 'uploads'
+MEDIA_REWRITES_PATH = DATA_DIR / 'media_rewrites.json'
+REPORT_NAME = 'url_rewrite_report.json'
+
+# Hosts the WordPress site was served from
+OLD_HOSTS = ('womanandbusiness.com', 'womanandbusiness.es')
+
+# Where the Next.js app serves each kind of content
+POST_URL = '/blog/{slug}'
+PAGE_URL = '/{slug}'
+UPLOADS_URL = '/uploads/'
+WP_UPLOADS_PATH = '/wp-content/uploads/'
+
+# Extracted files rewritten by default, and the fields rewritten in each record
+DEFAULT_FILES = ('posts', 'pages')
+DEFAULT_FIELDS = ('content', 'excerpt')
+
+ATTACHED_FILE_KEY = '_wp_attached_file'
+
+# Query parameters WordPress resolves to a single post
+ID_PARAMETERS = ('p', 'page_id', 'attachment_id')
+
+# Characters that end a URL inside HTML or a shortcode
+_URL_BODY = r'''[^\s"'<>()\[\]{}]*'''
+
+# /2020/03/22/slug or /2020/03/slug
+_DATE_PREFIX_RE = re.compile(r'^/\d{4}/\d{2}(?:/\d{2})?(?=/)')
+
+
+def compile_pattern(hosts=OLD_HOSTS):
+    """One regex matching any URL on ``hosts`` and any root-relative (wp-content) uploads link"""
+    host_alternatives = '|'.join(re.escape(host) for host in sorted(hosts, key=len, reverse=True))
+    return re.compile(
+        rf'(?:https?:)?//(?:i[0-3]\.wp\.com/)?(?:www\.)?(?:{host_alternatives})(?![\w.-])(?P<path>{_URL_BODY})'
+        rf'|(?<![\w/.:-])(?P<local>(?:{re.escape(WP_UPLOADS_PATH)}|{re.escape(UPLOADS_URL)}){_URL_BODY})',
+        re.IGNORECASE,
+    )
+
+
+def _collapse_path(path):
+    """``path`` with duplicate and trailing slashes removed ('/' for the home page)"""
+    return re.sub('/{2,}', '/', path).rstrip('/') or '/'
+
+
+def _normalize_path(path):
+    """Decoded ``_collapse_path``, the form mapping keys are looked up in"""
+    return _collapse_path(unquote(path))
+
+
+def build_mapping(posts=(), pages=(), attached_files=None, media_rewrites=None, extra=None, collisions=None):
+    """
+    ``{normalized path or '?param=id': new URL}`` for every resolvable link
+
+    ``attached_files`` maps attachment ids to their uploads path,
+    ``media_rewrites`` is the ``media_dedup`` map and ``extra`` any explicit
+    ``{old URL or path: new URL}`` pairs, which win over everything else.
+    Permalink paths claimed by records with different new URLs (a post and
+    a page with the same slug) are left out; ``collisions``, if given, is
+    filled with ``{path: {new URL}}`` for them.
+    """
+    mapping = {}
+    if collisions is None:
+        collisions = {}
+    for kind, records, template in (('post', posts, POST_URL), ('page', pages, PAGE_URL)):
+        parameter = 'p' if kind == 'post' else 'page_id'
+        for record in records:
+            slug = record.get('slug')
+            if not slug:
+                continue
+            url = template.format(slug=slug)
+            path = _normalize_path(f'/{slug}')
+            if path in collisions:
+                collisions[path].add(url)
+            elif mapping.setdefault(path, url) != url:
+                collisions[path] = {mapping.pop(path), url}
+            if record.get('id') is not None:
+                mapping[f'?{parameter}={record["id"]}'] = url
+                # WordPress answers ?p= for any post type
+                mapping.setdefault(f'?p={record["id"]}', url)
+    for attachment_id, relative in (attached_files or {}).items():
+        # Attached files and dedup targets are file paths; links need them encoded
+        mapping[f'?attachment_id={attachment_id}'] = f'{UPLOADS_URL}{quote(relative)}'
+    for duplicate, canonical in (media_rewrites or {}).items():
+        mapping[_normalize_path(duplicate)] = quote(canonical)
+    pattern = compile_pattern()
+    for old, new in (extra or {}).items():
+        match = pattern.fullmatch(old)
+        if match is not None:
+            old = match.group('path') if match.group('path') is not None else match.group('local')
+        mapping[_lookup_key(old)] = new
+    return mapping
+
+
+def _lookup_key(path):
+    path, _, query = path.partition('#')[0].partition('?')
+    path = _normalize_path(path)
+    if path == '/' and query:
+        return f'?{query}'
+    return path
+
+
+class UrlRewriter:
+    """
+    Rewrite old-site links in text with one regex pass and dict lookups
+
+    ``unresolved`` collects ``{url: {record id}}`` for links left as they
+    were, ``missing_uploads`` the same for upload links whose file is not in
+    ``uploads_dir``.
+    """
+
+    def __init__(self, mapping, hosts=OLD_HOSTS, uploads_dir=UPLOADS_DIR):
+        self.mapping = mapping
+        self.pattern = compile_pattern(hosts)
+        self.uploads_dir = Path(uploads_dir) if uploads_dir is not None else None
+        self.unresolved = defaultdict(set)
+        self.missing_uploads = defaultdict(set)
+        self.rewritten = 0
+        self._exists = {}
+        self._record_id = None
+
+    def resolve(self, path):
+        """
+        New URL for a path (with query and fragment) on the old site, or None
+
+        Paths are matched percent-decoded; a path passed through keeps the
+        encoding it was written with.
+        """
+        path, _, fragment = path.partition('#')
+        path, _, query = path.partition('?')
+        original = _collapse_path(path)
+        path = _normalize_path(path)
+        fragment = f'#{fragment}' if fragment else ''
+
+        if path.lower().startswith(WP_UPLOADS_PATH):
+            path = UPLOADS_URL + path[len(WP_UPLOADS_PATH):]
+            original = UPLOADS_URL + original[len(WP_UPLOADS_PATH):]
+        if path.startswith(UPLOADS_URL):
+            # Jetpack resize parameters and cache busters are dropped
+            return self.mapping.get(path, original)
+
+        new = self.mapping.get(path)
+        if new is None:
+            undated = _DATE_PREFIX_RE.sub('', path)
+            if undated != path:
+                new = self.mapping.get(undated)
+        if new is None and path == '/':
+            if not query:
+                return '/' + fragment
+            for name, value in parse_qsl(query):
+                if name in ID_PARAMETERS:
+                    new = self.mapping.get(f'?{name}={value}')
+                    break
+        return new + fragment if new is not None else None
+
+    def _upload_exists(self, url):
+        if self.uploads_dir is None:
+            return True
+        exists = self._exists.get(url)
+        if exists is None:
+            exists = self._exists[url] = (self.uploads_dir / unquote(url[len(UPLOADS_URL):])).is_file()
+        return exists
+
+    def _replace(self, match):
+        url = match.group(0)
+        path = match.group('path')
+        new = self.resolve(path if path is not None else match.group('local'))
+        if new is None:
+            self.unresolved[url].add(self._record_id)
+            return url
+        if new.startswith(UPLOADS_URL) and not self._upload_exists(new.partition('#')[0]):
+            self.missing_uploads[new].add(self._record_id)
+        if new != url:
+            self.rewritten += 1
+        return new
+
+    def rewrite(self, text, record_id=None):
+        if not text:
+            return text
+        self._record_id = record_id
+        return self.pattern.sub(self._replace, text)
+
+    def rewrite_record(self, record, fields=DEFAULT_FIELDS):
+        for field in fields:
+            value = record.get(field)
+            if isinstance(value, str):
+                record[field] = self.rewrite(value, record.get('id'))
+        return record
+
+    def report(self):
+        return {
+            'rewritten': self.rewritten,
+            'unresolved': {url: sorted(ids, key=str) for url, ids in sorted(self.unresolved.items())},
+            'missing_uploads': {url: sorted(ids, key=str) for url, ids in sorted(self.missing_uploads.items())},
+        }
+
+
+def find_file(data_dir, name):
+    """
+    The extracted ``.json``/``.jsonl`` file for ``name``, or None
+
+    Raises ValueError when several formats of it are present.
+    """
+    return find_output(data_dir, name, ('json', 'jsonl'))
+
+
+def attached_files(post_meta_path):
+    """``{attachment id: uploads path}`` from extracted post meta"""
+    if post_meta_path is None:
+        return {}
+    return {
+        row['post_id']: row['meta_value']
+        for row in iter_records(post_meta_path)
+        if row.get('meta_key') == ATTACHED_FILE_KEY and row.get('meta_value')
+    }
+
+
+def _load_json(path):
+    if path is None or not Path(path).exists():
+        return {}
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def rewrite_file(rewriter, source, target, fields=DEFAULT_FIELDS):
+    """Rewrite every record of ``source`` into ``target`` (may be the same file)"""
+    fmt, compress = detect_format(source)
+    with open_writer(target, fmt, compress) as writer:
+        for record in iter_records(source):
+            writer.write(rewriter.rewrite_record(record, fields))
+    return writer.count
+
+
+def main():
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Rewrite old WordPress URLs in extracted posts and pages")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory with the extracted files")
+    parser.add_argument("--output-dir", help="Write rewritten files here instead of in place")
+    parser.add_argument("--files", default=','.join(DEFAULT_FILES), help="Extracted files to rewrite")
+    parser.add_argument("--fields", default=','.join(DEFAULT_FIELDS), help="Record fields to rewrite")
+    parser.add_argument("--map", help="Extra JSON {old URL: new URL} mappings")
+    parser.add_argument("--media-rewrites", default=str(MEDIA_REWRITES_PATH), help="media_dedup rewrite map")
+    parser.add_argument("--uploads", default=str(UPLOADS_DIR), help="Uploads directory checked for missing files")
+    args = parser.parse_args()
+
+    names = [name for name in args.files.split(',') if name]
+    try:
+        sources = {name: find_file(args.data_dir, name) for name in set(names) | {'posts', 'pages', 'post_meta'}}
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    slug_sources = {name: sources[name] for name in ('posts', 'pages')}
+    post_meta = sources['post_meta']
+    sources = {name: sources[name] for name in names}
+    missing = [name for name, path in sources.items() if path is None]
+    if missing:
+        print(f"Error: No extracted {', '.join(missing)} in {args.data_dir}; run extract-all-wordpress-data.py first")
+        sys.exit(1)
+    if args.map and not Path(args.map).exists():
+        print(f"Error: File not found: {args.map}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    collisions = {}
+    # Posts and pages are read once for their slugs, then again to rewrite
+    mapping = build_mapping(
+        posts=iter_records(slug_sources['posts']) if slug_sources['posts'] else (),
+        pages=iter_records(slug_sources['pages']) if slug_sources['pages'] else (),
+        attached_files=attached_files(post_meta),
+        media_rewrites=_load_json(args.media_rewrites),
+        extra=_load_json(args.map),
+        collisions=collisions,
+    )
+    rewriter = UrlRewriter(mapping, uploads_dir=args.uploads)
+    fields = [field for field in args.fields.split(',') if field]
+
+    output_dir = Path(args.output_dir or args.data_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, source in sources.items():
+        count = rewrite_file(rewriter, source, output_dir / source.name, fields)
+        print(f"  {name}: {count} records")
+
+    report = rewriter.report()
+    report['slug_collisions'] = {path: sorted(urls) for path, urls in sorted(collisions.items())}
+    media_rewrites = Path(args.media_rewrites)
+    report['media_rewrites_sha256'] = file_sha256(media_rewrites) if media_rewrites.exists() else None
+    report_path = output_dir / REPORT_NAME
+    tmp_path = report_path.with_name(report_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, report_path)
+    elapsed = time.perf_counter() - started
+
+    print(f"  mappings: {len(mapping)}, links rewritten: {report['rewritten']}")
+    print(f"  unresolved: {len(report['unresolved'])}, missing uploads: {len(report['missing_uploads'])}, "
+          f"slug collisions: {len(collisions)}")
+    for url in list(report['unresolved'])[:10]:
+        print(f"    - {url}")
+    print(f"✓ Saved {report_path} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
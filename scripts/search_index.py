@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Full-text search index over the extracted posts and pages
+
+Titles, excerpts and HTML-stripped content are split into words, stop words
+are dropped, and every word is reduced to its Spanish Snowball stem
+(``spanish_stemmer``) and folded to lower-case ASCII, so ``Emprendedoras``,
+``emprendedora`` and ``emprendedor`` are one term. Snowball only strips some
+suffixes with their accent (``conciliación`` -> ``concili``, but
+``conciliacion`` stays whole), so the term of each word typed without
+accents is kept as an alias of its real term, and queries look both up. A
+title word counts ``FIELD_WEIGHTS['title']`` times.
+
+``SearchIndex.build(records)`` keeps, per term, its document frequency and
+a postings list compressed as varints: the gap to the previous document
+number, then the weighted term frequency. ``search(query)`` ranks with
+BM25; postings are decoded once per term and cached, and document length
+norms are precomputed, so a query is a few dict lookups and additions.
+
+``save`` writes the static asset served from ``public/``::
+
+    {"version": 1, "k1": 1.2, "b": 0.75, "weights": {"title": 3, ...},
+     "avgdl": 312.5, "lengths": [length of each document, ...],
+     "docs": [{"id", "type", "title", "slug", "url", "date", "snippet"}, ...],
+     "terms": {"emprend": [df, "<base64 varint postings>"], ...},
+     "aliases": {"conciliacion": ["concili"], ...}}
+
+A client tokenizes its query the same way (lower case, stem, fold), adds the
+``aliases`` of each term, then scores ``idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avgdl))``
+with ``idf = ln(1 + (N - df + 0.5) / (df + 0.5))``.
+
+Usage: python3 -m scripts.search_index [--input extracted_data/posts.json] [--output public/search-index.json]
+       python3 -m scripts.search_index --query "liderazgo femenino"
+"""
+
+import base64
+import heapq
+import json
+import math
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+from scripts.output_writer import iter_records
+from scripts.rewrite_urls import PAGE_URL, POST_URL
+from scripts.spanish_stemmer import stem
+
+ROOT = Path(__file__).parent.parent
+DATA_DIR = ROOT / 'extracted_data'
+INDEX_PATH = ROOT / 'public' / 'search-index.json'
+
+INDEX_VERSION = 2
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Each occurrence of a word in a field counts this many times
+FIELD_WEIGHTS = {'title': 3, 'excerpt': 2, 'content': 1}
+
+# Characters of plain text kept per document for result listings
+SNIPPET_LENGTH = 200
+
+# Terms a prefix query expands to at most
+PREFIX_EXPANSIONS = 20
+
+STOPWORDS = frozenset('''
+    a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante e el
+    ella ellas ellos en entre era eran es esa esas ese eso esos esta estaba estan estar estas este
+    esto estos fue fueron ha han hasta hay la las le les lo los mas me mi mis mucho muchos muy nada
+    ni no nos nosotras nosotros o os otra otras otro otros para pero poco por porque que quien quienes
+    se sea ser si sin sobre son su sus tambien tanto te ti tiene tienen todo todos tu tus un una unas
+    uno unos vosotras vosotros y ya yo
+'''.split())
+
+_WORD = re.compile(r'[^\W_]+')
+_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_SCRIPT = re.compile(r'<(script|style)\b.*?</\1\s*>', re.DOTALL | re.IGNORECASE)
+_TAG = re.compile(r'<[^>]*>')
+_SHORTCODE = re.compile(r'\[/?[a-zA-Z][\w-]*[^\]]*\]')
+_SPACE = re.compile(r'\s+')
+
+
+def strip_html(content):
+    """Plain text of WordPress content: no comments, scripts, tags or shortcodes"""
+    content = _COMMENT.sub(' ', content)
+    content = _SCRIPT.sub(' ', content)
+    content = _TAG.sub(' ', content)
+    content = _SHORTCODE.sub(' ', content)
+    return _SPACE.sub(' ', content).strip()
+
+
+@lru_cache(maxsize=None)
+def fold(word):
+    """``word`` without accents or other combining marks (ñ -> n)"""
+    decomposed = unicodedata.normalize('NFKD', word)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@lru_cache(maxsize=65536)
+def term(word):
+    """The index term of a lower-case word, or None for stop words and single letters"""
+    if len(word) < 2 or fold(word) in STOPWORDS:
+        return None
+    return fold(stem(word))
+
+
+def words(text):
+    """Lower-case words of ``text``"""
+    return _WORD.findall(text.lower())
+
+
+def analyze(text):
+    """Index terms of ``text`` in order (repeats kept)"""
+    terms = []
+    for word in words(text):
+        value = term(word)
+        if value is not None:
+            terms.append(value)
+    return terms
+
+
+def _encode(postings):
+    """``[(doc, tf)]`` in doc order -> varint bytes of doc gaps and frequencies"""
+    out = bytearray()
+    previous = 0
+    for doc, frequency in postings:
+        for value in (doc - previous, frequency):
+            while value >= 0x80:
+                out.append(value & 0x7F | 0x80)
+                value >>= 7
+            out.append(value)
+        previous = doc
+    return bytes(out)
+
+
+def _decode(data):
+    """Inverse of ``_encode``"""
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    postings = []
+    doc = 0
+    for i in range(0, len(values), 2):
+        doc += values[i]
+        postings.append((doc, values[i + 1]))
+    return postings
+
+
+def _snippet(text):
+    if len(text) <= SNIPPET_LENGTH:
+        return text
+    cut = text.rfind(' ', 0, SNIPPET_LENGTH)
+    return text[:cut if cut > 0 else SNIPPET_LENGTH] + '…'
+
+
+def document(record):
+    """What a search result shows of a post or page record"""
+    url = (PAGE_URL if record.get('type') == 'page' else POST_URL).format(slug=record.get('slug', ''))
+    return {
+        'id': record.get('id'),
+        'type': record.get('type', 'post'),
+        'title': record.get('title', ''),
+        'slug': record.get('slug', ''),
+        'url': url,
+        'date': record.get('date', ''),
+        'snippet': _snippet(strip_html(record.get('excerpt') or record.get('content') or '')),
+    }
+
+
+class SearchIndex:
+    """
+    BM25-ranked inverted index; ``build`` from records or ``load`` an asset
+
+    ``terms`` maps each term to ``(document frequency, encoded postings)``,
+    ``aliases`` the term of an accent-less spelling to the terms it stands for.
+    """
+
+    def __init__(self, docs, lengths, terms, aliases=None, k1=K1, b=B, weights=FIELD_WEIGHTS):
+        self.docs = docs
+        self.lengths = lengths
+        self.terms = terms
+        self.aliases = aliases or {}
+        self.k1 = k1
+        self.b = b
+        self.weights = dict(weights)
+        self.avgdl = sum(lengths) / len(lengths) if lengths else 0.0
+        self.sorted_terms = sorted(terms)
+        avgdl = self.avgdl or 1.0
+        self._norms = [k1 * (1 - b + b * length / avgdl) for length in lengths]
+        self._postings = {}
+
+    @classmethod
+    def build(cls, records, weights=FIELD_WEIGHTS):
+        docs = []
+        lengths = []
+        postings = defaultdict(list)
+        aliases = defaultdict(set)
+        for number, record in enumerate(records):
+            counts = Counter()
+            for field, weight in weights.items():
+                value = record.get(field) or ''
+                if field != 'title':
+                    value = strip_html(value)
+                for word in words(value):
+                    value_term = term(word)
+                    if value_term is None:
+                        continue
+                    counts[value_term] += weight
+                    unaccented = term(fold(word))
+                    if unaccented is not None and unaccented != value_term:
+                        aliases[unaccented].add(value_term)
+            docs.append(document(record))
+            lengths.append(sum(counts.values()))
+            for value_term, frequency in counts.items():
+                postings[value_term].append((number, frequency))
+        terms = {
+            value_term: (len(entries), _encode(entries))
+            for value_term, entries in sorted(postings.items())
+        }
+        aliases = {alias: sorted(targets) for alias, targets in sorted(aliases.items())}
+        return cls(docs, lengths, terms, aliases, weights=weights)
+
+    def to_dict(self):
+        return {
+            'version': INDEX_VERSION,
+            'k1': self.k1,
+            'b': self.b,
+            'weights': self.weights,
+            'avgdl': self.avgdl,
+            'lengths': self.lengths,
+            'docs': self.docs,
+            'terms': {
+                value_term: [frequency, base64.b64encode(data).decode('ascii')]
+                for value_term, (frequency, data) in self.terms.items()
+            },
+            'aliases': self.aliases,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported search index version: {data.get('version')}")
+        terms = {
+            value_term: (frequency, base64.b64decode(encoded))
+            for value_term, (frequency, encoded) in data['terms'].items()
+        }
+        return cls(data['docs'], data['lengths'], terms, data['aliases'], data['k1'], data['b'], data['weights'])
+
+    def save(self, path=INDEX_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(self.to_dict(), fh, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with open(path, encoding='utf-8') as fh:
+            return cls.from_dict(json.load(fh))
+
+    def postings(self, value_term):
+        """``[(doc number, weighted tf)]`` of a term, decoded once"""
+        cached = self._postings.get(value_term)
+        if cached is None:
+            entry = self.terms.get(value_term)
+            cached = _decode(entry[1]) if entry is not None else []
+            self._postings[value_term] = cached
+        return cached
+
+    def expand(self, prefix):
+        """Indexed terms starting with ``prefix``, at most ``PREFIX_EXPANSIONS``"""
+        matches = []
+        for value_term in self.sorted_terms[bisect_left(self.sorted_terms, prefix):]:
+            if not value_term.startswith(prefix) or len(matches) == PREFIX_EXPANSIONS:
+                break
+            matches.append(value_term)
+        return matches
+
+    def search(self, query, limit=10, prefix=False):
+        """
+        Documents matching any query term, best BM25 score first
+
+        With ``prefix`` the last query word also matches terms it begins
+        (search as you type). Returns the ``docs`` entries with a ``score``.
+        """
+        query_terms = dict.fromkeys(analyze(query))
+        if prefix and query_terms:
+            last = next(reversed(query_terms))
+            query_terms.update(dict.fromkeys(self.expand(last)))
+        for value_term in list(query_terms):
+            query_terms.update(dict.fromkeys(self.aliases.get(value_term, ())))
+        count = len(self.docs)
+        scores = defaultdict(float)
+        norms = self._norms
+        factor = self.k1 + 1
+        for value_term in query_terms:
+            entry = self.terms.get(value_term)
+            if entry is None:
+                continue
+            frequency = entry[0]
+            idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for doc, tf in self.postings(value_term):
+                scores[doc] += idf * tf * factor / (tf + norms[doc])
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [dict(self.docs[doc], score=score) for doc, score in best]
+
+
+def main():
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Build the full-text search index of the extracted posts and pages")
+    parser.add_argument("--input", action="append",
+                        help="Extracted posts/pages file (repeatable; default: extracted_data/posts.json and pages.json)")
+    parser.add_argument("--output", default=str(INDEX_PATH), help="Index file written (served from public/)")
+    parser.add_argument("--query", help="Search the saved index instead of building it")
+    parser.add_argument("--limit", type=int, default=10, help="Results shown with --query")
+    args = parser.parse_args()
+
+    if args.query is not None:
+        if not Path(args.output).exists():
+            print(f"Error: File not found: {args.output}; build the index first")
+            sys.exit(1)
+        index = SearchIndex.load(args.output)
+        # The first search decodes the postings; time the warm one
+        index.search(args.query, args.limit)
+        started = time.perf_counter()
+        results = index.search(args.query, args.limit)
+        elapsed = time.perf_counter() - started
+        for result in results:
+            print(f"  {result['score']:6.2f}  {result['url']}  {result['title'][:60]}")
+        print(f"✓ {len(results)} results in {elapsed * 1e6:.0f}µs")
+        return
+
+    inputs = args.input or [str(DATA_DIR / 'posts.json'), str(DATA_DIR / 'pages.json')]
+    missing = [path for path in inputs if not Path(path).exists()]
+    if missing:
+        print(f"Error: File not found: {', '.join(missing)}; run extract-all-wordpress-data.py first")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    records = (record for path in inputs for record in iter_records(path))
+    index = SearchIndex.build(records)
+    index.save(args.output)
+    elapsed = time.perf_counter() - started
+
+    size = Path(args.output).stat().st_size
+    print(f"  {len(index.docs)} documents, {len(index.terms)} terms, average length {index.avgdl:.0f}")
+    print(f"✓ Saved {args.output} ({size / 1024:.0f} KiB) in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
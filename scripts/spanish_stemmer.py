@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Snowball stemmer for Spanish
+
+A plain-Python port of the Snowball Spanish algorithm
+(https://snowballstem.org/algorithms/spanish/stemmer.html), so the search
+index needs no extra package: ``stem('emprendedoras') == 'emprendedor'``.
+Words are expected in lower case with their accents; the stem comes back
+with acute accents removed.
+"""
+
+from functools import lru_cache
+
+VOWELS = frozenset('aeiouáéíóúü')
+
+_ACUTE = str.maketrans('áéíóú', 'aeiou')
+
+PRONOUNS = ('me', 'se', 'sela', 'selo', 'selas', 'selos', 'la', 'le', 'lo', 'las', 'les', 'los', 'nos')
+
+# Verb ending before an attached pronoun -> what it becomes without it
+PRONOUN_ENDINGS = {
+    'iéndo': 'iendo', 'ándo': 'ando', 'ár': 'ar', 'ér': 'er', 'ír': 'ir',
+    'ando': 'ando', 'iendo': 'iendo', 'ar': 'ar', 'er': 'er', 'ir': 'ir',
+    'yendo': 'yendo',
+}
+
+# Step 1 suffix -> action
+STANDARD_SUFFIXES = {}
+for _suffixes, _action in (
+    (('anza', 'anzas', 'ico', 'ica', 'icos', 'icas', 'ismo', 'ismos', 'able', 'ables', 'ible', 'ibles',
+      'ista', 'istas', 'oso', 'osa', 'osos', 'osas', 'amiento', 'amientos', 'imiento', 'imientos'), 'delete'),
+    (('adora', 'ador', 'ación', 'adoras', 'adores', 'aciones', 'ante', 'antes', 'ancia', 'ancias'), 'ic'),
+    (('logía', 'logías'), 'log'),
+    (('ución', 'uciones'), 'u'),
+    (('encia', 'encias'), 'ente'),
+    (('amente',), 'amente'),
+    (('mente',), 'mente'),
+    (('idad', 'idades'), 'idad'),
+    (('iva', 'ivo', 'ivas', 'ivos'), 'iva'),
+):
+    STANDARD_SUFFIXES.update(dict.fromkeys(_suffixes, _action))
+
+Y_VERB_SUFFIXES = ('ya', 'ye', 'yan', 'yen', 'yeron', 'yendo', 'yo', 'yó', 'yas', 'yes', 'yais', 'yamos')
+
+# Removed with a preceding ``u`` when that follows a ``g``
+GU_VERB_SUFFIXES = ('en', 'es', 'éis', 'emos')
+
+VERB_SUFFIXES = (
+    'arían', 'arías', 'arán', 'arás', 'aríais', 'aría', 'aréis', 'aríamos', 'aremos', 'ará', 'aré',
+    'erían', 'erías', 'erán', 'erás', 'eríais', 'ería', 'eréis', 'eríamos', 'eremos', 'erá', 'eré',
+    'irían', 'irías', 'irán', 'irás', 'iríais', 'iría', 'iréis', 'iríamos', 'iremos', 'irá', 'iré',
+    'aba', 'ada', 'ida', 'ía', 'ara', 'iera', 'ad', 'ed', 'id', 'ase', 'iese', 'aste', 'iste', 'an',
+    'aban', 'ían', 'aran', 'ieran', 'asen', 'iesen', 'aron', 'ieron', 'ado', 'ido', 'ando', 'iendo',
+    'ió', 'ar', 'er', 'ir', 'as', 'abas', 'adas', 'idas', 'ías', 'aras', 'ieras', 'ases', 'ieses',
+    'ís', 'áis', 'abais', 'íais', 'arais', 'ierais', 'aseis', 'ieseis', 'asteis', 'isteis', 'ados',
+    'idos', 'amos', 'ábamos', 'íamos', 'imos', 'áramos', 'iéramos', 'iésemos', 'ásemos',
+) + GU_VERB_SUFFIXES
+
+RESIDUAL_SUFFIXES = ('os', 'a', 'o', 'á', 'í', 'ó', 'e', 'é')
+
+
+def _longest(suffixes):
+    return tuple(sorted(suffixes, key=len, reverse=True))
+
+
+_PRONOUNS = _longest(PRONOUNS)
+_PRONOUN_ENDINGS = _longest(PRONOUN_ENDINGS)
+_STANDARD_SUFFIXES = _longest(STANDARD_SUFFIXES)
+_Y_VERB_SUFFIXES = _longest(Y_VERB_SUFFIXES)
+_VERB_SUFFIXES = _longest(VERB_SUFFIXES)
+_RESIDUAL_SUFFIXES = _longest(RESIDUAL_SUFFIXES)
+
+
+def _suffix(word, suffixes, start=0):
+    """The longest of ``suffixes`` ending ``word`` within ``word[start:]``, or None"""
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= start:
+            return suffix
+    return None
+
+
+def _after_consonant(word, start):
+    """Position after the first vowel-then-consonant from ``start``"""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def regions(word):
+    """``(rv, r1, r2)``, the start of each Snowball region"""
+    length = len(word)
+    rv = length
+    if length >= 2:
+        if word[1] not in VOWELS:
+            # Past the next vowel
+            rv = next((i + 1 for i in range(2, length) if word[i] in VOWELS), length)
+        elif word[0] in VOWELS:
+            # Past the next consonant
+            rv = next((i + 1 for i in range(2, length) if word[i] not in VOWELS), length)
+        else:
+            rv = min(3, length)
+    r1 = _after_consonant(word, 0)
+    r2 = _after_consonant(word, r1)
+    return rv, r1, r2
+
+
+def _attached_pronoun(word, rv):
+    pronoun = _suffix(word, _PRONOUNS)
+    if pronoun is None:
+        return word
+    base = word[:-len(pronoun)]
+    ending = _suffix(base, _PRONOUN_ENDINGS)
+    if ending is None or len(base) - len(ending) < rv:
+        return word
+    if ending == 'yendo' and not base[:-len(ending)].endswith('u'):
+        return word
+    return base[:-len(ending)] + PRONOUN_ENDINGS[ending]
+
+
+def _standard_suffix(word, r1, r2):
+    """``word`` without its step 1 suffix, or None when it has none to remove"""
+    suffix = _suffix(word, _STANDARD_SUFFIXES)
+    if suffix is None:
+        return None
+    start = len(word) - len(suffix)
+    action = STANDARD_SUFFIXES[suffix]
+    if action == 'amente':
+        if start < r1:
+            return None
+        word = word[:start]
+        preceding = _suffix(word, ('iv', 'os', 'ic', 'ad'), r2)
+        if preceding is not None:
+            word = word[:-len(preceding)]
+            if preceding == 'iv' and word.endswith('at') and len(word) - 2 >= r2:
+                word = word[:-2]
+        return word
+    if start < r2:
+        return None
+    if action in ('log', 'u', 'ente'):
+        return word[:start] + action
+    word = word[:start]
+    follow = {
+        'ic': ('ic',),
+        'mente': ('ante', 'able', 'ible'),
+        'idad': ('abil', 'ic', 'iv'),
+        'iva': ('at',),
+    }.get(action, ())
+    preceding = _suffix(word, follow)
+    if preceding is not None and len(word) - len(preceding) >= r2:
+        word = word[:-len(preceding)]
+    return word
+
+
+def _y_verb_suffix(word, rv):
+    suffix = _suffix(word, _Y_VERB_SUFFIXES, rv)
+    if suffix is None or not word[:-len(suffix)].endswith('u'):
+        return None
+    return word[:-len(suffix)]
+
+
+def _verb_suffix(word, rv):
+    suffix = _suffix(word, _VERB_SUFFIXES, rv)
+    if suffix is None:
+        return word
+    word = word[:-len(suffix)]
+    if suffix in GU_VERB_SUFFIXES and word.endswith('gu'):
+        word = word[:-1]
+    return word
+
+
+def _residual_suffix(word, rv):
+    suffix = _suffix(word, _RESIDUAL_SUFFIXES)
+    if suffix is None or len(word) - len(suffix) < rv:
+        return word
+    word = word[:-len(suffix)]
+    if suffix in ('e', 'é') and word.endswith('gu') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    """The Snowball stem of a lower-case Spanish word"""
+    rv, r1, r2 = regions(word)
+    word = _attached_pronoun(word, rv)
+    stemmed = _standard_suffix(word, r1, r2)
+    if stemmed is None:
+        stemmed = _y_verb_suffix(word, rv)
+    if stemmed is None:
+        stemmed = _verb_suffix(word, rv)
+    return _residual_suffix(stemmed, rv).translate(_ACUTE)
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+Streaming tokenizer for mysqldump files
+
+Reads the dump in fixed-size chunks and yields one event per row of every
+``INSERT INTO`` statement, so the whole dump never has to sit in memory.
+Quote and escape state is carried across chunk boundaries; only the row
+currently being parsed is kept in the buffer.
+
+Values are returned as raw SQL literals (``'It\\'s'``, ``42``, ``NULL``), the
+same shape the extractors already feed into ``clean_content``. Files opened
+in binary mode are scanned as bytes and yield ``bytes`` literals, with
+positions counted in bytes.
+
+A cPanel backup (``.tar.gz``) can be passed instead of the extracted dump:
+its ``mysql/*.sql`` member is streamed out of the archive straight into the
+tokenizer, decompressed by ``pigz`` in a separate process when it is
+installed.
+"""
+
+import codecs
+import mmap
+import re
+import shutil
+import subprocess
+import tarfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from fnmatch import fnmatch
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+ARCHIVE_SUFFIXES = ('.tar.gz', '.tgz', '.tar')
+
+# Archive member holding the database dump
+DUMP_MEMBER = '*mysql/*.sql'
+
+# External gzip decompressors, fastest first; they run in their own process
+# (pigz reads, decompresses and checksums on separate threads)
+GUNZIP_COMMANDS = (('pigz', '-dc'), ('unpigz', '-c'))
+
+# Longest INSERT header (table name + column list) we are willing to buffer
+MAX_HEADER_SIZE = 1 << 16
+
+_Syntax = namedtuple('_Syntax', [
+    'header', 'ws', 'bare_end', 'quote_special', 'literal', 'value_delim',
+    'row_value_delim', 'row_delim', 'insert', 'comma', 'lparen', 'rparen', 'semicolon', 'backslash',
+])
+
+
+def _build_syntax(kind):
+    """Compile the scanner patterns for ``str`` or ``bytes`` input"""
+    def lit(text):
+        return text if kind is str else text.encode()
+
+    def pattern(regex, flags=0):
+        return re.compile(lit(regex), flags)
+
+    return _Syntax(
+        header=pattern(r"INSERT\s+INTO\s+`([^`]+)`\s*(?:\(([^)]*)\)\s*)?VALUES\s*", re.IGNORECASE),
+        ws=pattern(r"\s*"),
+        bare_end=pattern(r"[,)]"),
+        quote_special={
+            lit("'"): pattern(r"[\\']"),
+            lit('"'): pattern(r'[\\"]'),
+        },
+        # A whole quoted literal: runs of plain text broken by escapes or doubled quotes
+        literal={
+            lit("'"): pattern(r"'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'", re.S),
+            lit('"'): pattern(r'"[^"\\]*(?:(?:\\.|"")[^"\\]*)*"', re.S),
+        },
+        value_delim=pattern(r"[,'\"]"),
+        row_value_delim=pattern(r"[,)'\"]"),
+        row_delim=pattern(r"[()'\"]"),
+        insert=lit('INSERT'),
+        comma=lit(','),
+        lparen=lit('('),
+        rparen=lit(')'),
+        semicolon=lit(';'),
+        backslash=lit('\\'),
+    )
+
+
+_SYNTAX = {str: _build_syntax(str), bytes: _build_syntax(bytes)}
+
+
+def _syntax_for(text):
+    return _SYNTAX[str] if isinstance(text, str) else _SYNTAX[bytes]
+
+
+def _as_str(text):
+    return text if isinstance(text, str) else bytes(text).decode('utf-8', errors='ignore')
+
+
+def is_archive(path):
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+@contextmanager
+def open_dump(path, member=DUMP_MEMBER):
+    """
+    Open a dump for streaming, decoding it the way every extractor does
+
+    ``path`` may also be a tar backup, in which case the first member
+    matching ``member`` is read out of it without extracting anything.
+    """
+    if not is_archive(path):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as fh:
+            yield fh
+        return
+    with open_archive_member(path, member) as raw:
+        yield _TextReader(raw)
+
+
+class _TextReader:
+    """
+    ``read()``-only text view of a binary stream
+
+    ``io.TextIOWrapper`` cannot wrap a member of a tar opened in stream
+    mode (it probes ``seekable()``), and the tokenizer only ever calls
+    ``read(size)``.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+
+    def read(self, size=-1):
+        while True:
+            data = self._raw.read(size)
+            text = self._decoder.decode(data, final=not data)
+            # A chunk holding only part of a character decodes to ''
+            if text or not data:
+                return text
+
+
+def _gunzip_command(path):
+    for command in GUNZIP_COMMANDS:
+        executable = shutil.which(command[0])
+        if executable:
+            return [executable, *command[1:], str(path)]
+    return None
+
+
+@contextmanager
+def open_archive_member(path, member=DUMP_MEMBER, external=True):
+    """
+    Yield a binary stream of the first file in a tar backup matching ``member``
+
+    The archive is read strictly front to back (``tarfile`` stream mode), so
+    nothing is written to disk and members before the dump are skipped
+    without being buffered. Gzipped archives go through ``pigz`` when it is
+    on PATH and ``external`` is set, otherwise through ``zlib`` in-process.
+    """
+    path = str(path)
+    gzipped = not path.lower().endswith('.tar')
+    command = _gunzip_command(path) if gzipped and external else None
+    proc = None
+    if command:
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=DEFAULT_CHUNK_SIZE)
+        tar = tarfile.open(fileobj=proc.stdout, mode='r|')
+    else:
+        tar = tarfile.open(path, mode='r|gz' if gzipped else 'r|')
+    try:
+        for info in tar:
+            if info.isfile() and fnmatch(info.name, member):
+                yield tar.extractfile(info)
+                return
+        raise FileNotFoundError(f"No member matching {member!r} in {path}")
+    finally:
+        tar.close()
+        if proc is not None:
+            proc.stdout.close()
+            # The rest of the archive is not needed
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+
+def parse_columns(header):
+    """Turn a ``(`a`, `b`)`` column list into a tuple of names"""
+    if header is None:
+        return None
+    return tuple(col.strip().strip('`') for col in _as_str(header).split(','))
+
+
+def literal_end(text, pos):
+    """Index just past the quoted literal starting at ``text[pos]``"""
+    syntax = _syntax_for(text)
+    match = syntax.literal[text[pos:pos + 1]].match(text, pos)
+    return match.end() if match else len(text)
+
+
+def iter_row_spans(block):
+    """
+    Yield ``(start, end)`` of the text inside each top-level ``(...)`` row
+
+    Jumps from delimiter to delimiter and over whole string literals instead
+    of looking at every character.
+    """
+    syntax = _syntax_for(block)
+    depth = 0
+    start = None
+    pos = 0
+    while True:
+        hit = syntax.row_delim.search(block, pos)
+        if hit is None:
+            return
+        i = hit.start()
+        ch = block[i:i + 1]
+        if ch == syntax.lparen:
+            if depth == 0:
+                start = i + 1
+            depth += 1
+            pos = i + 1
+        elif ch == syntax.rparen:
+            depth -= 1
+            pos = i + 1
+            if depth == 0 and start is not None:
+                yield start, i
+        else:
+            pos = literal_end(block, i)
+
+
+def split_rows(block):
+    """Split a VALUES block into the inner text of each row"""
+    return [block[start:end] for start, end in iter_row_spans(block)]
+
+
+def split_values(row):
+    """Split the inner text of a row into raw SQL literals"""
+    syntax = _syntax_for(row)
+    values = []
+    start = pos = 0
+    while True:
+        hit = syntax.value_delim.search(row, pos)
+        if hit is None:
+            values.append(row[start:].strip())
+            return values
+        i = hit.start()
+        if row[i:i + 1] == syntax.comma:
+            values.append(row[start:i].strip())
+            start = pos = i + 1
+        else:
+            pos = literal_end(row, i)
+
+
+def iter_rows(source, tables=None, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """
+    Yield ``(table, columns, values)`` for every row in a mysqldump file
+
+    ``source`` is a path or an open file (text or binary). ``tables``
+    optionally limits the events to a set of table names (rows of other
+    tables are still scanned, just not sliced out). ``columns`` is ``None``
+    when the INSERT has no column list. ``stats``, an
+    ``instrumentation.PipelineStats``, gets the tokenizer's stage timings
+    and per-table counters.
+    """
+    if hasattr(source, 'read'):
+        yield from scan_dump(source, tables, chunk_size, stats=stats)
+        return
+    with open_dump(source) as fh:
+        yield from scan_dump(fh, tables, chunk_size, stats=stats)
+
+
+def scan_dump(fh, tables=None, chunk_size=DEFAULT_CHUNK_SIZE, offsets=False, stats=None):
+    """
+    Tokenizer behind ``iter_rows``, reading from an open file
+
+    With ``offsets`` each event also carries the absolute position of its
+    statement's ``INSERT`` keyword and of the end of the row, in characters
+    for text files and bytes for binary ones.
+
+    With ``stats`` the time is split into ``read``, ``statement_scan``,
+    ``row_split`` and ``value_parse`` (time spent by the consumer between
+    rows is excluded) and rows, statements and size are counted per table.
+    Counters are flushed into ``stats`` when the scan ends or is abandoned.
+    """
+    wanted = set(tables) if tables is not None else None
+    timed = stats is not None
+    read = fh.read
+    if timed:
+        clock = time.perf_counter
+        # read seconds, then per-stage seconds; laps exclude time spent reading
+        spent = {'read': 0.0, 'statement_scan': 0.0, 'row_split': 0.0, 'value_parse': 0.0}
+        counters = {}
+        lap_started = clock()
+        lap_read = 0.0
+        bytes_read = 0
+
+        def read(size):
+            nonlocal bytes_read
+            started = clock()
+            chunk = fh.read(size)
+            spent['read'] += clock() - started
+            bytes_read += len(chunk)
+            return chunk
+
+        def lap(stage):
+            """Charge the time since the last lap, minus reads, to ``stage`` (None drops it)"""
+            nonlocal lap_started, lap_read
+            now = clock()
+            if stage is not None:
+                spent[stage] += now - lap_started - (spent['read'] - lap_read)
+            lap_started = now
+            lap_read = spent['read']
+
+    try:
+        yield from _scan(fh, read, wanted, chunk_size, offsets, lap if timed else None,
+                         counters if timed else None)
+        if timed:
+            # Searching past the last statement
+            lap('statement_scan')
+    finally:
+        if timed:
+            for stage, seconds in spent.items():
+                stats.add(stage, seconds)
+            stats.bytes_read += bytes_read
+            for table, (statements, rows, size) in counters.items():
+                stats.count(table, rows=rows, size=size, statements=statements)
+
+
+def _scan(fh, read, wanted, chunk_size, offsets, lap, counters):
+    """``scan_dump`` proper; ``lap`` and ``counters`` are None unless timed"""
+    timed = lap is not None
+    buf = read(chunk_size)
+    syntax = _syntax_for(buf)
+    base = 0
+    pos = 0
+    eof = not buf
+
+    def fill():
+        """Append the next chunk to the buffer; False once the file is exhausted"""
+        nonlocal buf, eof
+        if eof:
+            return False
+        chunk = read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf += chunk
+        return True
+
+    def compact():
+        """Drop everything before ``pos``; only called between rows"""
+        nonlocal buf, pos, base
+        if pos > chunk_size:
+            base += pos
+            buf = buf[pos:]
+            pos = 0
+
+    def skip_ws():
+        """Advance past whitespace; False if the dump ends first"""
+        nonlocal pos
+        while True:
+            pos = syntax.ws.match(buf, pos).end()
+            if pos < len(buf):
+                return True
+            if not fill():
+                return False
+
+    while True:
+        # Look for the next INSERT header
+        match = syntax.header.search(buf, pos)
+        if match is None:
+            if eof:
+                return
+            # Keep a possibly incomplete header at the end of the buffer
+            keep = buf.rfind(syntax.insert, pos)
+            if keep == -1 or len(buf) - keep > MAX_HEADER_SIZE:
+                keep = max(pos, len(buf) - len(syntax.insert))
+            pos = keep
+            compact()
+            fill()
+            continue
+
+        table = _as_str(match.group(1))
+        columns = parse_columns(match.group(2))
+        emit = wanted is None or table in wanted
+        statement_offset = base + match.start()
+        pos = match.end()
+        if timed:
+            lap('statement_scan')
+            counter = counters.get(table)
+            if counter is None:
+                counter = counters[table] = [0, 0, 0]
+            counter[0] += 1
+
+        # Walk the rows of this statement
+        while True:
+            compact()
+            if not skip_ws():
+                return
+            ch = buf[pos:pos + 1]
+            if ch == syntax.comma:
+                pos += 1
+                continue
+            if ch != syntax.lparen:
+                # ';' ends the statement; anything else is malformed and we
+                # fall back to searching for the next header
+                if ch == syntax.semicolon:
+                    pos += 1
+                if timed:
+                    lap('row_split')
+                break
+            if timed:
+                lap('row_split')
+                row_start = base + pos
+            pos += 1
+
+            values = []
+            while True:
+                if not skip_ws():
+                    return
+                ch = buf[pos:pos + 1]
+                special = syntax.quote_special.get(ch)
+                if special is not None:
+                    start = pos
+                    scan = pos + 1
+                    while True:
+                        hit = special.search(buf, scan)
+                        if hit is None:
+                            scan = len(buf)
+                            if not fill():
+                                return
+                            continue
+                        i = hit.start()
+                        # Escapes and doubled quotes need one char of lookahead
+                        if i + 1 >= len(buf) and fill():
+                            scan = i
+                            continue
+                        if buf[i:i + 1] == syntax.backslash:
+                            scan = i + 2
+                            continue
+                        if buf[i + 1:i + 2] == ch:
+                            scan = i + 2
+                            continue
+                        pos = i + 1
+                        break
+                    if emit:
+                        values.append(buf[start:pos])
+                else:
+                    start = pos
+                    while True:
+                        hit = syntax.bare_end.search(buf, pos)
+                        if hit is not None:
+                            break
+                        if not fill():
+                            return
+                    pos = hit.start()
+                    if emit:
+                        values.append(buf[start:pos].strip())
+
+                if not skip_ws():
+                    return
+                ch = buf[pos:pos + 1]
+                pos += 1
+                if ch == syntax.comma:
+                    continue
+                if ch == syntax.rparen:
+                    break
+                # Unexpected character inside a row: abandon the statement
+                values = None
+                break
+
+            if timed:
+                lap('value_parse')
+                counter[1] += 1
+                counter[2] += base + pos - row_start
+            if values is None:
+                break
+            if emit:
+                if offsets:
+                    yield table, columns, tuple(values), statement_offset, base + pos
+                else:
+                    yield table, columns, tuple(values)
+                if timed:
+                    # Restart the clock: the consumer's time is not ours
+                    lap(None)
+
+
+@contextmanager
+def map_dump(path):
+    """Memory-map a dump read-only; yields ``b''`` for an empty file"""
+    if is_archive(path):
+        raise ValueError(f"{path} is an archive; random access needs the extracted .sql file")
+    with open(path, 'rb') as fh:
+        try:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            yield b''
+            return
+        try:
+            yield mapped
+        finally:
+            try:
+                mapped.close()
+            except BufferError:
+                # A caller still holds a memoryview; the mapping is released with it
+                pass
+
+
+def iter_value_spans(buf, tables=None):
+    """
+    Yield ``(table, columns, spans)`` for every row in an in-memory dump
+
+    ``buf`` is anything ``re`` can search without copying (``bytes``, an
+    ``mmap``). ``spans`` holds the ``(start, end)`` offsets of each raw
+    literal, so callers slice and decode only the values they need.
+    """
+    syntax = _syntax_for(buf)
+    wanted = set(tables) if tables is not None else None
+    pos = 0
+    while True:
+        match = syntax.header.search(buf, pos)
+        if match is None:
+            return
+        table = _as_str(match.group(1))
+        columns = parse_columns(match.group(2))
+        emit = wanted is None or table in wanted
+        pos = match.end()
+
+        while True:
+            pos = syntax.ws.match(buf, pos).end()
+            ch = buf[pos:pos + 1]
+            if ch == syntax.comma:
+                pos += 1
+                continue
+            if ch != syntax.lparen:
+                if ch == syntax.semicolon:
+                    pos += 1
+                break
+            pos += 1
+
+            spans = []
+            start = pos
+            while True:
+                hit = syntax.row_value_delim.search(buf, pos)
+                if hit is None:
+                    return
+                i = hit.start()
+                ch = buf[i:i + 1]
+                if ch in syntax.literal:
+                    pos = literal_end(buf, i)
+                    continue
+                spans.append(_trim_span(buf, start, i))
+                pos = start = i + 1
+                if ch == syntax.rparen:
+                    break
+            if emit:
+                yield table, columns, spans
+
+
+def _trim_span(buf, start, end):
+    """Shrink ``(start, end)`` to exclude surrounding whitespace"""
+    while start < end and buf[start:start + 1].isspace():
+        start += 1
+    while end > start and buf[end - 1:end].isspace():
+        end -= 1
+    return start, end
+
+
+def iter_mapped_rows(buf, table, columns):
+    """
+    Yield a tuple of ``memoryview`` slices, one per requested column, for
+    each row of ``table``
+
+    Nothing is copied or decoded; rows whose INSERT lacks a column list or
+    whose width does not match it are skipped.
+    """
+    view = memoryview(buf)
+    positions = None
+    last_columns = None
+    for _, row_columns, spans in iter_value_spans(buf, tables={table}):
+        if row_columns is None or len(spans) != len(row_columns):
+            continue
+        if row_columns is not last_columns:
+            last_columns = row_columns
+            positions = [row_columns.index(name) for name in columns]
+        yield tuple(view[spans[i][0]:spans[i][1]] for i in positions)
+
+
+def main():
+    import argparse
+    from collections import Counter
+
+    parser = argparse.ArgumentParser(description="Count rows per table in a mysqldump file")
+    parser.add_argument("sql_file", help="Path to the .sql dump or a .tar.gz backup containing it")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Read size in characters")
+    args = parser.parse_args()
+
+    counts = Counter(table for table, _, _ in iter_rows(args.sql_file, chunk_size=args.chunk_size))
+    for table, count in sorted(counts.items()):
+        print(f"{table}\t{count}")
+
+
+if __name__ == '__main__':
+    main()
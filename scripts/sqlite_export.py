@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Load the WordPress tables of a SQL dump into a local SQLite database
+
+Every row of the registered tables (see ``wp_schema``) is stored under the
+original WordPress column names, unfiltered, in a table named without the
+``_3YO_`` prefix (``posts``, ``postmeta``, ...). Integer columns become
+INTEGER, everything else TEXT decoded like the extractors do (HTML entities
+only in the HTML columns).
+
+The load runs with journaling and fsync off, in transactions of
+``COMMIT_EVERY`` rows fed through ``executemany``; indexes are built once at
+the end. The database is written to a temporary file and renamed into place,
+so an interrupted load never leaves a half-filled database behind.
+
+Usage: python3 -m scripts.sqlite_export <sql_file> <out.db> [--tables options,usermeta]
+"""
+
+import os
+import sqlite3
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+from scripts.sqldump import iter_rows
+from scripts.wp_schema import TABLES, html_text, integer, text
+
+TABLE_PREFIX = '_3YO_'
+
+DEFAULT_TABLES = ('posts', 'users', 'comments', 'terms', 'term_taxonomy', 'term_relationships', 'postmeta')
+
+# Rows handed to executemany at once, and rows per transaction
+INSERT_BATCH_SIZE = 5_000
+COMMIT_EVERY = 200_000
+
+# Tables whose first column is not unique
+NO_PRIMARY_KEY = frozenset({'term_relationships'})
+
+# Built after the load
+INDEXES = {
+    'posts': [('post_name',), ('post_type', 'post_status'), ('post_parent',)],
+    'postmeta': [('post_id', 'meta_key')],
+    'term_relationships': [('object_id',)],
+    'term_taxonomy': [('term_id',)],
+    'comments': [('comment_post_ID',)],
+    'usermeta': [('user_id', 'meta_key')],
+}
+
+
+def column_types(name):
+    """``{column: converter}`` for every stock column of a table"""
+    converters = {field.column: field.convert for field in TABLES[name].fields}
+    return {
+        column: converters[column] if converters.get(column) in (integer, html_text) else text
+        for column in TABLES[name].columns
+    }
+
+
+def create_table_sql(name):
+    types = column_types(name)
+    columns = [
+        f'"{column}" {"INTEGER" if convert is integer else "TEXT"}'
+        for column, convert in types.items()
+    ]
+    if name not in NO_PRIMARY_KEY:
+        columns[0] += ' PRIMARY KEY'
+    return f'CREATE TABLE "{name}" ({", ".join(columns)})'
+
+
+def create_index_sql(name, columns):
+    index_name = f'idx_{name}_' + '_'.join(columns)
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    return f'CREATE INDEX "{index_name}" ON "{name}" ({column_list})'
+
+
+def insert_sql(name):
+    columns = TABLES[name].columns
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    placeholders = ', '.join('?' for _ in columns)
+    # Dumps occasionally repeat a row; keep the last one
+    verb = 'INSERT' if name in NO_PRIMARY_KEY else 'INSERT OR REPLACE'
+    return f'{verb} INTO "{name}" ({column_list}) VALUES ({placeholders})'
+
+
+@lru_cache(maxsize=None)
+def compile_row(name, columns=None):
+    """
+    Return ``convert(values) -> tuple or None`` giving one row in the table's
+    stock column order; columns missing from the statement are NULL
+    """
+    stock = TABLES[name].columns
+    columns = tuple(columns) if columns is not None else stock
+    width = len(columns)
+    position = {column: i for i, column in enumerate(columns)}
+    types = column_types(name)
+    plan = [(position.get(column), types[column]) for column in stock]
+
+    def convert(values):
+        if len(values) != width:
+            return None
+        row = []
+        for index, converter in plan:
+            if index is None:
+                row.append(None)
+                continue
+            raw = values[index]
+            row.append(None if len(raw) == 4 and raw.upper() == 'NULL' else converter(raw))
+        return tuple(row)
+
+    return convert
+
+
+def load_dump(sql_file, db_path, table_names=DEFAULT_TABLES, prefix=TABLE_PREFIX):
+    """
+    Load ``table_names`` from ``sql_file`` into a new database at ``db_path``
+
+    Returns the number of rows loaded per table.
+    """
+    db_path = Path(db_path)
+    tmp_path = db_path.with_name(db_path.name + '.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    table_names = list(table_names)
+    routes = {f'{prefix}{name}': name for name in table_names}
+    counts = dict.fromkeys(table_names, 0)
+
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-262144')
+        for name in table_names:
+            conn.execute(create_table_sql(name))
+
+        pending = defaultdict(list)
+        statements = {name: insert_sql(name) for name in table_names}
+        since_commit = 0
+
+        def flush(name):
+            conn.executemany(statements[name], pending[name])
+            pending[name].clear()
+
+        conn.execute('BEGIN')
+        for table, columns, values in iter_rows(sql_file, tables=routes):
+            name = routes[table]
+            row = compile_row(name, columns)(values)
+            if row is None:
+                continue
+            batch = pending[name]
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                flush(name)
+            since_commit += 1
+            if since_commit >= COMMIT_EVERY:
+                conn.execute('COMMIT')
+                conn.execute('BEGIN')
+                since_commit = 0
+        for name in list(pending):
+            flush(name)
+        conn.execute('COMMIT')
+        # INSERT OR REPLACE drops repeated rows, so count what was kept
+        for name in table_names:
+            counts[name] = conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+
+        for name in table_names:
+            for columns in INDEXES.get(name, ()):
+                conn.execute(create_index_sql(name, columns))
+        conn.execute('ANALYZE')
+        conn.execute('PRAGMA journal_mode=DELETE')
+    except BaseException:
+        conn.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    conn.close()
+    os.replace(tmp_path, db_path)
+    return counts
+
+
+def connect(db_path):
+    """Open a loaded database read-only, with rows addressable by column name"""
+    conn = sqlite3.connect(f'file:{Path(db_path).resolve()}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def select_rows(db_path, table, columns=None, where=None):
+    """
+    Return rows of ``table`` as dicts
+
+    ``where`` maps a column to a value or a tuple of accepted values, the same
+    shape ``parse_posts.query_posts`` takes; callables are applied in Python.
+    """
+    clauses = []
+    params = []
+    predicates = []
+    for column, accepted in (where or {}).items():
+        if callable(accepted):
+            predicates.append((column, accepted))
+        elif isinstance(accepted, (tuple, list, set, frozenset)):
+            clauses.append(f'"{column}" IN ({", ".join("?" for _ in accepted)})')
+            params.extend(accepted)
+        else:
+            clauses.append(f'"{column}" = ?')
+            params.append(accepted)
+
+    wanted = list(columns) if columns is not None else None
+    selected = list(wanted or ())
+    selected += [column for column, _ in predicates if wanted is not None and column not in wanted]
+    column_list = ', '.join(f'"{column}"' for column in selected) if wanted is not None else '*'
+    sql = f'SELECT {column_list} FROM "{table}"'
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+
+    rows = []
+    with connect(db_path) as conn:
+        for row in conn.execute(sql, params):
+            if not all(predicate(row[column]) for column, predicate in predicates):
+                continue
+            keys = wanted if wanted is not None else row.keys()
+            rows.append({key: row[key] for key in keys})
+    return rows
+
+
+def main():
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Load WordPress tables from a SQL dump into SQLite")
+    parser.add_argument("sql_file", help="Path to the .sql dump or a .tar.gz backup containing it")
+    parser.add_argument("db", help="SQLite database to create (replaced if it exists)")
+    parser.add_argument("--tables", default='', help="Extra registered tables to load, e.g. options,usermeta")
+    args = parser.parse_args()
+
+    extra_tables = [name for name in args.tables.split(',') if name]
+    unknown = [name for name in extra_tables if name not in TABLES]
+    if unknown:
+        print(f"Error: Unknown table(s): {', '.join(unknown)}. Known: {', '.join(TABLES)}")
+        sys.exit(1)
+    if not Path(args.sql_file).exists():
+        print(f"Error: File not found: {args.sql_file}")
+        sys.exit(1)
+
+    table_names = list(DEFAULT_TABLES) + [name for name in extra_tables if name not in DEFAULT_TABLES]
+    started = time.perf_counter()
+    counts = load_dump(args.sql_file, args.db, table_names)
+    elapsed = time.perf_counter() - started
+    for name, count in counts.items():
+        print(f"{name}\t{count}")
+    print(f"✓ Loaded {sum(counts.values())} rows into {args.db} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic WordPress dumps for benchmarking the extractors
+
+Writes a mysqldump-style file shaped like the real backup: tables in
+mysqldump's alphabetical order, ``CREATE TABLE`` statements, and extended
+INSERTs of up to ``STATEMENT_BYTES`` each with column lists. Every published
+post or page is followed by what WordPress piles up around it: a dozen or so
+revisions of the body, sometimes an autosave or a draft, a few attachments,
+and postmeta rows (edit locks, thumbnails, serialized attachment metadata,
+SEO fields). Bodies are Gutenberg HTML with escaped quotes, backslashes,
+newlines, accents and emoji.
+
+The same ``size`` and ``seed`` always give the same bytes. A manifest with
+the row count of every table is written next to the dump as
+``<dump>.manifest.json``.
+
+Usage: python3 -m scripts.synthetic_dump out.sql --size 100MB [--seed 0]
+"""
+
+import json
+import os
+import random
+from pathlib import Path
+
+GENERATOR_VERSION = 1
+
+TABLE_PREFIX = '_3YO_'
+
+# mysqldump starts a new INSERT once a statement reaches net_buffer_length
+STATEMENT_BYTES = 1024 * 1024
+
+POSTS_COLUMNS = (
+    'ID', 'post_author', 'post_date', 'post_date_gmt', 'post_content', 'post_title',
+    'post_excerpt', 'post_status', 'comment_status', 'ping_status', 'post_password',
+    'post_name', 'to_ping', 'pinged', 'post_modified', 'post_modified_gmt',
+    'post_content_filtered', 'post_parent', 'guid', 'menu_order', 'post_type',
+    'post_mime_type', 'comment_count',
+)
+POSTMETA_COLUMNS = ('meta_id', 'post_id', 'meta_key', 'meta_value')
+COMMENTS_COLUMNS = (
+    'comment_ID', 'comment_post_ID', 'comment_author', 'comment_author_email',
+    'comment_author_url', 'comment_author_IP', 'comment_date', 'comment_date_gmt',
+    'comment_content', 'comment_karma', 'comment_approved', 'comment_agent',
+    'comment_type', 'comment_parent', 'user_id',
+)
+
+SITE_URL = 'https://womanandbusiness.com'
+
+PARAGRAPHS = (
+    'Conciliación, liderazgo y "empresa": it\'s a <a href="{site}/?p={n}">enlace</a> (con paréntesis), comas; y punto y coma.',
+    '¿Qué me hago? Es la pregunta que más me hacen mis amigas 😀 y la respuesta siempre es la misma: <strong>empieza por la piel</strong>.',
+    'Las mujeres directivas representan el {n}% del comité; "no es suficiente", dice la autora \\ y añade un matiz.',
+    'El <em>liderazgo femenino</em> en tiempos de crisis 💪🏽 requiere empatía, resiliencia & visión a largo plazo.',
+    'Según el estudio de ESADE (2019), la brecha salarial sigue siendo del {n}%: <a href="https://es.wikipedia.org/wiki/Brecha">fuente</a>.',
+    'Trabajar desde casa con niños no es fácil… pero se puede 👩‍💻 con horarios claros y objetivos "realistas".',
+)
+HEADINGS = ('¿Por qué es importante?', 'Mis 5 claves', 'Conclusión', 'El dilema de la maternidad', 'Y ahora, ¿qué?')
+
+META_KEYS = (
+    ('_edit_lock', lambda rng, n: f'{1_550_000_000 + n}:1'),
+    ('_edit_last', lambda rng, n: '1'),
+    ('_yoast_wpseo_metadesc', lambda rng, n: f'Descripción SEO del artículo {n}: "liderazgo", belleza & empresa 😀'),
+    ('_yoast_wpseo_focuskw', lambda rng, n: rng.choice(('liderazgo', 'belleza', 'mujer directiva', 'conciliación'))),
+    ('_wp_page_template', lambda rng, n: 'default'),
+    ('_jetpack_related_posts_cache', lambda rng, n: 'a:1:{s:32:"' + f'{n:032x}' + '";a:2:{s:7:"expires";i:1589000000;s:7:"payload";a:0:{}}}'),
+)
+
+
+def escape(value):
+    return (value.replace('\\', '\\\\').replace("'", "\\'")
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def quote(value):
+    return f"'{escape(value)}'"
+
+
+def parse_size(text):
+    """``'10MB'``, ``'1GB'``, ``'500kb'`` or plain bytes"""
+    text = text.strip().upper()
+    for suffix, factor in (('GB', 1 << 30), ('MB', 1 << 20), ('KB', 1 << 10), ('B', 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+def make_body(rng, length):
+    """Gutenberg HTML of roughly ``length`` characters"""
+    blocks = []
+    size = 0
+    while size < length:
+        roll = rng.random()
+        if roll < 0.1:
+            block = f'<!-- wp:heading -->\n<h2>{rng.choice(HEADINGS)}</h2>\n<!-- /wp:heading -->'
+        elif roll < 0.15:
+            n = rng.randint(1, 999)
+            block = (f'<!-- wp:image {{"id":{n}}} -->\n<figure class="wp-block-image"><img src="{SITE_URL}/wp-content/'
+                     f'uploads/2019/{n % 12 + 1:02d}/foto-{n}.jpg" alt="" class="wp-image-{n}"/></figure>\n<!-- /wp:image -->')
+        else:
+            text = rng.choice(PARAGRAPHS).format(site=SITE_URL, n=rng.randint(1, 999))
+            block = f'<!-- wp:paragraph -->\n<p>{text}</p>\n<!-- /wp:paragraph -->'
+        blocks.append(block)
+        size += len(block) + 2
+    return '\n\n'.join(blocks)
+
+
+def _date(n):
+    day = n % 28 + 1
+    month = n // 28 % 12 + 1
+    year = 2018 + n // 336 % 8
+    return f'{year}-{month:02d}-{day:02d} {n % 24:02d}:{n % 60:02d}:{n * 7 % 60:02d}'
+
+
+def plan_posts(target_bytes, rng):
+    """
+    Yield ``(id, type, status, parent, body length, name)`` rows until their
+    estimated size in the dump reaches ``target_bytes``
+    """
+    post_id = 0
+    estimated = 0
+    while estimated < target_bytes:
+        post_id += 1
+        parent = post_id
+        kind = 'post' if rng.random() < 0.85 else 'page'
+        status = 'publish' if rng.random() < 0.9 else rng.choice(('draft', 'private'))
+        body = min(int(rng.lognormvariate(8.6, 0.7)), 200_000)
+        name = f'{kind}-{parent}'
+        rows = [(parent, kind, status, 0, body, name)]
+        for _ in range(rng.randint(0, 14)):
+            body = max(200, body + rng.randint(-800, 1200))
+            rows.append((None, 'revision', 'inherit', parent, body, f'{parent}-revision-v1'))
+        if rng.random() < 0.3:
+            rows.append((None, 'revision', 'inherit', parent, body, f'{parent}-autosave-v1'))
+        for attachment in range(rng.randint(0, 4)):
+            rows.append((None, 'attachment', 'inherit', parent, 0, f'foto-{parent}-{attachment}'))
+        for row in rows:
+            if row[0] is None:
+                post_id += 1
+                row = (post_id,) + row[1:]
+            estimated += row[4] * 1.05 + 420
+            yield row
+
+
+def post_values(rng, row):
+    post_id, kind, status, parent, body_length, name = row
+    date = _date(post_id)
+    title = f'Título {post_id}: "mujer & empresa" it\'s 😀'
+    mime = ''
+    if kind == 'attachment':
+        content = ''
+        mime = 'image/jpeg'
+        guid = f'{SITE_URL}/wp-content/uploads/2019/{post_id % 12 + 1:02d}/foto-{post_id}.jpg'
+    else:
+        content = make_body(rng, body_length)
+        guid = f'{SITE_URL}/?p={post_id}'
+    excerpt = 'Un resumen con "comillas" y acentos: ñandú' if kind == 'post' and rng.random() < 0.3 else ''
+    return (
+        str(post_id), '1', quote(date), quote(date), quote(content), quote(title),
+        quote(excerpt), quote(status), "'open'", "'open'", "''",
+        quote(name), "''", "''", quote(date), quote(date),
+        "''", str(parent), quote(guid), '0', quote(kind),
+        quote(mime), str(rng.randint(0, 12) if kind == 'post' else 0),
+    )
+
+
+def meta_rows(rng, row):
+    """``(post_id, key, value)`` postmeta for one posts row"""
+    post_id, kind, status, parent, _, _ = row
+    if kind == 'attachment':
+        path = f'2019/{post_id % 12 + 1:02d}/foto-{post_id}.jpg'
+        sizes = ''.join(
+            f's:{len(size)}:"{size}";a:4:{{s:4:"file";s:{len(path) + 9}:"foto-{post_id}-{w}x{w}.jpg";'
+            f's:5:"width";i:{w};s:6:"height";i:{w};s:9:"mime-type";s:10:"image/jpeg";}}'
+            for size, w in (('thumbnail', 150), ('medium', 300), ('large', 1024))
+        )
+        yield post_id, '_wp_attached_file', path
+        yield post_id, '_wp_attachment_metadata', (
+            f'a:4:{{s:5:"width";i:1600;s:6:"height";i:1067;s:4:"file";s:{len(path)}:"{path}";'
+            f's:5:"sizes";a:3:{{{sizes}}}}}'
+        )
+    elif kind in ('post', 'page'):
+        for key, value in META_KEYS:
+            if rng.random() < 0.7:
+                yield post_id, key, value(rng, post_id)
+        if kind == 'post':
+            yield post_id, '_thumbnail_id', str(post_id + 1)
+
+
+class _InsertWriter:
+    """Extended INSERTs for one table, split like mysqldump does"""
+
+    def __init__(self, fh, table, columns):
+        self.fh = fh
+        self.head = f"INSERT INTO `{TABLE_PREFIX}{table}` ({', '.join(f'`{c}`' for c in columns)}) VALUES "
+        self.size = 0
+        self.rows = 0
+
+    def add(self, values):
+        row = '(' + ','.join(values) + ')'
+        if self.size and self.size + len(row) > STATEMENT_BYTES:
+            self.fh.write(';\n')
+            self.size = 0
+        if not self.size:
+            self.fh.write(self.head)
+            self.size = len(self.head)
+        else:
+            self.fh.write(',')
+        self.fh.write(row)
+        self.size += len(row) + 1
+        self.rows += 1
+
+    def close(self):
+        if self.size:
+            self.fh.write(';\n')
+        self.size = 0
+
+
+def _create_table(fh, table, columns):
+    fh.write(f'\n--\n-- Table structure for table `{TABLE_PREFIX}{table}`\n--\n\n')
+    fh.write(f'DROP TABLE IF EXISTS `{TABLE_PREFIX}{table}`;\n')
+    body = ',\n'.join(f'  `{column}` longtext' for column in columns)
+    fh.write(f'CREATE TABLE `{TABLE_PREFIX}{table}` (\n{body}\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;\n')
+    fh.write(f'\n--\n-- Dumping data for table `{TABLE_PREFIX}{table}`\n--\n\n')
+    fh.write(f'LOCK TABLES `{TABLE_PREFIX}{table}` WRITE;\n')
+
+
+def write_dump(path, size, seed=0):
+    """
+    Write a synthetic dump of about ``size`` bytes to ``path``
+
+    Returns the manifest (also saved as ``<path>.manifest.json``).
+    """
+    path = Path(path)
+    plan = list(plan_posts(size, random.Random(seed)))
+    published = [row for row in plan if row[1] in ('post', 'page') and row[2] == 'publish']
+    counts = {}
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8', newline='\n') as fh:
+        fh.write('-- MySQL dump 10.13  Distrib 5.7.44, for Linux (x86_64)\n--\n')
+        fh.write('/*!40101 SET NAMES utf8mb4 */;\n/*!40014 SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0 */;\n')
+
+        # mysqldump order: comments, postmeta, posts, term_*, terms, users
+        _create_table(fh, 'comments', COMMENTS_COLUMNS)
+        writer = _InsertWriter(fh, 'comments', COMMENTS_COLUMNS)
+        rng = random.Random(seed + 1)
+        comment_id = 0
+        for row in published:
+            for _ in range(rng.randint(0, 3)):
+                comment_id += 1
+                date = _date(comment_id)
+                writer.add((
+                    str(comment_id), str(row[0]), quote(f'Lectora {comment_id}'), quote(f'lectora{comment_id}@example.com'),
+                    "''", "'127.0.0.1'", quote(date), quote(date),
+                    quote('¡Me ha encantado! "Gracias" por compartirlo 😍\nUn saludo'), '0',
+                    quote('1' if rng.random() < 0.8 else '0'), "'Mozilla/5.0'", "'comment'", '0', '0',
+                ))
+        writer.close()
+        counts['comments'] = writer.rows
+        fh.write('UNLOCK TABLES;\n')
+
+        _create_table(fh, 'postmeta', POSTMETA_COLUMNS)
+        writer = _InsertWriter(fh, 'postmeta', POSTMETA_COLUMNS)
+        rng = random.Random(seed + 2)
+        meta_id = 0
+        for row in plan:
+            for post_id, key, value in meta_rows(rng, row):
+                meta_id += 1
+                writer.add((str(meta_id), str(post_id), quote(key), quote(value)))
+        writer.close()
+        counts['postmeta'] = writer.rows
+        fh.write('UNLOCK TABLES;\n')
+
+        _create_table(fh, 'posts', POSTS_COLUMNS)
+        writer = _InsertWriter(fh, 'posts', POSTS_COLUMNS)
+        rng = random.Random(seed + 3)
+        for row in plan:
+            writer.add(post_values(rng, row))
+        writer.close()
+        counts['posts'] = writer.rows
+        fh.write('UNLOCK TABLES;\n')
+
+        small = {
+            'term_relationships': (('object_id', 'term_taxonomy_id', 'term_order'),
+                                   [(str(row[0]), str(row[0] % 8 + 1), '0') for row in published if row[1] == 'post']),
+            'term_taxonomy': (('term_taxonomy_id', 'term_id', 'taxonomy', 'description', 'parent', 'count'),
+                              [(str(i), str(i), quote('category' if i <= 5 else 'post_tag'), "''", '0', '0')
+                               for i in range(1, 9)]),
+            'terms': (('term_id', 'name', 'slug', 'term_group'),
+                      [(str(i), quote(name), quote(name.lower().replace(' ', '-')), '0')
+                       for i, name in enumerate(('Liderazgo', 'Belleza', 'Empresa', 'Maternidad', 'Salud',
+                                                 'Mujer', 'Directivas', 'Covid'), 1)]),
+            'users': (('ID', 'user_login', 'user_pass', 'user_nicename', 'user_email', 'user_url',
+                       'user_registered', 'user_activation_key', 'user_status', 'display_name'),
+                      [('1', "'admin'", "'$P$Bxxxxxxxxxxxxxxxxxxxxxxxxxxxx'", "'admin'", "'admin@example.com'", "''",
+                        "'2018-11-18 12:00:00'", "''", '0', "'María Cudeiro'")]),
+        }
+        for table, (columns, rows) in small.items():
+            _create_table(fh, table, columns)
+            writer = _InsertWriter(fh, table, columns)
+            for values in rows:
+                writer.add(values)
+            writer.close()
+            counts[table] = writer.rows
+            fh.write('UNLOCK TABLES;\n')
+        fh.write('-- Dump completed\n')
+    os.replace(tmp_path, path)
+
+    manifest = {
+        'version': GENERATOR_VERSION,
+        'seed': seed,
+        'target_bytes': size,
+        'bytes': path.stat().st_size,
+        'rows': counts,
+        'published': len(published),
+    }
+    with open(manifest_path(path), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
+
+
+def manifest_path(path):
+    return Path(path).with_name(Path(path).name + '.manifest.json')
+
+
+def ensure_dump(path, size, seed=0):
+    """``write_dump`` unless ``path`` already holds that size and seed; returns the manifest"""
+    try:
+        with open(manifest_path(path), encoding='utf-8') as fh:
+            manifest = json.load(fh)
+        if (manifest.get('version') == GENERATOR_VERSION and manifest.get('seed') == seed
+                and manifest.get('target_bytes') == size and Path(path).stat().st_size == manifest['bytes']):
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    return write_dump(path, size, seed)
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic WordPress SQL dump")
+    parser.add_argument("output", help="Dump file to write")
+    parser.add_argument("--size", default='10MB', help="Approximate size, e.g. 10MB, 100MB, 1GB")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    manifest = write_dump(args.output, parse_size(args.size), args.seed)
+    elapsed = time.perf_counter() - started
+    rows = ', '.join(f"{table} {count}" for table, count in manifest['rows'].items())
+    print(f"✓ Wrote {args.output}: {manifest['bytes'] / 1e6:.1f} MB ({rows}) in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
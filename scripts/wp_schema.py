@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Declarative registry of the WordPress tables the extractors understand
+
+Each table maps output keys to the column they come from and a typed
+converter. ``compile_table`` binds a schema to the column list of one INSERT
+statement, so positions are resolved once per statement (not per row) and
+every value is converted exactly once. Dumps written without column lists
+fall back to the stock WordPress column order.
+
+Supporting another table (options, usermeta, WooCommerce, ...) only takes a
+new ``TableSchema`` in ``TABLES``.
+
+String literals are decoded by ``unescape_literal`` in a single pass. Only
+columns holding HTML (``html_text``: post bodies, titles, comments, term
+names) also get their HTML entities decoded; dates, slugs, statuses and
+meta values are kept as stored.
+"""
+
+import html
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# One output key: ``key`` <- ``convert(raw literal of column)``, or ``default``
+# when the statement has no such column
+Field = namedtuple('Field', 'key column convert default')
+
+# ``columns`` is the stock column order used when an INSERT has no column
+# list; ``keep`` maps a column to the converted values a row must have
+TableSchema = namedtuple('TableSchema', 'columns fields keep')
+
+
+# MySQL string escapes and the doubled quote. Any other backslash sequence
+# is the character itself, except ``\\%`` and ``\\_`` which MySQL keeps
+# as written.
+_ESCAPES = {
+    '\\0': '\0',
+    "\\'": "'",
+    '\\"': '"',
+    '\\b': '\b',
+    '\\n': '\n',
+    '\\r': '\r',
+    '\\t': '\t',
+    '\\Z': '\x1a',
+    '\\\\': '\\',
+    '\\%': '\\%',
+    '\\_': '\\_',
+    "''": "'",
+}
+_ESCAPE = re.compile(r"\\.|''", re.DOTALL)
+
+# The escapes mysqldump writes inside text, resolved with str.replace
+_COMMON_ESCAPES = (("\\'", "'"), ('\\"', '"'), ('\\n', '\n'), ('\\r', '\r'), ('\\t', '\t'))
+
+
+def _escape(match):
+    sequence = match.group()
+    return _ESCAPES.get(sequence) or sequence[1]
+
+
+def _unescape_run(run):
+    """Decode a stretch of literal that contains no escaped backslash"""
+    if '\\' not in run and "''" not in run:
+        return run
+    if "''" not in run:
+        # Without ``\\\\`` every backslash starts an escape and no
+        # replacement makes a new one, so the order of these is irrelevant
+        decoded = run
+        for sequence, char in _COMMON_ESCAPES:
+            if sequence in decoded:
+                decoded = decoded.replace(sequence, char)
+        if '\\' not in decoded:
+            return decoded
+    return _ESCAPE.sub(_escape, run)
+
+
+def unescape_literal(raw):
+    """
+    Decode one raw SQL literal: ``'it\\'s'`` -> ``it's``, ``NULL`` -> ``''``
+
+    Escapes are resolved left to right (``\\\\'`` is a backslash and a
+    quote) through ``_ESCAPES``. The literal is cut at its escaped
+    backslashes and each stretch in between is decoded on its own, which
+    keeps the usual escapes on ``str.replace``; values with no backslash
+    or quote inside are only sliced.
+    """
+    if not raw or raw == 'NULL':
+        return ''
+    if raw[0] == "'" and raw[-1] == "'" and len(raw) > 1:
+        raw = raw[1:-1]
+    if '\\' not in raw and "''" not in raw:
+        return raw
+    if '\\\\' not in raw:
+        return _unescape_run(raw)
+    return '\\'.join([_unescape_run(run) for run in raw.split('\\\\')])
+
+
+def clean_content(content):
+    """
+    Clean WordPress content: decode the SQL literal, then its HTML entities
+    """
+    content = unescape_literal(content)
+    if '&' in content:
+        content = html.unescape(content)
+    return content
+
+
+def text(raw):
+    return unescape_literal(raw)
+
+
+def html_text(raw):
+    return clean_content(raw)
+
+
+def integer(raw):
+    value = raw.strip("'")
+    return int(value) if value.isdigit() else 0
+
+
+def flag(raw):
+    return raw.strip("'") == '1'
+
+
+def _fields(*specs):
+    return tuple(Field(*spec) for spec in specs)
+
+
+TABLES = {
+    'posts': TableSchema(
+        columns=(
+            'ID', 'post_author', 'post_date', 'post_date_gmt', 'post_content', 'post_title',
+            'post_excerpt', 'post_status', 'comment_status', 'ping_status', 'post_password',
+            'post_name', 'to_ping', 'pinged', 'post_modified', 'post_modified_gmt',
+            'post_content_filtered', 'post_parent', 'guid', 'menu_order', 'post_type',
+            'post_mime_type', 'comment_count',
+        ),
+        fields=_fields(
+            ('id', 'ID', integer, 0),
+            ('author_id', 'post_author', integer, 0),
+            ('date', 'post_date', text, ''),
+            ('date_gmt', 'post_date_gmt', text, ''),
+            ('content', 'post_content', html_text, ''),
+            ('title', 'post_title', html_text, ''),
+            ('excerpt', 'post_excerpt', html_text, ''),
+            ('status', 'post_status', text, 'draft'),
+            ('comment_status', 'comment_status', text, 'open'),
+            ('ping_status', 'ping_status', text, 'open'),
+            ('password', 'post_password', text, ''),
+            ('slug', 'post_name', text, ''),
+            ('modified', 'post_modified', text, ''),
+            ('modified_gmt', 'post_modified_gmt', text, ''),
+            ('parent', 'post_parent', integer, 0),
+            ('guid', 'guid', text, ''),
+            ('type', 'post_type', text, 'post'),
+            ('mime_type', 'post_mime_type', text, ''),
+            ('comment_count', 'comment_count', integer, 0),
+        ),
+        # Only posts and pages are written out
+        keep={'post_status': ('publish',), 'post_type': ('post', 'page')},
+    ),
+    'users': TableSchema(
+        columns=(
+            'ID', 'user_login', 'user_pass', 'user_nicename', 'user_email', 'user_url',
+            'user_registered', 'user_activation_key', 'user_status', 'display_name',
+        ),
+        fields=_fields(
+            ('id', 'ID', integer, 0),
+            ('login', 'user_login', text, ''),
+            ('password', 'user_pass', text, ''),
+            ('nicename', 'user_nicename', text, ''),
+            ('email', 'user_email', text, ''),
+            ('url', 'user_url', text, ''),
+            ('registered', 'user_registered', text, ''),
+            ('activation_key', 'user_activation_key', text, ''),
+            ('status', 'user_status', integer, 0),
+            ('display_name', 'display_name', html_text, ''),
+        ),
+        keep={},
+    ),
+    'comments': TableSchema(
+        columns=(
+            'comment_ID', 'comment_post_ID', 'comment_author', 'comment_author_email',
+            'comment_author_url', 'comment_author_IP', 'comment_date', 'comment_date_gmt',
+            'comment_content', 'comment_karma', 'comment_approved', 'comment_agent',
+            'comment_type', 'comment_parent', 'user_id',
+        ),
+        fields=_fields(
+            ('id', 'comment_ID', integer, 0),
+            ('post_id', 'comment_post_ID', integer, 0),
+            ('author', 'comment_author', html_text, ''),
+            ('author_email', 'comment_author_email', text, ''),
+            ('author_url', 'comment_author_url', text, ''),
+            ('author_ip', 'comment_author_IP', text, ''),
+            ('date', 'comment_date', text, ''),
+            ('date_gmt', 'comment_date_gmt', text, ''),
+            ('content', 'comment_content', html_text, ''),
+            ('karma', 'comment_karma', integer, 0),
+            ('approved', 'comment_approved', flag, False),
+            ('agent', 'comment_agent', text, ''),
+            ('type', 'comment_type', text, 'comment'),
+            ('parent', 'comment_parent', integer, 0),
+            ('user_id', 'user_id', integer, 0),
+        ),
+        keep={'comment_approved': (True,)},
+    ),
+    'terms': TableSchema(
+        columns=('term_id', 'name', 'slug', 'term_group'),
+        fields=_fields(
+            ('id', 'term_id', integer, 0),
+            ('name', 'name', html_text, ''),
+            ('slug', 'slug', text, ''),
+            ('group', 'term_group', integer, 0),
+        ),
+        keep={},
+    ),
+    'term_taxonomy': TableSchema(
+        columns=('term_taxonomy_id', 'term_id', 'taxonomy', 'description', 'parent', 'count'),
+        fields=_fields(
+            ('taxonomy_id', 'term_taxonomy_id', integer, 0),
+            ('term_id', 'term_id', integer, 0),
+            ('taxonomy', 'taxonomy', text, ''),
+            ('description', 'description', html_text, ''),
+            ('parent', 'parent', integer, 0),
+            ('count', 'count', integer, 0),
+        ),
+        keep={},
+    ),
+    'term_relationships': TableSchema(
+        columns=('object_id', 'term_taxonomy_id', 'term_order'),
+        fields=_fields(
+            ('object_id', 'object_id', integer, 0),
+            ('term_taxonomy_id', 'term_taxonomy_id', integer, 0),
+            ('term_order', 'term_order', integer, 0),
+        ),
+        keep={},
+    ),
+    'postmeta': TableSchema(
+        columns=('meta_id', 'post_id', 'meta_key', 'meta_value'),
+        fields=_fields(
+            ('meta_id', 'meta_id', integer, 0),
+            ('post_id', 'post_id', integer, 0),
+            ('meta_key', 'meta_key', text, ''),
+            ('meta_value', 'meta_value', text, ''),
+        ),
+        keep={},
+    ),
+    'usermeta': TableSchema(
+        columns=('umeta_id', 'user_id', 'meta_key', 'meta_value'),
+        fields=_fields(
+            ('meta_id', 'umeta_id', integer, 0),
+            ('user_id', 'user_id', integer, 0),
+            ('meta_key', 'meta_key', text, ''),
+            ('meta_value', 'meta_value', text, ''),
+        ),
+        keep={},
+    ),
+    'options': TableSchema(
+        columns=('option_id', 'option_name', 'option_value', 'autoload'),
+        fields=_fields(
+            ('id', 'option_id', integer, 0),
+            ('name', 'option_name', text, ''),
+            ('value', 'option_value', text, ''),
+            ('autoload', 'autoload', text, 'yes'),
+        ),
+        keep={},
+    ),
+    'woocommerce_order_items': TableSchema(
+        columns=('order_item_id', 'order_item_name', 'order_item_type', 'order_id'),
+        fields=_fields(
+            ('id', 'order_item_id', integer, 0),
+            ('name', 'order_item_name', text, ''),
+            ('type', 'order_item_type', text, ''),
+            ('order_id', 'order_id', integer, 0),
+        ),
+        keep={},
+    ),
+    'woocommerce_order_itemmeta': TableSchema(
+        columns=('meta_id', 'order_item_id', 'meta_key', 'meta_value'),
+        fields=_fields(
+            ('meta_id', 'meta_id', integer, 0),
+            ('order_item_id', 'order_item_id', integer, 0),
+            ('meta_key', 'meta_key', text, ''),
+            ('meta_value', 'meta_value', text, ''),
+        ),
+        keep={},
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def compile_keep(name, columns=None):
+    """
+    Return ``keep(values) -> bool``, the schema's ``keep`` filter on its own
+
+    Only the filter columns are converted, so callers can tell whether a row
+    would be written out without decoding the rest of it.
+    """
+    schema = TABLES[name]
+    columns = tuple(columns) if columns is not None else schema.columns
+    position = {column: i for i, column in enumerate(columns)}
+    converters = {field.column: field.convert for field in schema.fields}
+    filters = [
+        (position[column], converters.get(column, text), frozenset(allowed))
+        for column, allowed in schema.keep.items()
+        if column in position
+    ]
+
+    def keep(values):
+        return all(converter(values[index]) in allowed for index, converter, allowed in filters)
+
+    return keep
+
+
+@lru_cache(maxsize=None)
+def compile_table(name, columns=None, apply_keep=True):
+    """
+    Return ``convert(values) -> record or None`` for one statement's columns
+
+    Rows whose width differs from the column list, or that fail the schema's
+    ``keep`` filter, give None. Filter columns are converted first and their
+    values reused in the record. ``apply_keep=False`` converts every row
+    (revisions, drafts, ...).
+    """
+    schema = TABLES[name]
+    columns = tuple(columns) if columns is not None else schema.columns
+    width = len(columns)
+    position = {column: i for i, column in enumerate(columns)}
+    converters = {field.column: field.convert for field in schema.fields}
+
+    filters = []
+    for column, allowed in (schema.keep.items() if apply_keep else ()):
+        if column in position:
+            filters.append((position[column], converters.get(column, text), frozenset(allowed)))
+    filtered = {index for index, _, _ in filters}
+
+    fields = [
+        (field.key, position.get(field.column), field.convert, field.default)
+        for field in schema.fields
+    ]
+
+    def convert(values):
+        if len(values) != width:
+            return None
+        done = {}
+        for index, converter, allowed in filters:
+            value = converter(values[index])
+            if value not in allowed:
+                return None
+            done[index] = value
+        record = {}
+        for key, index, converter, default in fields:
+            if index is None:
+                record[key] = default
+            elif index in filtered:
+                record[key] = done[index]
+            else:
+                record[key] = converter(values[index])
+        return record
+
+    return convert
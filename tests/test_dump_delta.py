@@ -0,0 +1,119 @@
+"""scripts.dump_delta changesets between edited copies of a synthetic dump"""
+
+import tarfile
+
+import pytest
+
+from scripts.dump_delta import iter_changes
+from scripts.sqldump import iter_row_spans, iter_rows, split_values
+from scripts.synthetic_dump import POSTS_COLUMNS, TABLE_PREFIX, ensure_dump
+
+POSTS_INSERT = f'INSERT INTO `{TABLE_PREFIX}posts` '
+
+
+@pytest.fixture(scope='module')
+def old_dump(tmp_path_factory):
+    path = tmp_path_factory.mktemp('dumps') / 'old.sql'
+    ensure_dump(path, 300_000, seed=1)
+    return path
+
+
+def _posts(path):
+    """``{ID: {column: raw literal}}`` of the posts rows in a dump"""
+    return {
+        int(values[0]): dict(zip(columns, values))
+        for _, columns, values in iter_rows(path, tables={f'{TABLE_PREFIX}posts'})
+    }
+
+
+def _first(path, post_type, status):
+    return next(
+        post_id for post_id, row in _posts(path).items()
+        if row['post_type'] == f"'{post_type}'" and row['post_status'] == f"'{status}'"
+    )
+
+
+def edit_post(source, target, post_id, **literals):
+    """Copy ``source`` to ``target`` with raw literals of one posts row replaced"""
+    lines = source.read_text(encoding='utf-8').split('\n')
+    for number, line in enumerate(lines):
+        if not line.startswith(POSTS_INSERT):
+            continue
+        head, separator, block = line.partition(' VALUES ')
+        for start, end in iter_row_spans(block):
+            values = split_values(block[start:end])
+            if values[0] != str(post_id):
+                continue
+            for column, literal in literals.items():
+                values[POSTS_COLUMNS.index(column)] = literal
+            lines[number] = head + separator + block[:start] + ','.join(values) + block[end:]
+            target.write_text('\n'.join(lines), encoding='utf-8')
+            return target
+    raise AssertionError(f"post {post_id} not in {source}")
+
+
+def _changes(old, new):
+    return [change for change in iter_changes(old, new) if change['table'] == 'posts']
+
+
+def test_identical_dumps_give_no_changes(old_dump, tmp_path):
+    new = tmp_path / 'new.sql'
+    new.write_bytes(old_dump.read_bytes())
+    assert list(iter_changes(old_dump, new)) == []
+
+
+def test_unpublished_post_is_deleted(old_dump, tmp_path):
+    post_id = _first(old_dump, 'post', 'publish')
+    new = edit_post(old_dump, tmp_path / 'new.sql', post_id, post_status="'draft'")
+    [change] = _changes(old_dump, new)
+    assert (change['op'], change['key']) == ('delete', post_id)
+    # Read back from the old .sql dump in full
+    assert change['record']['id'] == post_id
+    assert change['record']['status'] == 'publish'
+    assert change['record']['slug'] == _posts(old_dump)[post_id]['post_name'].strip("'")
+
+
+def test_published_draft_is_inserted(old_dump, tmp_path):
+    post_id = _first(old_dump, 'post', 'publish')
+    draft = edit_post(old_dump, tmp_path / 'draft.sql', post_id, post_status="'draft'")
+    [change] = _changes(draft, old_dump)
+    assert (change['op'], change['key']) == ('insert', post_id)
+    assert change['record']['status'] == 'publish'
+
+
+def test_edited_post_is_updated(old_dump, tmp_path):
+    post_id = _first(old_dump, 'post', 'publish')
+    new = edit_post(old_dump, tmp_path / 'new.sql', post_id, post_title="'Nuevo título'")
+    [change] = _changes(old_dump, new)
+    assert (change['op'], change['key']) == ('update', post_id)
+    assert change['record']['title'] == 'Nuevo título'
+    assert 'previous' not in change
+
+
+def test_renamed_post_carries_its_previous_slug(old_dump, tmp_path):
+    post_id = _first(old_dump, 'post', 'publish')
+    old_slug = _posts(old_dump)[post_id]['post_name'].strip("'")
+    new = edit_post(old_dump, tmp_path / 'new.sql', post_id, post_name="'nuevo-slug'")
+    [change] = _changes(old_dump, new)
+    assert change['op'] == 'update'
+    assert change['record']['slug'] == 'nuevo-slug'
+    assert change['previous'] == {'slug': old_slug, 'type': 'post'}
+
+
+def test_revisions_are_ignored(old_dump, tmp_path):
+    post_id = _first(old_dump, 'revision', 'inherit')
+    new = edit_post(old_dump, tmp_path / 'new.sql', post_id, post_title="'Otra revisión'")
+    assert _changes(old_dump, new) == []
+
+
+def test_delete_from_archive_carries_slug_and_type(old_dump, tmp_path):
+    post_id = _first(old_dump, 'page', 'publish')
+    slug = _posts(old_dump)[post_id]['post_name'].strip("'")
+    archive = tmp_path / 'old.tar.gz'
+    with tarfile.open(archive, 'w:gz') as tar:
+        tar.add(old_dump, arcname='backup/mysql/site.sql')
+    new = edit_post(old_dump, tmp_path / 'new.sql', post_id, post_status="'private'")
+    [change] = _changes(archive, new)
+    assert (change['op'], change['key']) == ('delete', post_id)
+    # The archive cannot be read back by offset; the row hashes carry these
+    assert change['record'] == {'id': post_id, 'slug': slug, 'type': 'page'}
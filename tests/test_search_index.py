@@ -0,0 +1,96 @@
+"""scripts.search_index: postings encoding, BM25 scoring and the saved asset"""
+
+import json
+import math
+import random
+
+import pytest
+
+from scripts.search_index import FIELD_WEIGHTS, SearchIndex, _decode, _encode, analyze, term
+
+RECORDS = [
+    {'id': 10, 'type': 'post', 'slug': 'liderazgo', 'title': 'Liderazgo femenino',
+     'content': '<p>El <strong>liderazgo</strong> se aprende.</p>', 'excerpt': ''},
+    {'id': 11, 'type': 'post', 'slug': 'maternidad', 'title': 'Maternidad y empresa',
+     'content': '<!-- wp:paragraph --><p>Conciliación y liderazgo en casa.</p><!-- /wp:paragraph -->',
+     'excerpt': ''},
+    {'id': 12, 'type': 'page', 'slug': 'sobre-mi', 'title': 'Sobre mí',
+     'content': '<p>Emprendedoras que duermen bien.</p>', 'excerpt': 'Emprendedora'},
+]
+
+
+def test_encode_known_bytes():
+    # Gaps 0 and 300 (0xAC 0x02 as a varint), frequencies 1 and 2
+    assert _encode([(0, 1), (300, 2)]) == bytes([0x00, 0x01, 0xAC, 0x02, 0x02])
+
+
+def test_postings_round_trip():
+    rng = random.Random(0)
+    for _ in range(200):
+        doc = -1
+        postings = []
+        for _ in range(rng.randint(0, 50)):
+            doc += rng.choice((1, 2, 127, 128, 300, 16384, 2 ** 21 + 5))
+            postings.append((doc, rng.choice((1, 3, 127, 128, 65535))))
+        assert _decode(_encode(postings)) == postings
+
+
+def test_terms_are_stemmed_and_folded():
+    assert term('emprendedoras') == term('emprendedor') == 'emprendedor'
+    assert term('análisis') == term('analisis')
+    assert analyze('El y DE') == []
+
+
+def test_accent_less_spellings_are_aliased():
+    # Snowball strips -ación only with its accent
+    assert term('conciliación') != term('conciliacion')
+    index = SearchIndex.build(RECORDS)
+    assert index.aliases[term('conciliacion')] == [term('conciliación')]
+
+
+def test_bm25_scores():
+    index = SearchIndex.build(RECORDS)
+    value_term = term('liderazgo')
+    # Title words count FIELD_WEIGHTS['title'] times
+    assert index.postings(value_term) == [(0, FIELD_WEIGHTS['title'] + 1), (1, 1)]
+
+    count = len(RECORDS)
+    idf = math.log(1 + (count - 2 + 0.5) / (2 + 0.5))
+    avgdl = sum(index.lengths) / count
+    expected = {}
+    for doc, tf in index.postings(value_term):
+        norm = index.k1 * (1 - index.b + index.b * index.lengths[doc] / avgdl)
+        expected[RECORDS[doc]['id']] = idf * tf * (index.k1 + 1) / (tf + norm)
+
+    results = index.search('liderazgo')
+    assert [result['id'] for result in results] == [10, 11]
+    for result in results:
+        assert result['score'] == pytest.approx(expected[result['id']])
+
+
+def test_search_matches_inflections_and_accents():
+    index = SearchIndex.build(RECORDS)
+    assert [result['id'] for result in index.search('conciliacion')] == [11]
+    assert [result['id'] for result in index.search('Conciliación')] == [11]
+    assert [result['id'] for result in index.search('emprendedora')] == [12]
+    assert index.search('inexistente') == []
+    assert [result['id'] for result in index.search('mater', prefix=True)] == [11]
+
+
+def test_saved_index_gives_the_same_results(tmp_path):
+    index = SearchIndex.build(RECORDS)
+    path = tmp_path / 'search-index.json'
+    index.save(path)
+    loaded = SearchIndex.load(path)
+    for query in ('liderazgo', 'empresa conciliación', 'emprendedoras'):
+        assert loaded.search(query) == index.search(query)
+    assert loaded.docs[2]['url'] == '/sobre-mi'
+
+
+def test_unknown_version_is_rejected(tmp_path):
+    data = SearchIndex.build(RECORDS).to_dict()
+    data['version'] += 1
+    path = tmp_path / 'search-index.json'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    with pytest.raises(ValueError):
+        SearchIndex.load(path)
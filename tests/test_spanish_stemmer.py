@@ -0,0 +1,70 @@
+"""
+scripts.spanish_stemmer against known stems
+
+``data/spanish_stems.tsv`` holds ``word<TAB>stem`` pairs produced by the
+Snowball reference implementation (snowballstemmer 3.1.1, generated from the
+official algorithm): words from the site's posts and pages, plus inflections
+covering every suffix list of the algorithm.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from scripts.spanish_stemmer import regions, stem
+
+STEMS_PATH = Path(__file__).parent / 'data' / 'spanish_stems.tsv'
+
+
+def _known_stems():
+    with open(STEMS_PATH, encoding='utf-8') as fh:
+        return [tuple(line.rstrip('\n').split('\t')) for line in fh if line.strip()]
+
+
+KNOWN_STEMS = _known_stems()
+
+
+def test_known_stems():
+    wrong = [(word, expected, stem(word)) for word, expected in KNOWN_STEMS if stem(word) != expected]
+    assert not wrong, f"{len(wrong)} of {len(KNOWN_STEMS)} stems differ, e.g. {wrong[:5]}"
+
+
+@pytest.mark.parametrize('word, expected', [
+    ('emprendedoras', 'emprendedor'),
+    ('conciliación', 'concili'),
+    ('rápidamente', 'rapid'),
+    ('trabajando', 'trabaj'),
+    ('cantándoselo', 'cant'),
+    ('argüir', 'argü'),
+])
+def test_suffix_classes(word, expected):
+    assert stem(word) == expected
+
+
+@pytest.mark.parametrize('word, rv', [
+    # RV examples from the Snowball Spanish stemmer description
+    ('macho', 3),
+    ('oliva', 3),
+    ('trabajo', 3),
+    ('áureo', 3),
+])
+def test_rv(word, rv):
+    assert regions(word)[0] == rv
+
+
+@pytest.mark.parametrize('word, r1, r2', [
+    # R1 and R2 examples from the Snowball definitions
+    ('beautiful', 5, 7),
+    ('beauty', 5, 6),
+    ('beau', 4, 4),
+    ('animadversion', 2, 4),
+    ('sprinkled', 5, 9),
+    ('eucharist', 3, 6),
+])
+def test_r1_r2(word, r1, r2):
+    assert regions(word)[1:] == (r1, r2)
+
+
+def test_short_words_are_kept():
+    for word in ('a', 'ya', 'él', ''):
+        assert stem(word) == word.replace('é', 'e')